@@ -0,0 +1,309 @@
+"""
+Offline end-to-end benchmark of the dub pipeline.
+
+The whole generate pipeline runs against local stand-ins instead of real providers:
+fake Whisper endpoint, fake OpenAI chat completion, fake Cloud Functions, synthetic TTS provider
+and a local directory bucket. Stand-ins answer with realistic latency, which can be scaled with --latency-scale
+(0 leaves only the local CPU work of the pipeline).
+
+Reports wall time, CPU time and peak RSS of every pipeline stage for 1, 10 and 60 minutes sample videos.
+CPU-bound stages run in the job process (CPU_EXECUTOR_WORKERS=0), so all stages are profiled in one place.
+
+Run from src directory:
+    python -m benchmarks.pipeline_benchmark --durations 1 10 60 --json-output benchmark.json
+"""
+import argparse
+import functools
+import importlib
+import json
+import os
+import resource
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.stand_ins import local_servers, synthetic_tts_provider
+from benchmarks.stand_ins.sample_media import create_sample_video
+
+DEFAULT_DURATIONS_IN_MINUTES = [1, 10, 60]
+DEFAULT_TARGET_LANGUAGE = "Russian"
+DEFAULT_VOICE_ID = 165
+RSS_SAMPLING_INTERVAL_SECONDS = 0.05
+
+TOTAL_STAGE = "total"
+# Profiled functions as (module, function name, stage name), every module calls the function by its module global
+PROFILED_FUNCTIONS = [
+    ("controllers.generate", "download_blob", "download"),
+    ("controllers.generate", "start_streaming_ingest", "streaming ingest start"),
+    ("controllers.generate", "run_streaming_pipeline", "speech to text + translation + text to speech"),
+    ("services.pipeline.streaming_pipeline", "extract_audio_windows", "decode audio start"),
+    ("services.ingest.pcm_audio_windows", "plan_audio_windows", "speech to text windows planning"),
+    ("services.speech_to_text.speech_to_text", "transcribe_audio_window", "whisper window"),
+    ("services.pipeline.streaming_pipeline", "translate_text", "translation window"),
+    ("services.pipeline.streaming_pipeline", "text_to_speech", "text to speech window"),
+    ("services.text_to_speech.text_to_speech", "add_audio_timestamps_to_segments", "silence detection"),
+    ("services.pipeline.streaming_pipeline", "combine_audio_parts", "combine audio parts"),
+    ("controllers.generate", "overlay_audio_to_video", "overlay"),
+    ("controllers.generate", "upload_blob", "upload"),
+]
+TEXT_TO_SPEECH_PROVIDERS = ["generate_audio_with_elevenlabs_provider", "generate_audio_with_microsoft_provider"]
+
+
+def _read_rss_in_bytes() -> int:
+    with open("/proc/self/status") as status_file:
+        for line in status_file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+class StageProfiler:
+    """
+    Collects wall time, CPU time of the calling thread, CPU time of child processes (ffmpeg)
+    and peak RSS of the process while the stage is running.
+    Stages can overlap, e.g. windows of the streaming pipeline, so CPU time of child processes is approximate.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, dict] = {}
+        self.active_stages: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.sampler_thread = threading.Thread(target=self._sample_rss, daemon=True)
+
+    def __enter__(self):
+        self.sampler_thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop_event.set()
+        self.sampler_thread.join()
+
+    def _sample_rss(self):
+        while not self.stop_event.wait(RSS_SAMPLING_INTERVAL_SECONDS):
+            rss_in_bytes = _read_rss_in_bytes()
+            with self.lock:
+                for stage_name, active_calls in self.active_stages.items():
+                    if active_calls:
+                        stage_stats = self.stats[stage_name]
+                        stage_stats["peak_rss_bytes"] = max(stage_stats["peak_rss_bytes"], rss_in_bytes)
+
+    @contextmanager
+    def measure(self, stage_name: str):
+        with self.lock:
+            self.stats.setdefault(stage_name, {
+                "calls": 0,
+                "wall_seconds": 0.0,
+                "cpu_seconds": 0.0,
+                "child_process_cpu_seconds": 0.0,
+                "peak_rss_bytes": _read_rss_in_bytes()
+            })
+            self.active_stages[stage_name] = self.active_stages.get(stage_name, 0) + 1
+
+        start_wall_time = time.perf_counter()
+        start_cpu_time = time.thread_time()
+        start_children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        try:
+            yield
+        finally:
+            children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+            with self.lock:
+                stage_stats = self.stats[stage_name]
+                stage_stats["calls"] += 1
+                stage_stats["wall_seconds"] += time.perf_counter() - start_wall_time
+                stage_stats["cpu_seconds"] += time.thread_time() - start_cpu_time
+                stage_stats["child_process_cpu_seconds"] += (
+                    children_usage.ru_utime + children_usage.ru_stime
+                    - start_children_usage.ru_utime - start_children_usage.ru_stime
+                )
+                self.active_stages[stage_name] -= 1
+
+    def wrap(self, stage_name: str, function: Callable) -> Callable:
+        @functools.wraps(function)
+        def profiled_function(*args, **kwargs):
+            with self.measure(stage_name):
+                return function(*args, **kwargs)
+
+        return profiled_function
+
+
+def _configure_environment(bucket_dir_path: str, whisper_url: str, chat_completion_url: str, cloud_function_url: str):
+    """Point the pipeline to stand-ins, must be called before pipeline modules are imported."""
+
+    os.environ.update({
+        "LOCAL_BUCKET_DIR_PATH": bucket_dir_path,
+        "ENDPOINT_WHISPER_API_URL": whisper_url,
+        "WHISPER_BEARER_TOKEN": "benchmark",
+        "OPEN_AI_API_KEY": "benchmark",
+        "OPENAI_API_BASE": f"{chat_completion_url}/v1",
+        "ELEVEN_LABS_API_KEY": "benchmark",
+        "SPEECH_KEY": "benchmark",
+        "SPEECH_REGION": "benchmark",
+        "UPDATE_PROJECT_URL": cloud_function_url,
+        "UPDATE_USER_TOKENS_URL": cloud_function_url,
+        "SEND_EMAIL_URL": cloud_function_url,
+        "CPU_EXECUTOR_WORKERS": "0",
+        "SENTRY_DSN": "",
+    })
+
+
+def _scale_stand_ins_latency(latency_scale: float):
+    for latency_name in [
+        "WHISPER_BASE_LATENCY_SECONDS",
+        "WHISPER_LATENCY_SECONDS_PER_AUDIO_SECOND",
+        "WHISPER_LATENCY_SECONDS_PER_BATCH_ITEM",
+        "CHAT_COMPLETION_BASE_LATENCY_SECONDS",
+        "CHAT_COMPLETION_LATENCY_SECONDS_PER_CHAR",
+        "CLOUD_FUNCTION_LATENCY_SECONDS",
+    ]:
+        setattr(local_servers, latency_name, getattr(local_servers, latency_name) * latency_scale)
+    synthetic_tts_provider.LATENCY_SECONDS_PER_AUDIO_SECOND *= latency_scale
+
+
+def _patch_pipeline(profiler: StageProfiler) -> List[Tuple[object, str, Callable]]:
+    """
+    Replace TTS providers with synthetic one and wrap profiled functions of the already imported pipeline.
+
+    :return: The replaced functions as (module, function name, original function).
+    """
+
+    patches = []
+
+    def patch(module, function_name: str, function: Callable):
+        patches.append((module, function_name, getattr(module, function_name)))
+        setattr(module, function_name, function)
+
+    text_to_speech_module = importlib.import_module("services.text_to_speech.text_to_speech")
+    for provider_name in TEXT_TO_SPEECH_PROVIDERS:
+        patch(
+            text_to_speech_module,
+            provider_name,
+            profiler.wrap("text to speech provider", synthetic_tts_provider.generate_audio_with_synthetic_provider)
+        )
+
+    for module_name, function_name, stage_name in PROFILED_FUNCTIONS:
+        module = importlib.import_module(module_name)
+        if not hasattr(module, function_name):
+            print(f"Warning: {module_name}.{function_name} is not found, stage '{stage_name}' is not profiled.")
+            continue
+        patch(module, function_name, profiler.wrap(stage_name, getattr(module, function_name)))
+
+    return patches
+
+
+def _restore_pipeline(patches: List[Tuple[object, str, Callable]]):
+    for module, function_name, original_function in reversed(patches):
+        setattr(module, function_name, original_function)
+
+
+def _print_report(duration_in_minutes: int, stats: Dict[str, dict]):
+    print(f"\nSample video {duration_in_minutes} min")
+    print(f"{'stage':<48}{'calls':>7}{'wall s':>10}{'cpu s':>10}{'ffmpeg cpu s':>14}{'peak rss MiB':>14}")
+    for stage_name, stage_stats in stats.items():
+        print(
+            f"{stage_name:<48}"
+            f"{stage_stats['calls']:>7}"
+            f"{stage_stats['wall_seconds']:>10.2f}"
+            f"{stage_stats['cpu_seconds']:>10.2f}"
+            f"{stage_stats['child_process_cpu_seconds']:>14.2f}"
+            f"{stage_stats['peak_rss_bytes'] / 1024 ** 2:>14.1f}"
+        )
+
+
+def run_benchmark(
+    durations_in_minutes: List[int],
+    target_language: str,
+    voice_id: int,
+    latency_scale: float,
+    samples_dir_path: str
+) -> Dict[str, Dict[str, dict]]:
+    """
+    Run the whole pipeline for sample video of every duration.
+
+    :return: Stage stats by sample duration.
+    """
+
+    _scale_stand_ins_latency(latency_scale)
+    _, whisper_url = local_servers.start_local_server(local_servers.FakeWhisperHandler)
+    _, chat_completion_url = local_servers.start_local_server(local_servers.FakeChatCompletionHandler)
+    _, cloud_function_url = local_servers.start_local_server(local_servers.FakeCloudFunctionHandler)
+
+    bucket_dir_path = tempfile.mkdtemp(prefix="speechmate-benchmark-bucket-")
+    _configure_environment(bucket_dir_path, whisper_url, chat_completion_url, cloud_function_url)
+
+    # Pipeline reads env variables on import
+    import openai
+    from controllers import generate as generate_module
+
+    openai.api_base = f"{chat_completion_url}/v1"
+
+    results = {}
+    try:
+        for duration_in_minutes in durations_in_minutes:
+            sample_file_path = f"{samples_dir_path}/sample-{duration_in_minutes}min.mp4"
+            print(f"Preparing sample video {sample_file_path}...")
+            create_sample_video(sample_file_path, duration_in_minutes * 60)
+
+            project_id = f"benchmark-{duration_in_minutes}min-{uuid.uuid4().hex[:8]}"
+            original_file_location = f"benchmark/{project_id}/sample.mp4"
+            os.makedirs(f"{bucket_dir_path}/benchmark/{project_id}")
+            shutil.copyfile(sample_file_path, f"{bucket_dir_path}/{original_file_location}")
+
+            # Every run is patched separately, so stats of runs are not mixed
+            with StageProfiler() as profiler:
+                patches = _patch_pipeline(profiler)
+                try:
+                    with profiler.measure(TOTAL_STAGE):
+                        generate_module.generate(
+                            project_id=project_id,
+                            target_language=target_language,
+                            voice_id=voice_id,
+                            original_file_location=original_file_location,
+                            organization_id="benchmark",
+                            user_email="benchmark@example.com"
+                        )
+                finally:
+                    _restore_pipeline(patches)
+
+            _print_report(duration_in_minutes, profiler.stats)
+            results[f"{duration_in_minutes}min"] = profiler.stats
+
+    finally:
+        shutil.rmtree(bucket_dir_path, ignore_errors=True)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the dub pipeline.")
+    parser.add_argument("--durations", type=int, nargs="+", default=DEFAULT_DURATIONS_IN_MINUTES,
+                        help="Durations of sample videos in minutes.")
+    parser.add_argument("--target-language", default=DEFAULT_TARGET_LANGUAGE)
+    parser.add_argument("--voice-id", type=int, default=DEFAULT_VOICE_ID)
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplier of stand-ins latency, 0 measures only local work.")
+    parser.add_argument("--samples-dir", default=f"{tempfile.gettempdir()}/speechmate-benchmark-samples",
+                        help="Directory where sample videos are generated and reused between runs.")
+    parser.add_argument("--json-output", help="Path to save stage stats as JSON.")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        durations_in_minutes=args.durations,
+        target_language=args.target_language,
+        voice_id=args.voice_id,
+        latency_scale=args.latency_scale,
+        samples_dir_path=args.samples_dir
+    )
+
+    if args.json_output:
+        with open(args.json_output, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+        print(f"\nStage stats saved to {args.json_output}")
+
+
+if __name__ == "__main__":
+    main()
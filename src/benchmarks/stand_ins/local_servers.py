@@ -0,0 +1,146 @@
+import base64
+import io
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from contextlib import nullcontext
+from typing import List, Tuple, Type
+
+from pydub import AudioSegment
+
+# Latency of stand-ins, set by benchmark before servers are started
+WHISPER_BASE_LATENCY_SECONDS = 0.3
+WHISPER_LATENCY_SECONDS_PER_AUDIO_SECOND = 0.05
+# Windows of a batch are processed together, a batch takes the time of its longest window plus this per extra window
+WHISPER_LATENCY_SECONDS_PER_BATCH_ITEM = 0.02
+# Requests processed by fake Whisper at the same time like GPU replicas, other requests wait, 0 is unlimited
+WHISPER_MAX_CONCURRENT_REQUESTS = 0
+CHAT_COMPLETION_BASE_LATENCY_SECONDS = 0.5
+CHAT_COMPLETION_LATENCY_SECONDS_PER_CHAR = 0.002
+CLOUD_FUNCTION_LATENCY_SECONDS = 0.1
+
+# Whisper returns chunks of about 5 seconds
+WHISPER_CHUNK_DURATION_SECONDS = 5
+WHISPER_CHUNK_TEXT = " Some words that were said in this part of the video."
+
+# The text to translate is the last part of the translation prompt
+CHAT_COMPLETION_TEXT_PATTERN = re.compile(r"language:\n(.*)\n$", re.DOTALL)
+
+
+class _JsonRequestHandler(BaseHTTPRequestHandler):
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _send_json(self, payload, status_code: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+
+whisper_capacity = None
+whisper_capacity_lock = threading.Lock()
+
+
+def _get_whisper_capacity():
+    """Semaphore of WHISPER_MAX_CONCURRENT_REQUESTS, created on the first request after the benchmark has set it."""
+
+    global whisper_capacity
+
+    if WHISPER_MAX_CONCURRENT_REQUESTS <= 0:
+        return nullcontext()
+    with whisper_capacity_lock:
+        if whisper_capacity is None:
+            whisper_capacity = threading.BoundedSemaphore(WHISPER_MAX_CONCURRENT_REQUESTS)
+    return whisper_capacity
+
+
+def _get_whisper_response(audio_duration: float) -> dict:
+    chunks = []
+    chunk_start = 0.0
+    while chunk_start < audio_duration:
+        chunk_end = min(chunk_start + WHISPER_CHUNK_DURATION_SECONDS, audio_duration)
+        chunks.append({"timestamp": [chunk_start, chunk_end], "text": WHISPER_CHUNK_TEXT})
+        chunk_start = chunk_end
+
+    return {
+        "text": "".join(chunk["text"] for chunk in chunks),
+        "chunks": chunks
+    }
+
+
+class FakeWhisperHandler(_JsonRequestHandler):
+    """
+    Decodes posted audio and returns Whisper endpoint response with chunks covering the whole audio.
+    JSON request is a batch of base64 audio windows in "inputs", their responses are returned in "results".
+    """
+
+    def do_POST(self):
+        body = self._read_body()
+        is_batch = self.headers.get("Content-Type") == "application/json"
+        audio_datas: List[bytes] = (
+            [base64.b64decode(audio_data) for audio_data in json.loads(body)["inputs"]] if is_batch else [body]
+        )
+        audio_durations = [len(AudioSegment.from_file(io.BytesIO(audio_data))) / 1000 for audio_data in audio_datas]
+
+        with _get_whisper_capacity():
+            time.sleep(
+                WHISPER_BASE_LATENCY_SECONDS
+                + WHISPER_LATENCY_SECONDS_PER_AUDIO_SECOND * max(audio_durations)
+                + WHISPER_LATENCY_SECONDS_PER_BATCH_ITEM * (len(audio_durations) - 1)
+            )
+
+        responses = [_get_whisper_response(audio_duration) for audio_duration in audio_durations]
+        self._send_json({"results": responses} if is_batch else responses[0])
+
+
+class FakeChatCompletionHandler(_JsonRequestHandler):
+    """Answers OpenAI chat completion requests with the bracketed text from the prompt."""
+
+    def do_POST(self):
+        request = json.loads(self._read_body())
+        prompt = request["messages"][-1]["content"]
+        match = CHAT_COMPLETION_TEXT_PATTERN.search(prompt)
+        text_chunk = match.group(1) if match else prompt
+
+        time.sleep(CHAT_COMPLETION_BASE_LATENCY_SECONDS + CHAT_COMPLETION_LATENCY_SECONDS_PER_CHAR * len(text_chunk))
+
+        self._send_json({
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text_chunk},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+
+class FakeCloudFunctionHandler(_JsonRequestHandler):
+    """Accepts update project and update user tokens requests."""
+
+    def do_POST(self):
+        self._read_body()
+        time.sleep(CLOUD_FUNCTION_LATENCY_SECONDS)
+        self._send_json({"result": "ok"})
+
+
+def start_local_server(handler_class: Type[BaseHTTPRequestHandler]) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the stand-in on a free local port in a daemon thread, returns the server and its url."""
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
@@ -0,0 +1,26 @@
+import os
+import subprocess
+
+# Tone of 4 seconds and pause of 2 seconds, so the audio has speech-like pauses
+SAMPLE_AUDIO_EXPRESSION = "0.5*sin(2*PI*220*t)*lt(mod(t,6),4)"
+
+
+def create_sample_video(file_path: str, duration_in_seconds: int):
+    """Create a small test video with the given duration, existing file is reused."""
+
+    if os.path.exists(file_path):
+        return
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size=320x240:rate=25:duration={duration_in_seconds}",
+            "-f", "lavfi", "-i", f"aevalsrc=exprs='{SAMPLE_AUDIO_EXPRESSION}':s=44100:d={duration_in_seconds}",
+            "-c:v", "libx264", "-preset", "ultrafast",
+            "-c:a", "aac",
+            "-shortest",
+            file_path
+        ],
+        check=True
+    )
@@ -0,0 +1,39 @@
+import time
+from typing import List
+
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from models.text_segment import TextSegment
+
+# Real voices speak about 15 characters per second
+SPEECH_MS_PER_CHAR = 65
+MINIMUM_SPEECH_DURATION_MS = 500
+TONE_FREQUENCY_HZ = 220
+TONE_VOLUME_DB = -10
+# Synthesis latency of the stand-in relative to the synthesized audio duration
+LATENCY_SECONDS_PER_AUDIO_SECOND = 0.1
+
+
+def generate_audio_with_synthetic_provider(
+    output_audio_file_path: str,
+    text_segments: List[TextSegment],
+    voice_id: str,
+    pause_duration_ms: int,
+    project_id: str,
+    show_logs: bool = False,
+    language: str = None
+):
+    """
+    Stand-in for TTS providers, has the same arguments as Microsoft and ElevenLabs providers.
+    Every segment becomes a tone burst of realistic speech length, segments are divided by pauses.
+    """
+
+    audio = AudioSegment.silent(duration=pause_duration_ms)
+    for segment in text_segments:
+        speech_duration_ms = max(len(segment.text) * SPEECH_MS_PER_CHAR, MINIMUM_SPEECH_DURATION_MS)
+        audio += Sine(TONE_FREQUENCY_HZ).to_audio_segment(duration=speech_duration_ms, volume=TONE_VOLUME_DB)
+        audio += AudioSegment.silent(duration=pause_duration_ms)
+
+    time.sleep(LATENCY_SECONDS_PER_AUDIO_SECOND * len(audio) / 1000)
+    audio.export(output_audio_file_path, format="mp3")
@@ -0,0 +1,123 @@
+"""
+Offline benchmark of Whisper request batching across jobs.
+
+Several jobs transcribe their audio windows at the same time against the fake Whisper endpoint,
+which processes at most --whisper-capacity requests at once, like an endpoint with a fixed number of GPU replicas.
+Every batch size is run with the same jobs and the same capacity, and the aggregate windows per second are reported.
+
+Run from src directory:
+    python -m benchmarks.whisper_batching_benchmark --jobs 4 --windows-per-job 8 --batch-sizes 1 4 8
+"""
+import argparse
+import os
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.stand_ins import local_servers
+
+DEFAULT_BATCH_SIZES = [1, 4, 8]
+
+
+def _configure_environment(whisper_url: str, whisper_capacity: int):
+    """Point speech to text to the fake Whisper, must be called before speech to text modules are imported."""
+
+    os.environ.update({
+        "ENDPOINT_WHISPER_API_URL": whisper_url,
+        "WHISPER_BEARER_TOKEN": "benchmark",
+        # Every window must reach the endpoint
+        "TRANSCRIPT_CACHE_MAX_BYTES": "0",
+        "WHISPER_BATCH_MAX_IN_FLIGHT": str(whisper_capacity),
+        "SENTRY_DSN": "",
+    })
+
+
+def run_benchmark(
+    jobs_count: int,
+    windows_per_job: int,
+    window_seconds: int,
+    batch_sizes: List[int],
+    whisper_capacity: int
+) -> Dict[int, dict]:
+    """
+    Transcribe windows of all jobs with every batch size.
+
+    :return: Stats by batch size.
+    """
+
+    local_servers.WHISPER_MAX_CONCURRENT_REQUESTS = whisper_capacity
+    _, whisper_url = local_servers.start_local_server(local_servers.FakeWhisperHandler)
+    _configure_environment(whisper_url, whisper_capacity)
+
+    # Speech to text reads env variables on import
+    from pydub.generators import Sine
+    from services.speech_to_text import whisper_batcher
+    from services.speech_to_text.speech_to_text import transcribe_audio_windows
+
+    audio_window = Sine(440, sample_rate=16000).to_audio_segment(duration=window_seconds * 1000, volume=-20)
+
+    results = {}
+    for batch_size in batch_sizes:
+        whisper_batcher.WHISPER_BATCH_MAX_SIZE = batch_size
+        errors = []
+
+        def run_job():
+            try:
+                audio_windows = [(index * window_seconds * 1000, audio_window) for index in range(windows_per_job)]
+                for _ in transcribe_audio_windows(audio_windows=audio_windows):
+                    pass
+            except Exception as e:
+                errors.append(e)
+
+        job_threads = [threading.Thread(target=run_job) for _ in range(jobs_count)]
+        start_time = time.perf_counter()
+        for job_thread in job_threads:
+            job_thread.start()
+        for job_thread in job_threads:
+            job_thread.join()
+        wall_seconds = time.perf_counter() - start_time
+
+        if errors:
+            raise errors[0]
+
+        windows_count = jobs_count * windows_per_job
+        results[batch_size] = {
+            "windows": windows_count,
+            "wall_seconds": wall_seconds,
+            "windows_per_second": windows_count / wall_seconds
+        }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of Whisper request batching across jobs.")
+    parser.add_argument("--jobs", type=int, default=4, help="Jobs transcribing at the same time.")
+    parser.add_argument("--windows-per-job", type=int, default=8)
+    parser.add_argument("--window-seconds", type=int, default=60)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES,
+                        help="Values of WHISPER_BATCH_MAX_SIZE to compare, 1 sends every window on its own.")
+    parser.add_argument("--whisper-capacity", type=int, default=2,
+                        help="Requests processed by fake Whisper at the same time.")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        jobs_count=args.jobs,
+        windows_per_job=args.windows_per_job,
+        window_seconds=args.window_seconds,
+        batch_sizes=args.batch_sizes,
+        whisper_capacity=args.whisper_capacity
+    )
+
+    print(f"\n{args.jobs} jobs, {args.windows_per_job} windows of {args.window_seconds} s per job, "
+          f"Whisper capacity {args.whisper_capacity}")
+    print(f"{'batch size':<12}{'windows':>9}{'wall s':>10}{'windows/s':>12}")
+    for batch_size, stats in results.items():
+        print(
+            f"{batch_size:<12}{stats['windows']:>9}"
+            f"{stats['wall_seconds']:>10.2f}{stats['windows_per_second']:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 from firebase_admin import storage
 
-from configs.env import BUCKET_NAME
+from configs.env import BUCKET_NAME, LOCAL_BUCKET_DIR_PATH
+from services.firebase.storage.local_bucket import LocalBucket
 
-bucket = storage.bucket(name=BUCKET_NAME)
+if LOCAL_BUCKET_DIR_PATH:
+    bucket = LocalBucket(LOCAL_BUCKET_DIR_PATH)
+else:
+    bucket = storage.bucket(name=BUCKET_NAME)
@@ -21,6 +21,7 @@ def catch_error(
     # DO NOT MOVE THIS IMPORT unless error :)
     # TODO: write what error raises if import not here but in top of this file
     from services.firebase.firestore.project import update_project_status_and_translated_link_by_id
+    from services.progress.progress_reporter import finish_progress_reporting
 
     logging.basicConfig(
         level=logging.ERROR,
@@ -33,6 +34,8 @@ def catch_error(
 
     # Update project status to 'translationError'
     if project_id is not None:
+        # Pending progress must not overwrite the error status
+        finish_progress_reporting(project_id)
         update_project_status_and_translated_link_by_id(
             project_id=project_id,
             status=ProjectStatus.TRANSLATION_ERROR.value,
@@ -7,6 +7,9 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_dir = os.path.dirname(current_dir)
 
 PROCESSING_FILES_DIR_PATH = f"{project_dir}/tmp"
+WORKSPACES_DIR_PATH = f"{PROCESSING_FILES_DIR_PATH}/workspaces"
+MEDIA_CACHE_DIR_PATH = f"{PROCESSING_FILES_DIR_PATH}/media-cache"
+TRANSCRIPT_CACHE_DIR_PATH = f"{PROCESSING_FILES_DIR_PATH}/transcript-cache"
 
 VIDEO_SUPPORTED_EXTENSIONS = ["mp4", "avi"]
 AUDIO_SUPPORTED_EXTENSIONS = ["mp3"]
@@ -23,3 +23,17 @@ class LogTag(Enum):
     MICROSOFT_PROVIDER = "microsoft_provider"
     OVERLAY_AUDIO = "overlay_audio"
     UPDATE_USER_TOKENS = "update_user_tokens"
+    JOB_QUEUE = "job_queue"
+    ADMISSION_CONTROL = "admission_control"
+    CHECKPOINTS = "checkpoints"
+    WORKSPACE = "workspace"
+    COMBINE_AUDIO_PARTS = "combine_audio_parts"
+    STREAMING_PIPELINE = "streaming_pipeline"
+    PROVIDER_CASSETTE = "provider_cassette"
+    SHARED_JOB_QUEUE = "shared_job_queue"
+    QUEUE_WORKER = "queue_worker"
+    MEDIA_CACHE = "media_cache"
+    STREAMING_INGEST = "streaming_ingest"
+    PROGRESS_REPORTER = "progress_reporter"
+    WHISPER_WARM_UP = "whisper_warm_up"
+    TRANSCRIPT_CACHE = "transcript_cache"
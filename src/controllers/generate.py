@@ -1,28 +1,52 @@
-import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 
+from configs.env import STREAMING_INGEST
 from configs.logger import print_info_log, catch_error
-from constants.files import PROCESSING_FILES_DIR_PATH
 from constants.log_tags import LogTag
+from models.dub_target import DubTarget
 from models.file_type import FileType
+from models.job import GenerateJobRequest, JobStatus
+from models.pipeline_stage import PipelineStage
 from models.project import ProjectStatus
+from models.streaming_pipeline_result import StreamingTargetResult
+from models.text_segment import TextSegment, TextSegmentWithAudioTimestamp
+from services.checkpoints.stage_checkpoints import (
+    load_stage_checkpoint,
+    save_stage_checkpoint,
+    clear_project_checkpoints
+)
 from services.firebase.firestore.project import update_project_status_and_translated_link_by_id
 from services.firebase.firestore.user_tokens import update_user_tokens
 from services.firebase.storage.download_blob import download_blob
+from services.firebase.storage.get_blob_size import get_blob_size
 from services.firebase.storage.upload_blob import upload_blob
-from services.overlay.overlay_audio_to_video import overlay_audio_to_video
+from services.ingest.streaming_ingest import start_streaming_ingest
+from services.jobs.admission_control import AdmissionRejectedError
+from services.jobs.job_cancellation import JobCancelledError, raise_if_job_cancelled
+from services.jobs.job_queue import submit_job, wait_for_job
+from services.executors.executors import run_cpu_stage, run_io_stage, submit_cpu_stage, submit_io_stage
+from services.metrics.metrics import measure_stage
+from services.overlay.extract_source_audio import extract_source_audio
+from services.overlay.overlay_audio_to_video import overlay_audio_to_video, get_translated_video_path
+from services.pipeline.streaming_pipeline import run_streaming_pipeline
+from services.progress.progress_reporter import start_progress_reporting, report_progress, finish_progress_reporting
 from services.speech_to_text.speech_to_text import speech_to_text
+from services.speech_to_text.whisper_warm_up import start_whisper_warm_up
 from services.text_to_speech.text_to_speech import text_to_speech
 from services.translation.translate_text import translate_text
+from services.workspace.job_workspace import create_job_workspace, check_workspace_quota, remove_job_workspace
 from utils.files import get_file_extension, get_file_type, get_file_dir, get_file_name
 
 dub_router = APIRouter(tags=["DUB"])
 
 
 @dub_router.get("/")
-def generate(
+def generate_and_wait(
     project_id: str,
     target_language: str,
     voice_id: int,
@@ -31,230 +55,641 @@ def generate(
     user_email: str,
 ):
     """
-    Generates a dubbed version of the original video or audio file in the target language
-    and update user's used tokens in seconds.
-
-    :param project_id: The id of the processing project.
-    :param target_language: The language in which the video will be dubbed.
-    :param voice_id: The identifier of the voice to be used for dubbing.
-    :param original_file_location: The location of the original video file in the cloud storage.
-    :param organization_id: The unique identifier of the organization.
-    :param user_email: The unique identifier of the organization.
-
-    :return: Upload the dubbed video to Firebase Cloud Storage
-
-    :Example:
-    >>> generate(
-    ...     project_id=f"07fsfECkwma6fVTDyqQf",
-    ...     target_language="Russian",
-    ...     voice_id=165,
-    ...     original_file_location="z8Z5j71WbmhaioUHDHh5KrBqEO13/07fsfECkwma6fVTDyqQf/test-video-1min.mp4",
-    ...     organization_id="ZXIFYVhPAMql66Vg5f5Q"
-    ...     user_email="your@email.com"
-    ... )
-    Check if project_id, organization_id and original_file_location exist in Firebase
+    Runs the dub pipeline as a job and waits for its result, see generate for params.
+    If the same project with the same params is already processed, waits for the running job
+    instead of starting a new one.
     """
 
     try:
-        start_time = datetime.now()
-        print_info_log(
-            tag=LogTag.MAIN,
-            message=f"Job Started! Processing project with id {project_id}..."
+        job = submit_job(
+            job_request=GenerateJobRequest(
+                project_id=project_id,
+                target_language=target_language,
+                voice_id=voice_id,
+                original_file_location=original_file_location,
+                organization_id=organization_id,
+                user_email=user_email
+            ),
+            pipeline=generate
+        )
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_seconds)}
         )
 
-        """Download project file from Cloud Storage"""
+    finished_job = wait_for_job(job.job_id)
+    if finished_job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=finished_job.error)
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message="Downloading file from Cloud Storage..."
-        )
+    return finished_job.result
 
-        source_blob_path = original_file_location
-        # Extract extension from the original file location
-        original_file_extension = get_file_extension(original_file_location)
-        # Combine project_id with the extracted extension
-        local_original_file_path = f"{PROCESSING_FILES_DIR_PATH}/{project_id}.{original_file_extension}"
-        # Download file
-        download_blob(
-            source_blob_path=source_blob_path,
-            destination_file_path=local_original_file_path,
-            project_id=project_id,
-            show_logs=True
-        )
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message="Downloading completed."
-        )
+def get_dub_targets(
+    target_language: Optional[str],
+    voice_id: Optional[int],
+    targets: Optional[List[DubTarget]]
+) -> List[DubTarget]:
+    """Targets list, or single target from target_language and voice_id. Duplicate targets are dubbed once."""
 
-        """Change project status to "translating"""
+    if not targets:
+        targets = [DubTarget(target_language=target_language, voice_id=voice_id)]
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message="Updating project status to 'translating'..."
-        )
+    unique_targets = {}
+    for target in targets:
+        unique_targets.setdefault(target.target_id, target)
+    return list(unique_targets.values())
 
-        update_project_status_and_translated_link_by_id(
-            project_id=project_id,
-            status=ProjectStatus.TRANSLATING.value,
-            translated_file_link="",
-            show_logs=True
-        )
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message="Project status updated."
-        )
+def get_translated_blob_name(original_file_location: str, target: DubTarget, is_single_target: bool) -> str:
+    # Extract the path and filename from the original_file_location
+    original_file_dir = get_file_dir(original_file_location)
+    original_file_name = get_file_name(original_file_location)
+    original_file_suffix = get_file_extension(original_file_location)
 
-        """Convert file speech to text"""
+    # Create the destination blob name with '-translated' appended to the filename,
+    # target is appended too if the file is dubbed to several languages
+    if is_single_target:
+        return f"{original_file_dir}/{original_file_name}-translated.{original_file_suffix}"
+    return f"{original_file_dir}/{original_file_name}-translated-{target.target_id}.{original_file_suffix}"
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message="Starting speech to text..."
-        )
 
-        original_text_segments, used_tokens_in_seconds = speech_to_text(
-            file_path=local_original_file_path,
-            project_id=project_id,
-            show_logs=True
-        )
+def get_target_stage_params(original_file_location: str, target: DubTarget) -> Tuple[dict, dict]:
+    """Checkpoint params of translation and text to speech (also used by upload) of the target."""
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message="Speech to text completed."
-        )
+    translate_text_params = {
+        "original_file_location": original_file_location,
+        "target_language": target.target_language
+    }
+    text_to_speech_params = {**translate_text_params, "voice_id": target.voice_id}
+    return translate_text_params, text_to_speech_params
 
-        """Translate text"""
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message="Translating text..."
-        )
+def dub_target(
+    project_id: str,
+    target: DubTarget,
+    original_file_location: str,
+    original_text_segments: List[TextSegment],
+    streaming_target_result: Optional[StreamingTargetResult],
+    local_original_file_path: str,
+    local_source_audio_path: Optional[str],
+    workspace_dir: str,
+    is_single_target: bool,
+    cancel_event: Optional[threading.Event] = None
+) -> str:
+    """
+    Translate, synthesize, overlay and upload the dubbed file for one target.
+    Stages finished by streaming pipeline or saved to checkpoints are skipped.
+    The target is stopped before its next stage once cancel_event is set.
+
+    :return: The public link to the dubbed file.
+    """
 
-        translated_text_segments = translate_text(
-            text_segments=original_text_segments,
-            language=target_language,
+    translate_text_params, text_to_speech_params = get_target_stage_params(original_file_location, target)
+    upload_blob_params = text_to_speech_params
+
+    local_translated_audio_path = f"{workspace_dir}/{project_id}-{target.target_id}-translated.mp3"
+    translated_text_segments = None
+    translated_text_segments_with_audio_timestamp = None
+    if streaming_target_result is not None:
+        translated_text_segments = streaming_target_result.translated_text_segments
+        local_translated_audio_path = streaming_target_result.translated_audio_file_path
+        translated_text_segments_with_audio_timestamp = streaming_target_result.text_segments_with_audio_timestamp
+
+    """Translate text"""
+
+    raise_if_job_cancelled(cancel_event)
+    if translated_text_segments is None:
+        translate_text_checkpoint = load_stage_checkpoint(
             project_id=project_id,
+            stage=PipelineStage.TRANSLATE_TEXT,
+            params=translate_text_params,
+            target_id=target.target_id,
             show_logs=True
         )
+        if translate_text_checkpoint is not None:
+            translated_text_segments = [
+                TextSegment(**segment) for segment in translate_text_checkpoint["text_segments"]
+            ]
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message="Translation completed."
-        )
+            print_info_log(
+                tag=LogTag.MAIN,
+                message=f"Translation to {target.target_language} loaded from checkpoint."
+            )
+        else:
+            print_info_log(
+                tag=LogTag.MAIN,
+                message=f"Translating text to {target.target_language}..."
+            )
 
-        # """Detect gender of the voice"""
-        #
-        # gender = voice_gender_detection(video_path)
+            with measure_stage(PipelineStage.TRANSLATE_TEXT):
+                # translate_text changes segments in place, so other targets get untouched segments
+                translated_text_segments = translate_text(
+                    text_segments=[segment.copy() for segment in original_text_segments],
+                    language=target.target_language,
+                    project_id=project_id,
+                    show_logs=True
+                )
+            save_stage_checkpoint(
+                project_id=project_id,
+                stage=PipelineStage.TRANSLATE_TEXT,
+                params=translate_text_params,
+                data={"text_segments": [segment.dict() for segment in translated_text_segments]},
+                target_id=target.target_id,
+                show_logs=True
+            )
 
-        """Generate audio from translated text"""
+            print_info_log(
+                tag=LogTag.MAIN,
+                message=f"Translation to {target.target_language} completed."
+            )
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message="Text to speech..."
-        )
+    # """Detect gender of the voice"""
+    #
+    # gender = voice_gender_detection(video_path)
+
+    """Generate audio from translated text"""
 
-        local_translated_audio_path, translated_text_segments_with_audio_timestamp = text_to_speech(
-            text_segments=translated_text_segments,
-            voice_id=voice_id,
+    raise_if_job_cancelled(cancel_event)
+    if translated_text_segments_with_audio_timestamp is None:
+        text_to_speech_checkpoint = load_stage_checkpoint(
             project_id=project_id,
+            stage=PipelineStage.TEXT_TO_SPEECH,
+            params=text_to_speech_params,
+            audio_file_path=local_translated_audio_path,
+            target_id=target.target_id,
             show_logs=True
         )
+        if text_to_speech_checkpoint is not None:
+            translated_text_segments_with_audio_timestamp = [
+                TextSegmentWithAudioTimestamp(**segment)
+                for segment in text_to_speech_checkpoint["text_segments_with_audio_timestamp"]
+            ]
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message="Text to speech completed."
-        )
+            print_info_log(
+                tag=LogTag.MAIN,
+                message=f"Text to speech of {target.target_id} loaded from checkpoint."
+            )
+        else:
+            print_info_log(
+                tag=LogTag.MAIN,
+                message=f"Text to speech of {target.target_id}..."
+            )
 
-        """Overlay audio to video"""
+            with measure_stage(PipelineStage.TEXT_TO_SPEECH):
+                local_translated_audio_path, translated_text_segments_with_audio_timestamp = text_to_speech(
+                    text_segments=translated_text_segments,
+                    voice_id=target.voice_id,
+                    project_id=project_id,
+                    translated_audio_file_path=local_translated_audio_path,
+                    show_logs=True
+                )
+            save_stage_checkpoint(
+                project_id=project_id,
+                stage=PipelineStage.TEXT_TO_SPEECH,
+                params=text_to_speech_params,
+                data={
+                    "text_segments_with_audio_timestamp": [
+                        segment.dict() for segment in translated_text_segments_with_audio_timestamp
+                    ]
+                },
+                audio_file_path=local_translated_audio_path,
+                target_id=target.target_id,
+                show_logs=True
+            )
 
-        processed_project_is_video = get_file_type(local_original_file_path) == FileType.VIDEO
-        # Overlay audio if project is video
-        if processed_project_is_video:
             print_info_log(
                 tag=LogTag.MAIN,
-                message="Overlay audio to video..."
+                message=f"Text to speech of {target.target_id} completed."
             )
 
-            local_translated_file_path = overlay_audio_to_video(
+    """Overlay audio to video"""
+
+    raise_if_job_cancelled(cancel_event)
+    destination_blob_name = get_translated_blob_name(original_file_location, target, is_single_target)
+    upload_future = None
+
+    # Overlay audio if project is video
+    if get_file_type(original_file_location) == FileType.VIDEO:
+        print_info_log(
+            tag=LogTag.MAIN,
+            message=f"Overlay audio of {target.target_id} to video..."
+        )
+
+        report_progress(project_id, PipelineStage.OVERLAY_AUDIO)
+        translated_file_name = f"{project_id}-{target.target_id}-translated"
+        with measure_stage(PipelineStage.OVERLAY_AUDIO):
+            # Decoding, stretching and encoding run in process pool, errors are reported once by the job
+            overlay_future = submit_cpu_stage(
+                overlay_audio_to_video,
                 video_path=local_original_file_path,
                 audio_path=local_translated_audio_path,
                 text_segments_with_audio_timestamp=translated_text_segments_with_audio_timestamp,
-                project_id=project_id,
                 silent_original_audio=False,
+                workspace_dir=workspace_dir,
+                source_audio_path=local_source_audio_path,
+                translated_file_name=translated_file_name,
+                show_logs=True
+            )
+            # Parts of the video are uploaded while the encoder is still writing it
+            local_translated_file_path = get_translated_video_path(
+                video_path=local_original_file_path,
+                workspace_dir=workspace_dir,
+                translated_file_name=translated_file_name
+            )
+            upload_future = submit_io_stage(
+                upload_blob,
+                source_file_name=local_translated_file_path,
+                destination_blob_name=destination_blob_name,
+                project_id=project_id,
+                encoder_future=overlay_future,
                 show_logs=True
             )
+            try:
+                overlay_future.result()
+            except Exception:
+                # Uploader reads the encoder output, so it must stop before the workspace is removed
+                wait([upload_future])
+                raise
+        check_workspace_quota(workspace_dir)
 
-            print_info_log(
-                tag=LogTag.MAIN,
-                message="Overlay audio completed."
+        print_info_log(
+            tag=LogTag.MAIN,
+            message=f"Overlay audio of {target.target_id} completed."
+        )
+
+    # Unless return translated audio
+    else:
+        local_translated_file_path = local_translated_audio_path
+
+    """Upload audio to cloud storage"""
+
+    raise_if_job_cancelled(cancel_event)
+    print_info_log(
+        tag=LogTag.MAIN,
+        message=f"Uploading translated file of {target.target_id} to cloud storage..."
+    )
+
+    report_progress(project_id, PipelineStage.UPLOAD_BLOB)
+    with measure_stage(PipelineStage.UPLOAD_BLOB):
+        if upload_future is None:
+            upload_future = submit_io_stage(
+                upload_blob,
+                source_file_name=local_translated_file_path,
+                destination_blob_name=destination_blob_name,
+                project_id=project_id,
+                show_logs=True
             )
+        file_public_link = upload_future.result()
+    save_stage_checkpoint(
+        project_id=project_id,
+        stage=PipelineStage.UPLOAD_BLOB,
+        params=upload_blob_params,
+        data={"translated_file_link": file_public_link},
+        target_id=target.target_id,
+        show_logs=True
+    )
 
-        # Unless return translated audio
-        else:
-            local_translated_file_path = local_translated_audio_path
+    print_info_log(
+        tag=LogTag.MAIN,
+        message=f"File uploaded to cloud storage, destination_blob_name - {destination_blob_name}"
+    )
 
-        """Upload audio to cloud storage"""
+    return file_public_link
 
-        # Extract the path and filename from the original_file_location
-        original_file_dir = get_file_dir(original_file_location)
-        original_file_name = get_file_name(original_file_location)
-        original_file_suffix = get_file_extension(original_file_location)
 
-        # Create the destination blob name with '-translated' appended to the filename
-        destination_blob_name = f"{original_file_dir}/{original_file_name}-translated.{original_file_suffix}"
+def generate(
+    project_id: str,
+    target_language: Optional[str],
+    voice_id: Optional[int],
+    original_file_location: str,
+    organization_id: str,
+    user_email: str,
+    targets: Optional[List[DubTarget]] = None,
+    cancel_event: Optional[threading.Event] = None
+):
+    """
+    Generates dubbed versions of the original video or audio file in the target languages
+    and update user's used tokens in seconds.
+    The file is downloaded and transcribed once, translation, text to speech and overlay run for every target.
+
+    :param project_id: The id of the processing project.
+    :param target_language: The language in which the video will be dubbed, used if targets are not set.
+    :param voice_id: The identifier of the voice to be used for dubbing, used if targets are not set.
+    :param original_file_location: The location of the original video file in the cloud storage.
+    :param organization_id: The unique identifier of the organization.
+    :param user_email: The unique identifier of the organization.
+    :param targets: The languages and voices to dub the file to.
+    :param cancel_event: Set by the queue worker when the job lease is lost, the job stops before its next stage
+        without changing the project status, because another worker continues it.
+
+    :return: Upload the dubbed videos to Firebase Cloud Storage
+
+    :Example:
+    >>> generate(
+    ...     project_id=f"07fsfECkwma6fVTDyqQf",
+    ...     target_language="Russian",
+    ...     voice_id=165,
+    ...     original_file_location="z8Z5j71WbmhaioUHDHh5KrBqEO13/07fsfECkwma6fVTDyqQf/test-video-1min.mp4",
+    ...     organization_id="ZXIFYVhPAMql66Vg5f5Q"
+    ...     user_email="your@email.com"
+    ... )
+    Check if project_id, organization_id and original_file_location exist in Firebase
+    """
 
+    workspace_dir = None
+    streaming_ingest = None
+    try:
+        start_time = datetime.now()
         print_info_log(
             tag=LogTag.MAIN,
-            message="Uploading translated file to cloud storage..."
+            message=f"Job Started! Processing project with id {project_id}..."
         )
 
-        file_public_link = upload_blob(
-            source_file_name=local_translated_file_path,
-            destination_blob_name=destination_blob_name,
+        # Progress is reported in background, so slow update project function does not block the job
+        start_progress_reporting(project_id)
+
+        targets = get_dub_targets(target_language, voice_id, targets)
+        is_single_target = len(targets) == 1
+
+        # Every stage output is saved to checkpoint, so re-run of the project skips finished stages
+        speech_to_text_params = {"original_file_location": original_file_location}
+
+        processed_project_is_video = get_file_type(original_file_location) == FileType.VIDEO
+
+        # All job files are kept in a separate workspace, which is removed when the job ends
+        original_file_size_in_bytes = run_io_stage(get_blob_size, source_blob_path=original_file_location)
+        workspace_dir = create_job_workspace(
             project_id=project_id,
+            original_file_size_in_bytes=original_file_size_in_bytes,
+            targets_count=len(targets),
             show_logs=True
         )
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message=f"File uploaded to cloud storage, destination_blob_name - {destination_blob_name}"
+        # Extract extension from the original file location
+        original_file_extension = get_file_extension(original_file_location)
+        # Combine project_id with the extracted extension
+        local_original_file_path = f"{workspace_dir}/{project_id}.{original_file_extension}"
+        local_source_audio_path = None
+
+        speech_to_text_checkpoint = load_stage_checkpoint(
+            project_id=project_id,
+            stage=PipelineStage.SPEECH_TO_TEXT,
+            params=speech_to_text_params,
+            show_logs=True
         )
 
-        """Remove all processed files"""
+        # Links of targets uploaded by previous run of the project
+        translated_file_links = {}
+        for target in targets:
+            _, upload_blob_params = get_target_stage_params(original_file_location, target)
+            upload_blob_checkpoint = load_stage_checkpoint(
+                project_id=project_id,
+                stage=PipelineStage.UPLOAD_BLOB,
+                params=upload_blob_params,
+                target_id=target.target_id,
+                show_logs=True
+            )
+            if upload_blob_checkpoint is not None:
+                translated_file_links[target.target_id] = upload_blob_checkpoint["translated_file_link"]
+        pending_targets = [target for target in targets if target.target_id not in translated_file_links]
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message="Removing all project processed files..."
+        # Whisper endpoint scaled to zero starts while the original file is downloading
+        if speech_to_text_checkpoint is None:
+            start_whisper_warm_up()
+
+        """Download project file from Cloud Storage"""
+
+        raise_if_job_cancelled(cancel_event)
+        # Original file is needed for speech to text and for overlay
+        original_file_is_needed = speech_to_text_checkpoint is None or (
+            processed_project_is_video and pending_targets
         )
+        if original_file_is_needed:
+            print_info_log(
+                tag=LogTag.MAIN,
+                message="Downloading file from Cloud Storage..."
+            )
+
+            # Download file
+            with measure_stage(PipelineStage.DOWNLOAD_BLOB):
+                # Speech to text of a single target reads audio windows while the file is still downloading
+                if STREAMING_INGEST and speech_to_text_checkpoint is None and len(pending_targets) == 1:
+                    streaming_ingest = run_io_stage(
+                        start_streaming_ingest,
+                        source_blob_path=original_file_location,
+                        destination_file_path=local_original_file_path,
+                        show_logs=True
+                    )
+                if streaming_ingest is None:
+                    run_io_stage(
+                        download_blob,
+                        source_blob_path=original_file_location,
+                        destination_file_path=local_original_file_path,
+                        project_id=project_id,
+                        show_logs=True
+                    )
+
+            if streaming_ingest is None:
+                check_workspace_quota(workspace_dir)
+
+                print_info_log(
+                    tag=LogTag.MAIN,
+                    message="Downloading completed."
+                )
+
+            # Video audio is decoded once for speech to text and overlay of all targets
+            if processed_project_is_video and len(pending_targets) > 1:
+                local_source_audio_path = run_cpu_stage(
+                    extract_source_audio,
+                    video_path=local_original_file_path,
+                    output_audio_file_path=f"{workspace_dir}/{project_id}-source-audio.wav",
+                    show_logs=True
+                )
+                check_workspace_quota(workspace_dir)
+
+        """Report speech to text progress, project status is changed to "translating" by the first report"""
+
+        report_progress(project_id, PipelineStage.SPEECH_TO_TEXT)
+
+        """Convert file speech to text"""
 
-        # Remove original file
-        os.remove(local_original_file_path)
-        # Remove translated file
-        if processed_project_is_video:
-            os.remove(local_translated_file_path)
-            os.remove(local_translated_audio_path)
+        raise_if_job_cancelled(cancel_event)
+        def save_speech_to_text_checkpoint(text_segments: List[TextSegment], tokens_in_seconds: int):
+            save_stage_checkpoint(
+                project_id=project_id,
+                stage=PipelineStage.SPEECH_TO_TEXT,
+                params=speech_to_text_params,
+                data={
+                    "text_segments": [segment.dict() for segment in text_segments],
+                    "used_tokens_in_seconds": tokens_in_seconds
+                },
+                show_logs=True
+            )
+
+        def report_speech_to_text_progress(transcribed_windows_count: int, windows_count: Optional[int]):
+            # Windows count of streaming ingest is known only at the end of the stream
+            if windows_count:
+                report_progress(project_id, PipelineStage.SPEECH_TO_TEXT, transcribed_windows_count / windows_count)
+
+        # Outputs of translation and text to speech by target, if they are already done by streaming pipeline
+        streaming_target_results = {}
+        speech_to_text_file_path = local_source_audio_path or local_original_file_path
+
+        if speech_to_text_checkpoint is not None:
+            original_text_segments = [
+                TextSegment(**segment) for segment in speech_to_text_checkpoint["text_segments"]
+            ]
+            used_tokens_in_seconds = speech_to_text_checkpoint["used_tokens_in_seconds"]
+
+            print_info_log(
+                tag=LogTag.MAIN,
+                message="Speech to text loaded from checkpoint."
+            )
+        elif not pending_targets:
+            # Only used tokens are needed, because translated files are already uploaded
+            print_info_log(
+                tag=LogTag.MAIN,
+                message="Starting speech to text..."
+            )
+
+            with measure_stage(PipelineStage.SPEECH_TO_TEXT):
+                original_text_segments, used_tokens_in_seconds = speech_to_text(
+                    file_path=speech_to_text_file_path,
+                    project_id=project_id,
+                    show_logs=True
+                )
+            save_speech_to_text_checkpoint(original_text_segments, used_tokens_in_seconds)
+
+            print_info_log(
+                tag=LogTag.MAIN,
+                message="Speech to text completed."
+            )
         else:
-            os.remove(local_translated_file_path)
+            # Translate and synthesize every transcribed window while the next windows are still transcribed
+            print_info_log(
+                tag=LogTag.MAIN,
+                message="Starting speech to text, translation and text to speech..."
+            )
 
-        print_info_log(
-            tag=LogTag.MAIN,
-            message="Removing completed."
-        )
+            streaming_pipeline_result = run_streaming_pipeline(
+                file_path=speech_to_text_file_path,
+                targets=pending_targets,
+                project_id=project_id,
+                workspace_dir=workspace_dir,
+                on_speech_to_text_completed=save_speech_to_text_checkpoint,
+                on_window_transcribed=report_speech_to_text_progress,
+                streaming_ingest=streaming_ingest,
+                cancel_event=cancel_event,
+                show_logs=True
+            )
+
+            # Overlay needs the whole original file
+            if streaming_ingest is not None:
+                with measure_stage(PipelineStage.DOWNLOAD_BLOB):
+                    streaming_ingest.wait_for_download()
+
+                print_info_log(
+                    tag=LogTag.MAIN,
+                    message="Downloading completed."
+                )
+
+            check_workspace_quota(workspace_dir)
+            original_text_segments = streaming_pipeline_result.original_text_segments
+            used_tokens_in_seconds = streaming_pipeline_result.used_tokens_in_seconds
+
+            for target_result in streaming_pipeline_result.target_results:
+                target = target_result.target
+                streaming_target_results[target.target_id] = target_result
+                translate_text_params, text_to_speech_params = get_target_stage_params(original_file_location, target)
+                save_stage_checkpoint(
+                    project_id=project_id,
+                    stage=PipelineStage.TRANSLATE_TEXT,
+                    params=translate_text_params,
+                    data={"text_segments": [segment.dict() for segment in target_result.translated_text_segments]},
+                    target_id=target.target_id,
+                    show_logs=True
+                )
+                save_stage_checkpoint(
+                    project_id=project_id,
+                    stage=PipelineStage.TEXT_TO_SPEECH,
+                    params=text_to_speech_params,
+                    data={
+                        "text_segments_with_audio_timestamp": [
+                            segment.dict() for segment in target_result.text_segments_with_audio_timestamp
+                        ]
+                    },
+                    audio_file_path=target_result.translated_audio_file_path,
+                    target_id=target.target_id,
+                    show_logs=True
+                )
+
+            print_info_log(
+                tag=LogTag.MAIN,
+                message="Speech to text, translation and text to speech completed."
+            )
+
+        if not pending_targets:
+            print_info_log(
+                tag=LogTag.MAIN,
+                message="Translated files are already uploaded, translation, text to speech and overlay are skipped."
+            )
+        else:
+            # Targets are dubbed in parallel, every target runs its stages one by one
+            with ThreadPoolExecutor(
+                max_workers=len(pending_targets),
+                thread_name_prefix=f"dub-target-{project_id}"
+            ) as targets_executor:
+                target_futures = {
+                    target.target_id: targets_executor.submit(
+                        dub_target,
+                        project_id=project_id,
+                        target=target,
+                        original_file_location=original_file_location,
+                        original_text_segments=original_text_segments,
+                        streaming_target_result=streaming_target_results.get(target.target_id),
+                        local_original_file_path=local_original_file_path,
+                        local_source_audio_path=local_source_audio_path,
+                        workspace_dir=workspace_dir,
+                        is_single_target=is_single_target,
+                        cancel_event=cancel_event
+                    )
+                    for target in pending_targets
+                }
+            for target_id, target_future in target_futures.items():
+                translated_file_links[target_id] = target_future.result()
+
+        translated_files = [
+            {
+                "target_language": target.target_language,
+                "voice_id": target.voice_id,
+                "translated_file_link": translated_file_links[target.target_id]
+            }
+            for target in targets
+        ]
+        file_public_link = translated_files[0]["translated_file_link"]
 
         """Change project status to "translated"""
 
+        raise_if_job_cancelled(cancel_event)
+        # Pending progress must not overwrite the final status
+        finish_progress_reporting(project_id)
+
         print_info_log(
             tag=LogTag.MAIN,
             message="Updating project status to 'translated'..."
         )
 
-        update_project_status_and_translated_link_by_id(
-            project_id=project_id,
-            status=ProjectStatus.TRANSLATED.value,
-            translated_file_link=file_public_link,
-            show_logs=True
-        )
+        with measure_stage(PipelineStage.UPDATE_PROJECT):
+            run_io_stage(
+                update_project_status_and_translated_link_by_id,
+                project_id=project_id,
+                status=ProjectStatus.TRANSLATED.value,
+                translated_file_link=file_public_link,
+                translated_file_links=None if is_single_target else translated_files,
+                show_logs=True
+            )
 
         print_info_log(
             tag=LogTag.MAIN,
@@ -268,17 +703,26 @@ def generate(
             message="Updating user used tokens..."
         )
 
-        update_user_tokens(
-            organization_id=organization_id,
-            tokens_in_seconds=used_tokens_in_seconds,
-            project_id=project_id
-        )
+        with measure_stage(PipelineStage.UPDATE_USER_TOKENS):
+            # Every target is billed as a separate dub of the file
+            run_io_stage(
+                update_user_tokens,
+                organization_id=organization_id,
+                tokens_in_seconds=used_tokens_in_seconds * len(targets),
+                project_id=project_id
+            )
 
         print_info_log(
             tag=LogTag.MAIN,
             message="User used tokens updated."
         )
 
+        # Job is done, so next run of this project must start from scratch
+        clear_project_checkpoints(
+            project_id=project_id,
+            show_logs=True
+        )
+
         """Send email to user about successful project completion"""
 
         # print_info_log(
@@ -304,7 +748,19 @@ def generate(
             message=f"Job Done! Project translation time: {time_difference}"
         )
 
-        return {"status": "it is working!!!"}
+        return {
+            "status": "it is working!!!",
+            "translated_file_link": file_public_link,
+            "translated_files": translated_files
+        }
+
+    except JobCancelledError:
+        # Project status belongs to the worker that continues the job
+        print_info_log(
+            tag=LogTag.MAIN,
+            message=f"Job of project {project_id} is cancelled."
+        )
+        raise
 
     except Exception as e:
         catch_error(
@@ -313,6 +769,21 @@ def generate(
             project_id=project_id
         )
 
+    finally:
+        finish_progress_reporting(project_id)
+
+        """Remove all processed files"""
+
+        if streaming_ingest is not None:
+            streaming_ingest.close()
+
+        # Workspace is removed on error too, so failed jobs do not leave files on disk
+        if workspace_dir is not None:
+            remove_job_workspace(
+                workspace_dir=workspace_dir,
+                show_logs=True
+            )
+
 
 if __name__ == "__main__":
     test_user_id = "z8Z5j71WbmhaioUHDHh5KrBqEO13"
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException
+
+from controllers.generate import generate
+from models.job import GenerateJobRequest, Job
+from services.jobs.admission_control import AdmissionRejectedError
+from services.jobs.job_queue import submit_job, get_job_by_id
+
+jobs_router = APIRouter(tags=["JOBS"])
+
+
+@jobs_router.post("/jobs", status_code=202, response_model=Job)
+def create_job(job_request: GenerateJobRequest):
+    """
+    Enqueues the dub pipeline for the project and returns the job without waiting for its result.
+    Use GET /jobs/{job_id} to check the job state.
+    If the machine is at capacity, responds with 429 and Retry-After header.
+    """
+
+    try:
+        return submit_job(
+            job_request=job_request,
+            pipeline=generate
+        )
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_seconds)}
+        )
+
+
+@jobs_router.get("/jobs/{job_id}", response_model=Job)
+def get_job(job_id: str):
+    job = get_job_by_id(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job with id {job_id} is not found.")
+
+    return job
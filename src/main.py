@@ -1,11 +1,41 @@
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-from controllers.generate import dub_router
+from configs.env import IS_SHARED_JOB_QUEUE_ENABLED, WORKER_MODE
+from controllers.generate import dub_router, generate
+from controllers.jobs import jobs_router
+from services.executors.executors import shutdown_executors
+from services.jobs.job_queue import get_pipeline_kwargs
+from services.jobs.queue_worker import start_queue_workers, stop_queue_workers
+from services.jobs.shared_job_queue import init_shared_job_queue
+from services.media_cache.media_cache import sweep_media_cache_partials
+from services.workspace.job_workspace import sweep_orphaned_workspaces
 
 app = FastAPI()
 
 app.include_router(dub_router)
+app.include_router(jobs_router)
+
+
+@app.on_event("startup")
+def startup():
+    sweep_orphaned_workspaces()
+    sweep_media_cache_partials()
+
+    if WORKER_MODE and not IS_SHARED_JOB_QUEUE_ENABLED:
+        raise ValueError("WORKER_MODE requires SHARED_JOB_QUEUE_URL or SHARED_JOB_QUEUE_DB_PATH to be set.")
+    if IS_SHARED_JOB_QUEUE_ENABLED:
+        init_shared_job_queue()
+    if WORKER_MODE:
+        start_queue_workers(generate, get_pipeline_kwargs)
+
+
+@app.on_event("shutdown")
+def shutdown():
+    if WORKER_MODE:
+        stop_queue_workers()
+    shutdown_executors()
 
 
 @app.get("/healthcheck")
@@ -13,6 +43,11 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     print("main started")
     uvicorn.run("main:app", host="0.0.0.0", port=8080, reload=True)
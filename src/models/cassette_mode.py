@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class CassetteMode(str, Enum):
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
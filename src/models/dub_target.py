@@ -0,0 +1,14 @@
+import re
+
+from pydantic import BaseModel
+
+
+class DubTarget(BaseModel):
+    target_language: str
+    voice_id: int
+
+    @property
+    def target_id(self) -> str:
+        """Unique name of the target, used in file names, blob names and checkpoints."""
+
+        return f"{re.sub(r'[^a-z0-9]+', '-', self.target_language.lower()).strip('-')}-{self.voice_id}"
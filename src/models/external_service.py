@@ -0,0 +1,14 @@
+from enum import Enum
+
+
+class ExternalService(str, Enum):
+    WHISPER_ENDPOINT = "whisper_endpoint"
+    OPEN_AI = "open_ai"
+    ELEVEN_LABS = "eleven_labs"
+    MICROSOFT = "microsoft"
+    FIREBASE_STORAGE = "firebase_storage"
+    UPDATE_PROJECT_FUNCTION = "update_project_function"
+    UPDATE_USER_TOKENS_FUNCTION = "update_user_tokens_function"
+    SEND_EMAIL_FUNCTION = "send_email_function"
+    STRIPE = "stripe"
+    GENDER_DETECTION = "gender_detection"
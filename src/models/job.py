@@ -0,0 +1,45 @@
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, root_validator
+
+from models.dub_target import DubTarget
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class GenerateJobRequest(BaseModel):
+    project_id: str
+    # Single target, used if targets are not set
+    target_language: Optional[str] = None
+    voice_id: Optional[int] = None
+    original_file_location: str
+    organization_id: str
+    user_email: str
+    # Several languages are dubbed from one transcription
+    targets: Optional[List[DubTarget]] = None
+    # Used for admission control, estimated from the file size if not set
+    media_duration_seconds: Optional[float] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_targets(cls, values):
+        if not values.get("targets") and (values.get("target_language") is None or values.get("voice_id") is None):
+            raise ValueError("Either targets or target_language and voice_id must be set.")
+        return values
+
+
+class Job(BaseModel):
+    job_id: str
+    status: JobStatus
+    request: GenerateJobRequest
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
@@ -0,0 +1,14 @@
+from enum import Enum
+
+
+class PipelineStage(str, Enum):
+    JOB = "job"
+    DOWNLOAD_BLOB = "download_blob"
+    SPEECH_TO_TEXT = "speech_to_text"
+    TRANSLATE_TEXT = "translate_text"
+    TEXT_TO_SPEECH = "text_to_speech"
+    COMBINE_AUDIO_PARTS = "combine_audio_parts"
+    OVERLAY_AUDIO = "overlay_audio"
+    UPLOAD_BLOB = "upload_blob"
+    UPDATE_PROJECT = "update_project"
+    UPDATE_USER_TOKENS = "update_user_tokens"
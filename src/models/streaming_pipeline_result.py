@@ -0,0 +1,19 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from models.dub_target import DubTarget
+from models.text_segment import TextSegment, TextSegmentWithAudioTimestamp
+
+
+class StreamingTargetResult(BaseModel):
+    target: DubTarget
+    translated_text_segments: List[TextSegment]
+    translated_audio_file_path: str
+    text_segments_with_audio_timestamp: List[TextSegmentWithAudioTimestamp]
+
+
+class StreamingPipelineResult(BaseModel):
+    original_text_segments: List[TextSegment]
+    used_tokens_in_seconds: int
+    target_results: List[StreamingTargetResult]
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, TypeVar, Union
+
+import requests
+
+from configs.env import PROVIDER_CASSETTE_MODE, PROVIDER_CASSETTE_DIR_PATH, PROVIDER_CASSETTE_REPLAY_TIMING
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from models.cassette_mode import CassetteMode
+from models.external_service import ExternalService
+
+T = TypeVar("T")
+
+cassette_mode = CassetteMode(PROVIDER_CASSETTE_MODE)
+replay_with_recorded_timing = PROVIDER_CASSETTE_REPLAY_TIMING == "recorded"
+
+# Replayed interactions count by request key, so repeated identical requests get their recorded responses in order
+replayed_interactions_count: Dict[str, int] = {}
+cassette_lock = threading.Lock()
+
+
+class CassetteMissError(Exception):
+    """Request has no recorded interaction in replay mode."""
+
+
+class CassetteResponse:
+    """Replayed HTTP response with the subset of requests.Response API that the pipeline uses."""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def _get_request_key(service: ExternalService, request_data: Union[bytes, str, dict]) -> str:
+    if isinstance(request_data, dict):
+        request_data = json.dumps(request_data, sort_keys=True, ensure_ascii=False)
+    if isinstance(request_data, str):
+        request_data = request_data.encode("utf-8")
+    return f"{service.value}-{hashlib.sha256(request_data).hexdigest()[:32]}"
+
+
+def _get_interactions_file_path(request_key: str) -> str:
+    return f"{PROVIDER_CASSETTE_DIR_PATH}/{request_key}.json"
+
+
+def _get_payload_file_path(request_key: str, interaction_index: int) -> str:
+    return f"{PROVIDER_CASSETTE_DIR_PATH}/{request_key}-{interaction_index}.bin"
+
+
+def _load_interactions(request_key: str) -> list:
+    interactions_file_path = _get_interactions_file_path(request_key)
+    if not os.path.exists(interactions_file_path):
+        return []
+    with open(interactions_file_path, "r") as f:
+        return json.load(f)
+
+
+def _record_interaction(
+    service: ExternalService,
+    request_key: str,
+    response_data: dict,
+    payload: Optional[bytes],
+    duration_in_seconds: float
+):
+    with cassette_lock:
+        os.makedirs(PROVIDER_CASSETTE_DIR_PATH, exist_ok=True)
+        interactions = _load_interactions(request_key)
+        interaction_index = len(interactions)
+        if payload is not None:
+            with open(_get_payload_file_path(request_key, interaction_index), "wb") as f:
+                f.write(payload)
+        interactions.append({
+            "service": service.value,
+            "duration_in_seconds": duration_in_seconds,
+            "response": response_data,
+            "has_payload": payload is not None
+        })
+        with open(_get_interactions_file_path(request_key), "w") as f:
+            json.dump(interactions, f, ensure_ascii=False)
+
+
+def _replay_interaction(request_key: str) -> Tuple[dict, Optional[bytes], float]:
+    with cassette_lock:
+        interactions = _load_interactions(request_key)
+        if not interactions:
+            raise CassetteMissError(
+                f"Request {request_key} is not recorded in cassette {PROVIDER_CASSETTE_DIR_PATH}."
+            )
+        # The last recorded interaction is served again if the request is repeated more times than recorded
+        interaction_index = min(replayed_interactions_count.get(request_key, 0), len(interactions) - 1)
+        replayed_interactions_count[request_key] = interaction_index + 1
+
+        interaction = interactions[interaction_index]
+        payload = None
+        if interaction["has_payload"]:
+            with open(_get_payload_file_path(request_key, interaction_index), "rb") as f:
+                payload = f.read()
+
+    return interaction["response"], payload, interaction["duration_in_seconds"]
+
+
+def call_with_cassette(
+    service: ExternalService,
+    request_data: Union[bytes, str, dict],
+    call: Callable[[], T],
+    encode_response: Callable[[T], Tuple[dict, Optional[bytes]]],
+    decode_response: Callable[[dict, Optional[bytes]], T]
+) -> T:
+    """
+    Make the external call, record it to cassette or replay it from cassette depending on PROVIDER_CASSETTE_MODE.
+    Only successful calls are recorded, errors are raised as usual.
+
+    :param service: The called external service.
+    :param request_data: The data that identifies the request, e.g. request body without secrets.
+    :param call: Makes the real call.
+    :param encode_response: Converts the call result to JSON data and optional binary payload (e.g. audio).
+    :param decode_response: Converts recorded JSON data and payload back to the call result.
+
+    :return: The real or replayed call result.
+
+    :raises CassetteMissError: If the request is not recorded in replay mode.
+    """
+
+    if cassette_mode == CassetteMode.OFF:
+        return call()
+
+    request_key = _get_request_key(service, request_data)
+
+    if cassette_mode == CassetteMode.REPLAY:
+        response_data, payload, duration_in_seconds = _replay_interaction(request_key)
+        if replay_with_recorded_timing:
+            time.sleep(duration_in_seconds)
+        return decode_response(response_data, payload)
+
+    call_start_time = time.perf_counter()
+    result = call()
+    duration_in_seconds = time.perf_counter() - call_start_time
+
+    response_data, payload = encode_response(result)
+    _record_interaction(service, request_key, response_data, payload, duration_in_seconds)
+
+    print_info_log(
+        tag=LogTag.PROVIDER_CASSETTE,
+        message=f"Recorded {service.value} call {request_key} ({duration_in_seconds:.2f}s)."
+    )
+
+    return result
+
+
+def post_with_cassette(
+    service: ExternalService,
+    request_data: Union[bytes, str, dict],
+    post: Callable[[], requests.Response]
+) -> Union[requests.Response, CassetteResponse]:
+    """Record or replay HTTP post, the status code and the body of the response are recorded."""
+
+    return call_with_cassette(
+        service=service,
+        request_data=request_data,
+        call=post,
+        encode_response=lambda response: ({"status_code": response.status_code, "text": response.text}, None),
+        decode_response=lambda response_data, _: CassetteResponse(**response_data)
+    )
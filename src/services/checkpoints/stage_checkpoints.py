@@ -0,0 +1,141 @@
+import json
+from typing import Optional
+
+from configs.firebase import bucket
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from models.pipeline_stage import PipelineStage
+
+CHECKPOINTS_BUCKET_DIR = "checkpoints"
+
+
+def get_checkpoint_blob_path(
+    project_id: str,
+    stage: PipelineStage,
+    extension: str = "json",
+    target_id: Optional[str] = None
+) -> str:
+    checkpoint_name = stage.value if target_id is None else f"{stage.value}-{target_id}"
+    return f"{CHECKPOINTS_BUCKET_DIR}/{project_id}/{checkpoint_name}.{extension}"
+
+
+def save_stage_checkpoint(
+    project_id: str,
+    stage: PipelineStage,
+    params: dict,
+    data: dict,
+    audio_file_path: Optional[str] = None,
+    target_id: Optional[str] = None,
+    show_logs: bool = False
+):
+    """
+    Persist the output of a finished pipeline stage to Cloud Storage under the project id.
+    Checkpoint errors are only logged, because the job itself can continue without checkpoint.
+
+    :param project_id: The id of the processing project.
+    :param stage: The finished pipeline stage.
+    :param params: The job params the stage output depends on. Checkpoint is reused only with the same params.
+    :param data: JSON serializable stage output.
+    :param audio_file_path: Optional path to the audio file produced by the stage.
+    :param target_id: The dub target of the stage, stages of every target are saved separately.
+    :param show_logs: Determines whether to display logs while saving checkpoint.
+    """
+
+    try:
+        # Upload audio before JSON, so JSON existence means the whole checkpoint is saved
+        if audio_file_path is not None:
+            audio_blob = bucket.blob(get_checkpoint_blob_path(project_id, stage, extension="mp3", target_id=target_id))
+            audio_blob.upload_from_filename(audio_file_path)
+
+        checkpoint_blob = bucket.blob(get_checkpoint_blob_path(project_id, stage, target_id=target_id))
+        checkpoint_blob.upload_from_string(
+            json.dumps({"params": params, "data": data}),
+            content_type="application/json"
+        )
+
+        if show_logs:
+            print_info_log(
+                tag=LogTag.CHECKPOINTS,
+                message=f"Checkpoint of stage '{stage.value}' saved for project {project_id}."
+            )
+
+    except Exception as e:
+        print_info_log(
+            tag=LogTag.CHECKPOINTS,
+            message=f"Saving checkpoint of stage '{stage.value}' failed: {str(e)}"
+        )
+
+
+def load_stage_checkpoint(
+    project_id: str,
+    stage: PipelineStage,
+    params: dict,
+    audio_file_path: Optional[str] = None,
+    target_id: Optional[str] = None,
+    show_logs: bool = False
+) -> Optional[dict]:
+    """
+    Load the output of a pipeline stage finished by a previous run of the project.
+
+    :param project_id: The id of the processing project.
+    :param stage: The pipeline stage to load.
+    :param params: The current job params, checkpoint saved with other params is ignored.
+    :param audio_file_path: Path to download the stage audio file to, if stage produces audio.
+    :param target_id: The dub target of the stage, if stage is run for every target.
+    :param show_logs: Determines whether to display logs while loading checkpoint.
+
+    :return: The stage output saved with save_stage_checkpoint or None if stage has to be run.
+    """
+
+    try:
+        checkpoint_blob = bucket.blob(get_checkpoint_blob_path(project_id, stage, target_id=target_id))
+        if not checkpoint_blob.exists():
+            return None
+
+        checkpoint = json.loads(checkpoint_blob.download_as_text())
+        if checkpoint["params"] != params:
+            if show_logs:
+                print_info_log(
+                    tag=LogTag.CHECKPOINTS,
+                    message=f"Checkpoint of stage '{stage.value}' was saved with other params, skip it."
+                )
+            return None
+
+        if audio_file_path is not None:
+            audio_blob = bucket.blob(get_checkpoint_blob_path(project_id, stage, extension="mp3", target_id=target_id))
+            audio_blob.download_to_filename(audio_file_path)
+
+        if show_logs:
+            print_info_log(
+                tag=LogTag.CHECKPOINTS,
+                message=f"Checkpoint of stage '{stage.value}' loaded for project {project_id}."
+            )
+
+        return checkpoint["data"]
+
+    except Exception as e:
+        print_info_log(
+            tag=LogTag.CHECKPOINTS,
+            message=f"Loading checkpoint of stage '{stage.value}' failed, stage will be run again: {str(e)}"
+        )
+        return None
+
+
+def clear_project_checkpoints(project_id: str, show_logs: bool = False):
+    """Remove all checkpoints of the project after the job is done."""
+
+    try:
+        for checkpoint_blob in bucket.list_blobs(prefix=f"{CHECKPOINTS_BUCKET_DIR}/{project_id}/"):
+            checkpoint_blob.delete()
+
+        if show_logs:
+            print_info_log(
+                tag=LogTag.CHECKPOINTS,
+                message=f"Checkpoints removed for project {project_id}."
+            )
+
+    except Exception as e:
+        print_info_log(
+            tag=LogTag.CHECKPOINTS,
+            message=f"Removing checkpoints failed for project {project_id}: {str(e)}"
+        )
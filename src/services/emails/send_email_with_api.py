@@ -1,7 +1,9 @@
-import requests
-
 from configs.env import SEND_EMAIL_URL
 from models.emailTemplates import EmailTemplate
+from models.external_service import ExternalService
+from services.cassette.provider_cassette import post_with_cassette
+from services.http_client.http_client import http_post
+from services.metrics.metrics import measure_external_call
 
 
 def send_email_with_api(user_email: str, email_template: EmailTemplate):
@@ -15,7 +17,12 @@ def send_email_with_api(user_email: str, email_template: EmailTemplate):
         "emailTemplate": email_template.value,
     }
 
-    response = requests.post(SEND_EMAIL_URL, headers=headers, json=payload)
+    with measure_external_call(ExternalService.SEND_EMAIL_FUNCTION):
+        response = post_with_cassette(
+            service=ExternalService.SEND_EMAIL_FUNCTION,
+            request_data=payload,
+            post=lambda: http_post(SEND_EMAIL_URL, headers=headers, json=payload)
+        )
 
     if not response.ok:
         raise Exception(
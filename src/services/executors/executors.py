@@ -0,0 +1,62 @@
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from configs.env import CPU_EXECUTOR_WORKERS, IO_EXECUTOR_WORKERS
+
+T = TypeVar("T")
+
+# Network-bound stages spend most of the time waiting for responses, so many threads can share one core
+io_executor = ThreadPoolExecutor(
+    max_workers=IO_EXECUTOR_WORKERS,
+    thread_name_prefix="io-stage"
+)
+
+# CPU-bound stages run in separate processes, so decoding and encoding of one job does not hold
+# the GIL of the threads that wait for Whisper, GPT or TTS of other jobs.
+# Spawn is used because forking a process with running threads can copy locked locks.
+cpu_executor = ProcessPoolExecutor(
+    max_workers=CPU_EXECUTOR_WORKERS,
+    mp_context=multiprocessing.get_context("spawn")
+) if CPU_EXECUTOR_WORKERS > 0 else None
+
+
+def submit_io_stage(function: Callable[..., T], **kwargs) -> Future:
+    """
+    Submit network-bound function to I/O pool.
+    The function must not submit work to I/O pool itself, otherwise the full pool can deadlock.
+    """
+
+    return io_executor.submit(function, **kwargs)
+
+
+def run_io_stage(function: Callable[..., T], **kwargs) -> T:
+    """Run network-bound function in I/O pool and wait for its result."""
+
+    return submit_io_stage(function, **kwargs).result()
+
+
+def submit_cpu_stage(function: Callable[..., T], **kwargs) -> Future:
+    """Submit CPU-bound function to process pool, function and its arguments must be picklable."""
+
+    if cpu_executor is None:
+        future = Future()
+        try:
+            future.set_result(function(**kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    return cpu_executor.submit(function, **kwargs)
+
+
+def run_cpu_stage(function: Callable[..., T], **kwargs) -> T:
+    """Run CPU-bound function in process pool and wait for its result."""
+
+    return submit_cpu_stage(function, **kwargs).result()
+
+
+def shutdown_executors():
+    io_executor.shutdown(wait=False, cancel_futures=True)
+    if cpu_executor is not None:
+        cpu_executor.shutdown(wait=False, cancel_futures=True)
@@ -1,16 +1,23 @@
+import json
 from datetime import datetime
-
-import requests
+from typing import List, Optional
 
 from configs.logger import print_info_log
 from constants.log_tags import LogTag
-from configs.env import UPDATE_PROJECT_URL
+from configs.env import UPDATE_PROJECT_URL, UPDATE_PROJECT_TIMEOUT_SECONDS
+from models.external_service import ExternalService
+from services.cassette.provider_cassette import post_with_cassette
+from services.http_client.http_client import http_post
+from services.metrics.metrics import measure_external_call
 
 
 def update_project_status_and_translated_link_by_id(
     project_id: str,
     status: str,
     translated_file_link: str,
+    translated_file_links: Optional[List[dict]] = None,
+    progress_stage: Optional[str] = None,
+    progress_percent: Optional[int] = None,
     show_logs: bool = False
 ):
     project_fields_to_update = {
@@ -18,6 +25,13 @@ def update_project_status_and_translated_link_by_id(
         "status": status,
         "translatedFileLink": translated_file_link
     }
+    # Links of all languages if the project is dubbed to several languages
+    if translated_file_links is not None:
+        project_fields_to_update["translatedFileLinks"] = json.dumps(translated_file_links)
+    # Current stage of the running job, see services/progress/progress_reporter.py
+    if progress_stage is not None:
+        project_fields_to_update["progressStage"] = progress_stage
+        project_fields_to_update["progressPercent"] = progress_percent
 
     if show_logs:
         print_info_log(
@@ -26,10 +40,16 @@ def update_project_status_and_translated_link_by_id(
         )
 
     request_time = datetime.now()
-    response = requests.post(
-        UPDATE_PROJECT_URL,
-        project_fields_to_update,
-    )
+    with measure_external_call(ExternalService.UPDATE_PROJECT_FUNCTION):
+        response = post_with_cassette(
+            service=ExternalService.UPDATE_PROJECT_FUNCTION,
+            request_data=project_fields_to_update,
+            post=lambda: http_post(
+                UPDATE_PROJECT_URL,
+                read_timeout_seconds=UPDATE_PROJECT_TIMEOUT_SECONDS,
+                data=project_fields_to_update
+            )
+        )
     response_time = datetime.now()
     time_difference = response_time - request_time
 
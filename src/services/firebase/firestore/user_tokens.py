@@ -1,10 +1,12 @@
 from datetime import datetime
 
-import requests
-
 from constants.log_tags import LogTag
 from configs.env import UPDATE_USER_TOKENS_URL
 from configs.logger import catch_error, print_info_log
+from models.external_service import ExternalService
+from services.cassette.provider_cassette import post_with_cassette
+from services.http_client.http_client import http_post
+from services.metrics.metrics import measure_external_call
 
 
 def update_user_tokens(
@@ -26,10 +28,15 @@ def update_user_tokens(
             )
 
         request_time = datetime.now()
-        response = requests.post(
-            UPDATE_USER_TOKENS_URL,
-            request_fields,
-        )
+        with measure_external_call(ExternalService.UPDATE_USER_TOKENS_FUNCTION):
+            response = post_with_cassette(
+                service=ExternalService.UPDATE_USER_TOKENS_FUNCTION,
+                request_data=request_fields,
+                post=lambda: http_post(
+                    UPDATE_USER_TOKENS_URL,
+                    data=request_fields
+                )
+            )
         response_time = datetime.now()
         time_difference = response_time - request_time
 
@@ -1,9 +1,13 @@
 import firebase_admin
 from firebase_admin import credentials
 
-from configs.env import CERTIFICATE_CONTENT
+from configs.env import CERTIFICATE_CONTENT, LOCAL_BUCKET_DIR_PATH
 
 
 def init_firebase():
+    # Local bucket does not need Firebase app
+    if LOCAL_BUCKET_DIR_PATH:
+        return
+
     cred = credentials.Certificate(CERTIFICATE_CONTENT)
     firebase_admin.initialize_app(cred)
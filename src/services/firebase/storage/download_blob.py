@@ -1,9 +1,14 @@
 import os
 
+from configs.env import DOWNLOAD_PART_SIZE_BYTES, MEDIA_CACHE_MAX_BYTES
 from configs.firebase import bucket
 from configs.logger import catch_error, print_info_log
 from constants.files import PROCESSING_FILES_DIR_PATH
 from constants.log_tags import LogTag
+from models.external_service import ExternalService
+from services.firebase.storage.download_blob_in_parts import download_blob_in_parts, check_blob_integrity
+from services.media_cache.media_cache import download_with_media_cache
+from services.metrics.metrics import measure_external_call
 
 
 def download_blob(
@@ -47,7 +52,31 @@ def download_blob(
             )
 
         blob = bucket.blob(source_blob_path)
-        blob.download_to_filename(destination_file_path)
+        # Load size and checksums of the blob
+        with measure_external_call(ExternalService.FIREBASE_STORAGE):
+            blob.reload()
+
+        def download(file_path: str):
+            if blob.size > DOWNLOAD_PART_SIZE_BYTES:
+                download_blob_in_parts(
+                    blob=blob,
+                    destination_file_path=file_path,
+                    show_logs=show_logs
+                )
+            else:
+                with measure_external_call(ExternalService.FIREBASE_STORAGE):
+                    blob.download_to_filename(file_path)
+                check_blob_integrity(blob, file_path)
+
+        if MEDIA_CACHE_MAX_BYTES > 0:
+            download_with_media_cache(
+                blob=blob,
+                destination_file_path=destination_file_path,
+                download=download,
+                show_logs=show_logs
+            )
+        else:
+            download(destination_file_path)
 
         if show_logs:
             print_info_log(
@@ -0,0 +1,120 @@
+import base64
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import google_crc32c
+
+from configs.env import DOWNLOAD_PART_SIZE_BYTES, DOWNLOAD_PARALLELISM, DOWNLOAD_PART_MAX_ATTEMPTS
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from models.external_service import ExternalService
+from services.metrics.metrics import count_retry, measure_external_call
+
+DELAY_TO_REPEAT_PART_IN_SECONDS = 1
+CHECKSUM_CHUNK_SIZE_BYTES = 8 * 1024 ** 2
+
+
+class BlobIntegrityError(Exception):
+    """Downloaded file does not match the checksum of the blob."""
+
+
+def get_part_ranges(blob_size: int, part_size: int) -> List[Tuple[int, int]]:
+    """Split the blob into byte ranges, end is inclusive like in google.cloud.storage."""
+
+    return [
+        (start, min(start + part_size, blob_size) - 1)
+        for start in range(0, blob_size, part_size)
+    ]
+
+
+def download_range(blob, start: int, end: int) -> bytes:
+    """Download the byte range of the blob, end is inclusive. The range is retried on its own."""
+
+    for attempt in range(1, DOWNLOAD_PART_MAX_ATTEMPTS + 1):
+        try:
+            with measure_external_call(ExternalService.FIREBASE_STORAGE):
+                # Checksum of the whole blob is validated after all parts are downloaded
+                data = blob.download_as_bytes(start=start, end=end, checksum=None)
+            if len(data) != end - start + 1:
+                raise IOError(f"Part {start}-{end} has {len(data)} bytes.")
+            return data
+        except Exception as e:
+            if attempt == DOWNLOAD_PART_MAX_ATTEMPTS:
+                raise
+            count_retry(ExternalService.FIREBASE_STORAGE, reason="download_part")
+            print_info_log(
+                tag=LogTag.DOWNLOAD_BLOB,
+                message=f"Download of part {start}-{end} failed ({str(e)}), attempt {attempt + 1} in "
+                        f"{DELAY_TO_REPEAT_PART_IN_SECONDS * attempt} seconds..."
+            )
+            time.sleep(DELAY_TO_REPEAT_PART_IN_SECONDS * attempt)
+
+
+def _download_part(blob, destination_file_path: str, start: int, end: int):
+    """Download the byte range and write it to its place in the file."""
+
+    data = download_range(blob, start, end)
+    with open(destination_file_path, "r+b") as f:
+        f.seek(start)
+        f.write(data)
+
+
+def check_blob_integrity(blob, file_path: str):
+    """
+    Compare the file with CRC32C of the blob, or with its MD5 if CRC32C is not set.
+
+    :raises BlobIntegrityError: If the checksum does not match.
+    """
+
+    if blob.crc32c:
+        expected_checksum = blob.crc32c
+        checksum = google_crc32c.Checksum()
+    elif blob.md5_hash:
+        expected_checksum = blob.md5_hash
+        checksum = hashlib.md5()
+    else:
+        return
+
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHECKSUM_CHUNK_SIZE_BYTES), b""):
+            checksum.update(chunk)
+
+    actual_checksum = base64.b64encode(checksum.digest()).decode("utf-8")
+    if actual_checksum != expected_checksum:
+        raise BlobIntegrityError(
+            f"Checksum of downloaded {blob.name} is {actual_checksum}, expected {expected_checksum}."
+        )
+
+
+def download_blob_in_parts(blob, destination_file_path: str, show_logs: bool = False):
+    """
+    Download the blob as DOWNLOAD_PART_SIZE_BYTES byte ranges, DOWNLOAD_PARALLELISM ranges at the same time.
+    The blob metadata (size and checksums) must be loaded with blob.reload().
+
+    :raises BlobIntegrityError: If the downloaded file does not match the blob checksum.
+    """
+
+    part_ranges = get_part_ranges(blob.size, DOWNLOAD_PART_SIZE_BYTES)
+
+    if show_logs:
+        print_info_log(
+            tag=LogTag.DOWNLOAD_BLOB,
+            message=f"Downloading {blob.size} bytes in {len(part_ranges)} parts..."
+        )
+
+    # File is allocated up front, so every part is written to its own place
+    with open(destination_file_path, "wb") as f:
+        f.truncate(blob.size)
+
+    # Parts have their own pool, download is already running in the shared IO pool
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_PARALLELISM, thread_name_prefix="download-part") as executor:
+        part_futures = [
+            executor.submit(_download_part, blob, destination_file_path, start, end)
+            for start, end in part_ranges
+        ]
+        for part_future in part_futures:
+            part_future.result()
+
+    check_blob_integrity(blob, destination_file_path)
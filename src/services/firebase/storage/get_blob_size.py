@@ -0,0 +1,10 @@
+from configs.firebase import bucket
+
+
+def get_blob_size(source_blob_path: str) -> int:
+    """Return the size of the file in Cloud Storage in bytes, or 0 if file is not found."""
+
+    blob = bucket.get_blob(source_blob_path)
+    if blob is None or blob.size is None:
+        return 0
+    return blob.size
@@ -0,0 +1,115 @@
+import base64
+import hashlib
+import os
+import shutil
+from typing import Iterator, Optional
+
+
+class LocalBlob:
+    """File in a local directory with the subset of google.cloud.storage.Blob API that the pipeline uses."""
+
+    def __init__(self, bucket_dir_path: str, name: str):
+        self.name = name
+        self.file_path = os.path.join(bucket_dir_path, name)
+
+    @property
+    def size(self) -> Optional[int]:
+        return os.path.getsize(self.file_path) if self.exists() else None
+
+    @property
+    def generation(self) -> Optional[int]:
+        return os.stat(self.file_path).st_mtime_ns if self.exists() else None
+
+    @property
+    def crc32c(self) -> Optional[str]:
+        return None
+
+    @property
+    def md5_hash(self) -> Optional[str]:
+        """Base64 MD5 of the file like in google.cloud.storage."""
+
+        if not self.exists():
+            return None
+        md5 = hashlib.md5()
+        with open(self.file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 ** 2), b""):
+                md5.update(chunk)
+        return base64.b64encode(md5.digest()).decode("utf-8")
+
+    @property
+    def public_url(self) -> str:
+        return f"file://{os.path.abspath(self.file_path)}"
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.file_path)
+
+    def reload(self):
+        if not self.exists():
+            raise FileNotFoundError(f"Blob {self.name} is not found in local bucket.")
+
+    def download_to_filename(self, filename: str):
+        shutil.copyfile(self.file_path, filename)
+
+    def download_as_bytes(
+        self,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        checksum: Optional[str] = "md5"
+    ) -> bytes:
+        """Download the blob or its byte range, end is inclusive like in google.cloud.storage."""
+
+        with open(self.file_path, "rb") as f:
+            f.seek(start or 0)
+            if end is None:
+                return f.read()
+            return f.read(end - (start or 0) + 1)
+
+    def download_as_text(self) -> str:
+        return self.download_as_bytes().decode("utf-8")
+
+    def upload_from_filename(self, filename: str):
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        shutil.copyfile(filename, self.file_path)
+
+    def upload_from_string(self, data, content_type: Optional[str] = None):
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        with open(self.file_path, "wb") as f:
+            f.write(data.encode("utf-8") if isinstance(data, str) else data)
+
+    def compose(self, sources: list):
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        with open(self.file_path, "wb") as f:
+            for source in sources:
+                with open(source.file_path, "rb") as source_file:
+                    shutil.copyfileobj(source_file, f)
+
+    def make_public(self):
+        pass
+
+    def delete(self):
+        os.remove(self.file_path)
+
+
+class LocalBucket:
+    """
+    Local directory with the subset of google.cloud.storage.Bucket API that the pipeline uses.
+    Used instead of Firebase bucket if LOCAL_BUCKET_DIR_PATH is set, e.g. for offline benchmarks.
+    """
+
+    def __init__(self, bucket_dir_path: str):
+        self.bucket_dir_path = bucket_dir_path
+        os.makedirs(bucket_dir_path, exist_ok=True)
+
+    def blob(self, blob_name: str) -> LocalBlob:
+        return LocalBlob(self.bucket_dir_path, blob_name)
+
+    def get_blob(self, blob_name: str) -> Optional[LocalBlob]:
+        blob = self.blob(blob_name)
+        return blob if blob.exists() else None
+
+    def list_blobs(self, prefix: str = "") -> Iterator[LocalBlob]:
+        for root, _, file_names in os.walk(self.bucket_dir_path):
+            for file_name in file_names:
+                blob_name = os.path.relpath(os.path.join(root, file_name), self.bucket_dir_path)
+                if blob_name.startswith(prefix):
+                    yield self.blob(blob_name)
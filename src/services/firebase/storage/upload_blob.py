@@ -1,14 +1,32 @@
+import os
+from concurrent.futures import Future
+from typing import Optional
+
+from configs.env import UPLOAD_PART_SIZE_BYTES
 from configs.firebase import bucket
 from configs.logger import catch_error, print_info_log
 from constants.log_tags import LogTag
+from models.external_service import ExternalService
+from services.firebase.storage.upload_blob_in_parts import upload_blob_in_parts
+from services.metrics.metrics import measure_external_call
 
 
 def upload_blob(
     source_file_name: str,
     destination_blob_name: str,
     project_id: str,
+    encoder_future: Optional[Future] = None,
     show_logs: bool = False
 ):
+    """
+    Upload the file and make it public.
+
+    :param encoder_future: Optional future of the encoder that is still writing the file,
+        its written parts are uploaded while it is running.
+
+    :return: The public link to the file, or None if the encoder failed.
+    """
+
     try:
         if show_logs:
             print_info_log(
@@ -17,7 +35,19 @@ def upload_blob(
             )
 
         blob = bucket.blob(destination_blob_name)
-        blob.upload_from_filename(source_file_name)
+        if encoder_future is not None or os.path.getsize(source_file_name) > UPLOAD_PART_SIZE_BYTES:
+            is_uploaded = upload_blob_in_parts(
+                source_file_name=source_file_name,
+                destination_blob=blob,
+                encoder_future=encoder_future,
+                show_logs=show_logs
+            )
+            # Encoder error is reported by the stage that waits for it
+            if not is_uploaded:
+                return None
+        else:
+            with measure_external_call(ExternalService.FIREBASE_STORAGE):
+                blob.upload_from_filename(source_file_name)
 
         if show_logs:
             print_info_log(
@@ -25,7 +55,8 @@ def upload_blob(
                 message=f"File uploaded to bucket on path {destination_blob_name}"
             )
 
-        blob.make_public()
+        with measure_external_call(ExternalService.FIREBASE_STORAGE):
+            blob.make_public()
         public_link = blob.public_url
 
         if show_logs:
@@ -0,0 +1,185 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from configs.env import (
+    UPLOAD_PART_SIZE_BYTES,
+    UPLOAD_PARALLELISM,
+    UPLOAD_PART_MAX_ATTEMPTS,
+    UPLOAD_TAIL_POLL_INTERVAL_SECONDS
+)
+from configs.firebase import bucket
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from models.external_service import ExternalService
+from services.metrics.metrics import count_retry, measure_external_call
+
+DELAY_TO_REPEAT_PART_IN_SECONDS = 1
+# Cloud Storage composes at most 32 blobs in one request
+MAX_COMPOSE_SOURCES = 32
+
+
+def get_part_blob_prefix(destination_blob_name: str) -> str:
+    return f"{destination_blob_name}.parts/"
+
+
+def _get_uploaded_part_md5_hashes(part_blob_prefix: str) -> Dict[int, str]:
+    """Parts uploaded by a previous attempt, they are reused if the local file has the same bytes."""
+
+    return {
+        int(part_blob.name[len(part_blob_prefix):]): part_blob.md5_hash
+        for part_blob in bucket.list_blobs(prefix=part_blob_prefix)
+        if part_blob.name[len(part_blob_prefix):].isdigit()
+    }
+
+
+def _upload_part(file_path: str, part_blob_prefix: str, index: int, uploaded_md5_hash: Optional[str]) -> str:
+    """
+    Upload the part if its bytes differ from the uploaded part, the part is retried on its own.
+
+    :return: Base64 MD5 of the part like in google.cloud.storage.
+    """
+
+    with open(file_path, "rb") as f:
+        f.seek(index * UPLOAD_PART_SIZE_BYTES)
+        data = f.read(UPLOAD_PART_SIZE_BYTES)
+    md5_hash = base64.b64encode(hashlib.md5(data).digest()).decode("utf-8")
+    if md5_hash == uploaded_md5_hash:
+        return md5_hash
+
+    part_blob = bucket.blob(f"{part_blob_prefix}{index:05d}")
+    for attempt in range(1, UPLOAD_PART_MAX_ATTEMPTS + 1):
+        try:
+            with measure_external_call(ExternalService.FIREBASE_STORAGE):
+                part_blob.upload_from_string(data, content_type="application/octet-stream")
+            return md5_hash
+        except Exception as e:
+            if attempt == UPLOAD_PART_MAX_ATTEMPTS:
+                raise
+            count_retry(ExternalService.FIREBASE_STORAGE, reason="upload_part")
+            print_info_log(
+                tag=LogTag.UPLOAD_BLOB,
+                message=f"Upload of part {index} failed ({str(e)}), attempt {attempt + 1} in "
+                        f"{DELAY_TO_REPEAT_PART_IN_SECONDS * attempt} seconds..."
+            )
+            time.sleep(DELAY_TO_REPEAT_PART_IN_SECONDS * attempt)
+
+
+def _compose_parts(destination_blob, part_blobs: list, part_blob_prefix: str) -> list:
+    """
+    Compose the parts into the destination blob, more than MAX_COMPOSE_SOURCES parts are composed in levels.
+
+    :return: Intermediate blobs, which must be deleted with the parts.
+    """
+
+    intermediate_blobs = []
+    level = 0
+    while len(part_blobs) > MAX_COMPOSE_SOURCES:
+        level_blobs = []
+        for group_start in range(0, len(part_blobs), MAX_COMPOSE_SOURCES):
+            level_blob = bucket.blob(f"{part_blob_prefix}compose-{level}-{group_start // MAX_COMPOSE_SOURCES}")
+            with measure_external_call(ExternalService.FIREBASE_STORAGE):
+                level_blob.compose(part_blobs[group_start:group_start + MAX_COMPOSE_SOURCES])
+            level_blobs.append(level_blob)
+        intermediate_blobs.extend(level_blobs)
+        part_blobs = level_blobs
+        level += 1
+
+    with measure_external_call(ExternalService.FIREBASE_STORAGE):
+        destination_blob.compose(part_blobs)
+
+    return intermediate_blobs
+
+
+def _delete_blobs(blobs: list):
+    for blob in blobs:
+        try:
+            blob.delete()
+        except Exception as e:
+            # Leftover parts do not break the dubbed file, so deletion errors are only logged
+            print_info_log(
+                tag=LogTag.UPLOAD_BLOB,
+                message=f"Deleting part {blob.name} failed: {str(e)}"
+            )
+
+
+def upload_blob_in_parts(
+    source_file_name: str,
+    destination_blob,
+    encoder_future: Optional[Future] = None,
+    show_logs: bool = False
+) -> bool:
+    """
+    Upload the file as UPLOAD_PART_SIZE_BYTES parts, UPLOAD_PARALLELISM parts at the same time,
+    and compose them into the destination blob.
+    Parts stay in the bucket until they are composed, so the next attempt uploads only missing or changed parts.
+
+    :param source_file_name: The local file, it can still be written by the encoder.
+    :param destination_blob: The blob the parts are composed into.
+    :param encoder_future: Optional future of the encoder that writes the file. Parts that are already written
+        are uploaded while the encoder is running, parts changed by the encoder (e.g. MP4 header) are uploaded again.
+    :param show_logs: Determines whether to display logs while uploading.
+
+    :return: False if the encoder failed and nothing was composed.
+    """
+
+    part_blob_prefix = get_part_blob_prefix(destination_blob.name)
+    uploaded_md5_hashes = _get_uploaded_part_md5_hashes(part_blob_prefix)
+
+    with ThreadPoolExecutor(max_workers=UPLOAD_PARALLELISM, thread_name_prefix="upload-part") as executor:
+        # Upload parts of the growing file, the last written part is uploaded only after the encoder is done
+        tail_part_futures: Dict[int, Future] = {}
+        while encoder_future is not None and not encoder_future.done():
+            if os.path.exists(source_file_name):
+                written_parts_count = os.path.getsize(source_file_name) // UPLOAD_PART_SIZE_BYTES
+                for index in range(len(tail_part_futures), written_parts_count):
+                    tail_part_futures[index] = executor.submit(
+                        _upload_part, source_file_name, part_blob_prefix, index, uploaded_md5_hashes.get(index)
+                    )
+            time.sleep(UPLOAD_TAIL_POLL_INTERVAL_SECONDS)
+
+        for index, tail_part_future in tail_part_futures.items():
+            uploaded_md5_hashes[index] = tail_part_future.result()
+
+        if encoder_future is not None and encoder_future.exception() is not None:
+            return False
+
+        file_size = os.path.getsize(source_file_name)
+        parts_count = max(1, -(-file_size // UPLOAD_PART_SIZE_BYTES))
+
+        # Small file without uploaded parts does not need composing
+        if parts_count == 1 and not uploaded_md5_hashes:
+            with measure_external_call(ExternalService.FIREBASE_STORAGE):
+                destination_blob.upload_from_filename(source_file_name)
+            return True
+
+        if show_logs:
+            print_info_log(
+                tag=LogTag.UPLOAD_BLOB,
+                message=f"Uploading {file_size} bytes in {parts_count} parts, "
+                        f"{len(tail_part_futures)} parts were uploaded while encoding..."
+            )
+
+        # Every part is compared with the uploaded one, only missing and changed parts are uploaded
+        part_futures: List[Future] = [
+            executor.submit(_upload_part, source_file_name, part_blob_prefix, index, uploaded_md5_hashes.get(index))
+            for index in range(parts_count)
+        ]
+        for part_future in part_futures:
+            part_future.result()
+
+    part_blobs = [bucket.blob(f"{part_blob_prefix}{index:05d}") for index in range(parts_count)]
+    destination_blob.content_type = mimetypes.guess_type(source_file_name)[0]
+    intermediate_blobs = _compose_parts(destination_blob, part_blobs, part_blob_prefix)
+
+    # Parts left by a previous attempt with a longer file are deleted too
+    extra_part_blobs = [
+        bucket.blob(f"{part_blob_prefix}{index:05d}") for index in uploaded_md5_hashes if index >= parts_count
+    ]
+    _delete_blobs(part_blobs + intermediate_blobs + extra_part_blobs)
+
+    return True
@@ -1,7 +1,8 @@
-import requests
-
 from configs.env import GENDER_DETECTION_API_URL, GENDER_DETECTION_BEARER_TOKEN
 from configs.logger import catch_error
+from models.external_service import ExternalService
+from services.http_client.http_client import http_post
+from services.metrics.metrics import measure_external_call
 
 headers = {
     "Authorization": f"Bearer {GENDER_DETECTION_BEARER_TOKEN}"
@@ -19,7 +20,8 @@ def voice_gender_detection(filename: str, project_id: str):
         print(f"Error: {filename} not found.")
         return None
 
-    response = requests.post(GENDER_DETECTION_API_URL, headers=headers, data=data)
+    with measure_external_call(ExternalService.GENDER_DETECTION):
+        response = http_post(GENDER_DETECTION_API_URL, headers=headers, data=data)
 
     if response.status_code == 200:
         try:
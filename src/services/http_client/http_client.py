@@ -0,0 +1,52 @@
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from configs.env import (
+    HTTP_CONNECT_TIMEOUT_SECONDS,
+    HTTP_READ_TIMEOUT_SECONDS,
+    HTTP_POOL_MAX_HOSTS,
+    HTTP_POOL_MAX_CONNECTIONS_PER_HOST
+)
+
+
+def create_http_session() -> requests.Session:
+    """
+    Session with a keep-alive connection pool per host, so repeated calls to the same service reuse
+    open TLS connections. Pool size matches IO pool threads by default, so no thread waits for a connection.
+    """
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_MAX_HOSTS,
+        pool_maxsize=HTTP_POOL_MAX_CONNECTIONS_PER_HOST
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared by all outbound calls, requests sessions are safe to use from several threads for plain requests
+http_session = create_http_session()
+
+
+def get_timeout(read_timeout_seconds: Optional[float] = None) -> tuple:
+    """Connect and read timeouts, so a hung socket fails the call instead of blocking the job forever."""
+
+    return HTTP_CONNECT_TIMEOUT_SECONDS, read_timeout_seconds or HTTP_READ_TIMEOUT_SECONDS
+
+
+def http_post(url: str, read_timeout_seconds: Optional[float] = None, **kwargs) -> requests.Response:
+    """
+    POST with the shared session, kwargs are passed to requests (data, json, headers, auth).
+
+    :param read_timeout_seconds: Optional read timeout of slow services, HTTP_READ_TIMEOUT_SECONDS by default.
+    """
+
+    return http_session.post(url, timeout=get_timeout(read_timeout_seconds), **kwargs)
+
+
+def http_get(url: str, read_timeout_seconds: Optional[float] = None, **kwargs) -> requests.Response:
+    return http_session.get(url, timeout=get_timeout(read_timeout_seconds), **kwargs)
+
@@ -0,0 +1,179 @@
+import os
+import subprocess
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+from pydub import AudioSegment
+from pydub.utils import mediainfo
+
+from services.speech_to_text.audio_windows import (
+    plan_audio_windows,
+    MIN_WINDOW_DURATION_MS,
+    SPEECH_PADDING_MS,
+    WINDOW_DURATION_MS
+)
+
+# Audio is extracted as 16 kHz mono 16-bit PCM, the format Whisper resamples to anyway
+PCM_SAMPLE_RATE = 16000
+PCM_SAMPLE_WIDTH = 2
+PCM_CHANNELS = 1
+PCM_BYTES_PER_MS = PCM_SAMPLE_RATE * PCM_SAMPLE_WIDTH * PCM_CHANNELS // 1000
+PCM_READ_SIZE_BYTES = 64 * 1024
+# Windows are planned on 2 minutes of buffered audio, so every window fits into the buffer with its pauses
+PLANNING_BUFFER_SIZE_BYTES = 2 * WINDOW_DURATION_MS * PCM_BYTES_PER_MS
+# Speech that ends closer to the buffer end than this can continue in the next buffer
+BUFFER_END_MAX_PAUSE_MS = 2000
+
+
+def get_ffmpeg_pcm_command(input_path: str) -> List[str]:
+    """ffmpeg command that decodes audio of the input (file path or pipe:0) to PCM on its stdout."""
+
+    return [
+        "ffmpeg", "-loglevel", "error",
+        "-i", input_path,
+        "-vn", "-ac", str(PCM_CHANNELS), "-ar", str(PCM_SAMPLE_RATE), "-f", "s16le",
+        "pipe:1"
+    ]
+
+
+def pcm_to_audio_segment(pcm_data: bytes) -> AudioSegment:
+    return AudioSegment(
+        data=pcm_data,
+        sample_width=PCM_SAMPLE_WIDTH,
+        frame_rate=PCM_SAMPLE_RATE,
+        channels=PCM_CHANNELS
+    )
+
+
+class PcmAudioWindowsReader:
+    """
+    Reads PCM stream of ffmpeg and yields windows planned on the buffered audio,
+    so memory stays bounded by the planning buffer no matter how long the media is.
+    """
+
+    def __init__(self, pcm_stream: BinaryIO, on_end_of_stream: Optional[Callable[[], None]] = None):
+        """
+        :param pcm_stream: The stream of 16 kHz mono 16-bit PCM, e.g. ffmpeg stdout.
+        :param on_end_of_stream: Called when the stream ends before the last windows are yielded,
+            e.g. to raise the error of ffmpeg.
+        """
+
+        self.pcm_stream = pcm_stream
+        self.on_end_of_stream = on_end_of_stream
+        self.pcm_bytes_count = 0
+
+    @property
+    def audio_length_in_seconds(self) -> int:
+        """Length of the read audio, the length of the whole audio once all windows are yielded."""
+
+        return self.pcm_bytes_count // PCM_BYTES_PER_MS // 1000
+
+    def iterate_audio_windows(self) -> Iterator[Tuple[int, AudioSegment]]:
+        """Yield window start time in milliseconds and window audio."""
+
+        buffer_start_time_ms = 0
+        pcm_buffer = bytearray()
+        while True:
+            pcm_chunk = self.pcm_stream.read(PCM_READ_SIZE_BYTES)
+            if not pcm_chunk:
+                break
+            self.pcm_bytes_count += len(pcm_chunk)
+            pcm_buffer.extend(pcm_chunk)
+            if len(pcm_buffer) >= PLANNING_BUFFER_SIZE_BYTES:
+                buffer_start_time_ms = yield from self._yield_planned_audio_windows(
+                    pcm_buffer,
+                    buffer_start_time_ms,
+                    is_end_of_stream=False
+                )
+
+        if self.on_end_of_stream is not None:
+            self.on_end_of_stream()
+
+        # Odd trailing byte is a cut sample
+        del pcm_buffer[len(pcm_buffer) - len(pcm_buffer) % (PCM_SAMPLE_WIDTH * PCM_CHANNELS):]
+        yield from self._yield_planned_audio_windows(pcm_buffer, buffer_start_time_ms, is_end_of_stream=True)
+
+    @staticmethod
+    def _yield_planned_audio_windows(
+        pcm_buffer: bytearray,
+        buffer_start_time_ms: int,
+        is_end_of_stream: bool
+    ) -> Iterator[Tuple[int, AudioSegment]]:
+        """
+        Yield windows planned on the buffered audio and remove their audio from the buffer.
+        The last window stays in the buffer if the speech can continue after the end of the buffer,
+        or if it is shorter than MIN_WINDOW_DURATION_MS and the next speech can still be added to it.
+
+        :return: Start time of the audio that stays in the buffer.
+        """
+
+        buffer_audio = pcm_to_audio_segment(bytes(pcm_buffer))
+        window_ranges = plan_audio_windows(buffer_audio)
+        kept_start_time_ms = len(buffer_audio)
+        if not is_end_of_stream:
+            # The buffer end is in the last window or close enough to continue it
+            if window_ranges and (
+                len(buffer_audio) - window_ranges[-1][1] <= BUFFER_END_MAX_PAUSE_MS
+                or (
+                    window_ranges[-1][1] - window_ranges[-1][0] < MIN_WINDOW_DURATION_MS
+                    and len(buffer_audio) - window_ranges[-1][0] < WINDOW_DURATION_MS
+                )
+            ):
+                kept_start_time_ms = window_ranges.pop()[0]
+            else:
+                kept_start_time_ms = max(len(buffer_audio) - SPEECH_PADDING_MS, 0)
+
+        for start_time, end_time in window_ranges:
+            yield buffer_start_time_ms + start_time, buffer_audio[start_time:end_time]
+
+        del pcm_buffer[:kept_start_time_ms * PCM_BYTES_PER_MS]
+        return buffer_start_time_ms + kept_start_time_ms
+
+
+def get_media_duration_ms(file_path: str) -> Optional[int]:
+    """Duration from the container metadata read by ffprobe, the audio is not decoded. None if it is unknown."""
+
+    try:
+        return int(float(mediainfo(file_path)["duration"]) * 1000)
+    except (KeyError, ValueError, OSError):
+        return None
+
+
+def raise_ffmpeg_error(ffmpeg_process: subprocess.Popen):
+    """Raise the error of ffmpeg that stopped with non-zero code, called after its stdout is read to the end."""
+
+    return_code = ffmpeg_process.wait()
+    if return_code != 0:
+        ffmpeg_error = ffmpeg_process.stderr.read().decode("utf-8", errors="replace")
+        raise RuntimeError(f"ffmpeg failed to extract audio ({return_code}): {ffmpeg_error}")
+
+
+@contextmanager
+def extract_audio_windows(file_path: str) -> Iterator[PcmAudioWindowsReader]:
+    """
+    Decode audio of the file with ffmpeg window by window instead of loading the whole audio to memory.
+    ffmpeg waits while the windows are not read, so at most one planning buffer of audio is in memory.
+
+    :raises ValueError: If the file does not exist.
+    """
+
+    if not os.path.exists(file_path):
+        raise ValueError(f"File not found: {file_path}")
+
+    ffmpeg_process = subprocess.Popen(
+        get_ffmpeg_pcm_command(file_path),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    try:
+        yield PcmAudioWindowsReader(
+            pcm_stream=ffmpeg_process.stdout,
+            on_end_of_stream=lambda: raise_ffmpeg_error(ffmpeg_process)
+        )
+    finally:
+        # Windows are not read to the end if the job is stopped
+        if ffmpeg_process.poll() is None:
+            ffmpeg_process.kill()
+        ffmpeg_process.wait()
+        ffmpeg_process.stdout.close()
+        ffmpeg_process.stderr.close()
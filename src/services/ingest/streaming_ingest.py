@@ -0,0 +1,298 @@
+import queue
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+from pydub import AudioSegment
+
+from configs.env import DOWNLOAD_PART_SIZE_BYTES, DOWNLOAD_PARALLELISM, WHISPER_MAX_IN_FLIGHT_WINDOWS
+from configs.firebase import bucket
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from models.external_service import ExternalService
+from services.firebase.storage.download_blob_in_parts import download_range, get_part_ranges, check_blob_integrity
+from services.ingest.pcm_audio_windows import PcmAudioWindowsReader, get_ffmpeg_pcm_command, raise_ffmpeg_error
+from services.media_cache.media_cache import is_in_media_cache, add_to_media_cache
+from services.metrics.metrics import measure_external_call
+from utils.files import get_file_extension
+
+# MP4 and MOV can be demuxed from a stream only if the moov atom (index of the samples) is before mdat (the samples)
+MP4_EXTENSIONS = ["mp4", "mov"]
+MP4_ATOM_HEADER_SIZE_BYTES = 16
+MAX_MP4_TOP_LEVEL_ATOMS = 16
+
+# Put to audio windows queue after the last window
+END_OF_STREAM = None
+# Downloaded file is passed to ffmpeg in chunks of this size
+FFMPEG_FEED_CHUNK_SIZE_BYTES = 1024 * 1024
+AUDIO_WINDOWS_QUEUE_POLL_INTERVAL_SECONDS = 1
+
+
+def is_mp4_moov_before_mdat(blob) -> bool:
+    """Walk top level atoms of the MP4 blob with small ranged reads until moov or mdat is found."""
+
+    offset = 0
+    for _ in range(MAX_MP4_TOP_LEVEL_ATOMS):
+        if offset + 8 > blob.size:
+            return False
+        with measure_external_call(ExternalService.FIREBASE_STORAGE):
+            header = blob.download_as_bytes(
+                start=offset,
+                end=min(offset + MP4_ATOM_HEADER_SIZE_BYTES, blob.size) - 1,
+                checksum=None
+            )
+        atom_size = int.from_bytes(header[0:4], "big")
+        atom_type = header[4:8]
+        if atom_type == b"moov":
+            return True
+        if atom_type == b"mdat" or atom_size == 0:
+            return False
+        # Atom size 1 means the real size is in the 64-bit field after the type
+        if atom_size == 1:
+            atom_size = int.from_bytes(header[8:16], "big")
+        if atom_size < 8:
+            return False
+        offset += atom_size
+    return False
+
+
+class StreamingIngest:
+    """
+    Download of the original file, which is written to the workspace and piped to ffmpeg from there.
+    Audio windows are extracted while the rest of the file is still downloading,
+    so speech to text starts on the first minute of audio instead of waiting for the whole file.
+    Only WHISPER_MAX_IN_FLIGHT_WINDOWS decoded windows wait for speech to text, if it falls behind, ffmpeg waits
+    and its input stays in the workspace file, so the download is not slowed down and memory does not grow.
+    """
+
+    def __init__(self, blob, destination_file_path: str, show_logs: bool = False):
+        self.blob = blob
+        self.destination_file_path = destination_file_path
+        self.show_logs = show_logs
+        self.audio_length_in_seconds: Optional[int] = None
+
+        self._audio_windows_queue = queue.Queue(maxsize=WHISPER_MAX_IN_FLIGHT_WINDOWS)
+        self._download_error: Optional[Exception] = None
+        self._stop_event = threading.Event()
+        self._close_event = threading.Event()
+        # Bytes of the workspace file that are written and can be passed to ffmpeg
+        self._download_condition = threading.Condition()
+        self._downloaded_bytes = 0
+        self._is_download_finished = False
+        # The file is read by ffmpeg feeder while it is written
+        open(destination_file_path, "wb").close()
+        self._ffmpeg_process = subprocess.Popen(
+            get_ffmpeg_pcm_command("pipe:0"),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        self._download_thread = threading.Thread(
+            target=self._download,
+            name=f"streaming-ingest-download-{blob.name}",
+            daemon=True
+        )
+        self._ffmpeg_feed_thread = threading.Thread(
+            target=self._feed_ffmpeg,
+            name=f"streaming-ingest-feed-{blob.name}",
+            daemon=True
+        )
+        self._audio_thread = threading.Thread(
+            target=self._read_audio_windows,
+            name=f"streaming-ingest-audio-{blob.name}",
+            daemon=True
+        )
+        self._download_thread.start()
+        self._ffmpeg_feed_thread.start()
+        self._audio_thread.start()
+
+    def _download(self):
+        """Download ranges DOWNLOAD_PARALLELISM at a time and write them to the file in order."""
+
+        part_ranges = deque(get_part_ranges(self.blob.size, DOWNLOAD_PART_SIZE_BYTES))
+        part_futures = deque()
+        try:
+            with open(self.destination_file_path, "wb") as f, ThreadPoolExecutor(
+                max_workers=DOWNLOAD_PARALLELISM,
+                thread_name_prefix="streaming-ingest-part"
+            ) as executor:
+                while (part_ranges or part_futures) and not self._stop_event.is_set():
+                    # At most DOWNLOAD_PARALLELISM parts are downloaded ahead of the part written now
+                    while part_ranges and len(part_futures) < DOWNLOAD_PARALLELISM:
+                        start, end = part_ranges.popleft()
+                        part_futures.append(executor.submit(download_range, self.blob, start, end))
+
+                    data = part_futures.popleft().result()
+                    f.write(data)
+                    # Written bytes must be visible to ffmpeg feeder, which reads the file with another handle
+                    f.flush()
+                    with self._download_condition:
+                        self._downloaded_bytes += len(data)
+                        self._download_condition.notify_all()
+
+        except Exception as e:
+            self._download_error = e
+            self._stop_event.set()
+
+        finally:
+            with self._download_condition:
+                self._is_download_finished = True
+                self._download_condition.notify_all()
+
+    def _feed_ffmpeg(self):
+        """Pass the downloaded part of the workspace file to ffmpeg, ffmpeg may fall behind the download."""
+
+        ffmpeg_stdin = self._ffmpeg_process.stdin
+        fed_bytes = 0
+        try:
+            with open(self.destination_file_path, "rb") as f:
+                while not self._stop_event.is_set():
+                    with self._download_condition:
+                        self._download_condition.wait_for(
+                            lambda: self._downloaded_bytes > fed_bytes
+                            or self._is_download_finished
+                            or self._stop_event.is_set()
+                        )
+                        downloaded_bytes = self._downloaded_bytes
+                        is_download_finished = self._is_download_finished
+
+                    while fed_bytes < downloaded_bytes and not self._stop_event.is_set():
+                        data = f.read(min(FFMPEG_FEED_CHUNK_SIZE_BYTES, downloaded_bytes - fed_bytes))
+                        if not data:
+                            break
+                        ffmpeg_stdin.write(data)
+                        fed_bytes += len(data)
+
+                    if is_download_finished and fed_bytes >= downloaded_bytes:
+                        break
+
+        except (BrokenPipeError, ValueError):
+            # ffmpeg stopped, its error is reported by audio reader, the file is still downloaded
+            pass
+
+        finally:
+            try:
+                ffmpeg_stdin.close()
+            except BrokenPipeError:
+                pass
+
+    def _read_audio_windows(self):
+        """Read PCM windows from ffmpeg, waits while WHISPER_MAX_IN_FLIGHT_WINDOWS windows are not transcribed yet."""
+
+        audio_windows_reader = PcmAudioWindowsReader(
+            pcm_stream=self._ffmpeg_process.stdout,
+            on_end_of_stream=self._raise_ffmpeg_error
+        )
+        try:
+            for audio_window in audio_windows_reader.iterate_audio_windows():
+                self._put_audio_window(audio_window)
+            self.audio_length_in_seconds = audio_windows_reader.audio_length_in_seconds
+            self._put_audio_window(END_OF_STREAM)
+
+        except Exception as e:
+            self._put_audio_window(e)
+
+    def _put_audio_window(self, audio_window):
+        """Wait for a free place in the queue, windows are dropped once the ingest is closed."""
+
+        while not self._close_event.is_set():
+            try:
+                self._audio_windows_queue.put(audio_window, timeout=AUDIO_WINDOWS_QUEUE_POLL_INTERVAL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def _raise_ffmpeg_error(self):
+        # ffmpeg killed by close() is not an error
+        if not self._stop_event.is_set():
+            raise_ffmpeg_error(self._ffmpeg_process)
+
+    def iterate_audio_windows(self) -> Iterator[Tuple[int, AudioSegment]]:
+        """Yield window start time in milliseconds and window audio as soon as the window is extracted."""
+
+        while True:
+            audio_window = self._audio_windows_queue.get()
+            if audio_window is END_OF_STREAM:
+                break
+            if isinstance(audio_window, Exception):
+                raise audio_window
+            if self._download_error is not None:
+                raise self._download_error
+            yield audio_window
+
+        if self._download_error is not None:
+            raise self._download_error
+
+    def wait_for_download(self):
+        """
+        Wait until the whole file is written to the workspace and check its integrity.
+        The verified file is added to media cache.
+        """
+
+        self._download_thread.join()
+        if self._download_error is not None:
+            raise self._download_error
+
+        check_blob_integrity(self.blob, self.destination_file_path)
+        add_to_media_cache(self.blob, self.destination_file_path)
+
+        if self.show_logs:
+            print_info_log(
+                tag=LogTag.STREAMING_INGEST,
+                message=f"File saved to {self.destination_file_path}"
+            )
+
+    def close(self):
+        """Stop the download and ffmpeg, e.g. if the job failed."""
+
+        self._stop_event.set()
+        self._close_event.set()
+        with self._download_condition:
+            self._download_condition.notify_all()
+        if self._ffmpeg_process.poll() is None:
+            self._ffmpeg_process.kill()
+        self._download_thread.join()
+        self._ffmpeg_feed_thread.join()
+        self._audio_thread.join()
+
+
+def start_streaming_ingest(
+    source_blob_path: str,
+    destination_file_path: str,
+    show_logs: bool = False
+) -> Optional[StreamingIngest]:
+    """
+    Start streaming ingest of the blob.
+
+    :return: The started ingest, or None if the blob must be downloaded as a whole:
+        it is already in media cache or its MP4 index (moov atom) is at the end of the file.
+    """
+
+    blob = bucket.blob(source_blob_path)
+    with measure_external_call(ExternalService.FIREBASE_STORAGE):
+        blob.reload()
+
+    if is_in_media_cache(blob):
+        return None
+
+    if get_file_extension(source_blob_path) in MP4_EXTENSIONS and not is_mp4_moov_before_mdat(blob):
+        if show_logs:
+            print_info_log(
+                tag=LogTag.STREAMING_INGEST,
+                message=f"MP4 index of {source_blob_path} is at the end of the file, it can not be streamed."
+            )
+        return None
+
+    if show_logs:
+        print_info_log(
+            tag=LogTag.STREAMING_INGEST,
+            message=f"Streaming {blob.size} bytes of {source_blob_path} to audio extraction..."
+        )
+
+    return StreamingIngest(
+        blob=blob,
+        destination_file_path=destination_file_path,
+        show_logs=show_logs
+    )
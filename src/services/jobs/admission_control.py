@@ -0,0 +1,109 @@
+import threading
+
+from configs.env import (
+    MAX_CONCURRENT_JOBS,
+    MAX_QUEUED_JOBS,
+    MAX_IN_FLIGHT_MEDIA_SECONDS,
+    ADMISSION_RETRY_AFTER_SECONDS
+)
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from models.file_type import FileType
+from services.firebase.storage.get_blob_size import get_blob_size
+from utils.files import get_file_type
+
+# Rough bitrates to estimate media duration by file size, when client does not send the duration
+ESTIMATED_VIDEO_BYTES_PER_SECOND = 2_000_000 // 8  # 2 Mbps
+ESTIMATED_AUDIO_BYTES_PER_SECOND = 128_000 // 8  # 128 kbps
+
+admitted_jobs_count = 0
+admitted_media_seconds = 0.0
+admission_lock = threading.Lock()
+
+
+class AdmissionRejectedError(Exception):
+    def __init__(self, message: str, retry_after_seconds: int):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+def estimate_media_duration_in_seconds(original_file_location: str) -> float:
+    """Estimate media duration by the size of the original file in Cloud Storage."""
+
+    try:
+        blob_size = get_blob_size(original_file_location)
+
+        if get_file_type(original_file_location) == FileType.VIDEO:
+            return blob_size / ESTIMATED_VIDEO_BYTES_PER_SECOND
+        return blob_size / ESTIMATED_AUDIO_BYTES_PER_SECOND
+
+    except Exception as e:
+        # Job will report the real error while downloading the file
+        print_info_log(
+            tag=LogTag.ADMISSION_CONTROL,
+            message=f"Media duration estimation failed for {original_file_location}: {str(e)}"
+        )
+        return 0.0
+
+
+def admit_job(media_duration_in_seconds: float):
+    """
+    Reserve place for the job in running or queued jobs and in the in-flight media duration budget.
+    The first job is always admitted, so a single long media can still be processed.
+
+    :raises AdmissionRejectedError: If the machine is already at capacity.
+    """
+
+    global admitted_jobs_count, admitted_media_seconds
+
+    with admission_lock:
+        if admitted_jobs_count >= MAX_CONCURRENT_JOBS + MAX_QUEUED_JOBS:
+            rejection_reason = (
+                f"Too many jobs: {admitted_jobs_count} jobs are running or queued, "
+                f"limit is {MAX_CONCURRENT_JOBS + MAX_QUEUED_JOBS}."
+            )
+        elif admitted_jobs_count > 0 and \
+                admitted_media_seconds + media_duration_in_seconds > MAX_IN_FLIGHT_MEDIA_SECONDS:
+            rejection_reason = (
+                f"Too much media in flight: {admitted_media_seconds:.0f}s are processed, "
+                f"job adds {media_duration_in_seconds:.0f}s, limit is {MAX_IN_FLIGHT_MEDIA_SECONDS}s."
+            )
+        else:
+            admitted_jobs_count += 1
+            admitted_media_seconds += media_duration_in_seconds
+            return
+
+    _reject_job(rejection_reason)
+
+
+def admit_shared_job(queued_jobs_count: int):
+    """
+    Check the depth of the shared queue before a job is added to it.
+    Running jobs are limited by job slots of the workers, so only jobs waiting for a worker are counted.
+
+    :raises AdmissionRejectedError: If MAX_QUEUED_JOBS jobs already wait for a worker.
+    """
+
+    if queued_jobs_count >= MAX_QUEUED_JOBS:
+        _reject_job(f"Too many jobs: {queued_jobs_count} jobs wait for a worker, limit is {MAX_QUEUED_JOBS}.")
+
+
+def _reject_job(rejection_reason: str):
+    print_info_log(
+        tag=LogTag.ADMISSION_CONTROL,
+        message=f"Job rejected. {rejection_reason}"
+    )
+    raise AdmissionRejectedError(
+        message=rejection_reason,
+        retry_after_seconds=ADMISSION_RETRY_AFTER_SECONDS
+    )
+
+
+def release_job(media_duration_in_seconds: float):
+    """Free the place reserved by admit_job after the job is finished."""
+
+    global admitted_jobs_count, admitted_media_seconds
+
+    with admission_lock:
+        admitted_jobs_count -= 1
+        admitted_media_seconds = max(admitted_media_seconds - media_duration_in_seconds, 0.0)
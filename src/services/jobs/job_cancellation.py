@@ -0,0 +1,17 @@
+import threading
+from typing import Optional
+
+
+class JobCancelledError(Exception):
+    """The job was stopped because its worker lost the job lease, another worker continues the job."""
+
+
+def raise_if_job_cancelled(cancel_event: Optional[threading.Event]):
+    """
+    Called between pipeline stages, so a cancelled job does not pay for the next stages.
+
+    :raises JobCancelledError: If the cancel event of the job is set.
+    """
+
+    if cancel_event is not None and cancel_event.is_set():
+        raise JobCancelledError("Job is cancelled, its lease is held by another worker.")
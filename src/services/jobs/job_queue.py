@@ -0,0 +1,205 @@
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from configs.env import MAX_CONCURRENT_JOBS, IS_SHARED_JOB_QUEUE_ENABLED, JOB_QUEUE_POLL_INTERVAL_SECONDS
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from models.job import GenerateJobRequest, Job, JobStatus
+from models.pipeline_stage import PipelineStage
+from services.jobs.admission_control import admit_job, release_job, estimate_media_duration_in_seconds
+from services.jobs.shared_job_queue import enqueue_shared_job, get_shared_job_by_id
+from services.metrics.metrics import jobs_in_flight, jobs_queued, jobs_finished_total, measure_stage
+
+FINISHED_JOBS_TTL_IN_SECONDS = 24 * 60 * 60
+
+# Job request fields that are used only by the queue and are not passed to the pipeline
+JOB_REQUEST_QUEUE_FIELDS = {"media_duration_seconds"}
+
+# Bounded pool of workers, every worker runs one dub pipeline at a time
+jobs_executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_JOBS,
+    thread_name_prefix="dub-job"
+)
+
+jobs: Dict[str, Job] = {}
+job_futures: Dict[str, Future] = {}
+# Queued or running job ids by deduplication key, so duplicate requests attach to the running job
+in_flight_job_ids: Dict[str, str] = {}
+jobs_lock = threading.Lock()
+
+
+def get_job_deduplication_key(job_request: GenerateJobRequest) -> str:
+    """Jobs for the same project with the same pipeline params produce the same result."""
+
+    return json.dumps(job_request.dict(exclude=JOB_REQUEST_QUEUE_FIELDS), sort_keys=True)
+
+
+def get_pipeline_kwargs(job_request: GenerateJobRequest) -> dict:
+    """Job request fields as pipeline arguments, nested models (e.g. targets) are kept as models."""
+
+    return {
+        field_name: getattr(job_request, field_name)
+        for field_name in job_request.__fields__
+        if field_name not in JOB_REQUEST_QUEUE_FIELDS
+    }
+
+
+def _remove_expired_jobs():
+    """Forget finished jobs older than FINISHED_JOBS_TTL_IN_SECONDS. Must be called with jobs_lock held."""
+
+    expiration_time = datetime.now() - timedelta(seconds=FINISHED_JOBS_TTL_IN_SECONDS)
+    expired_job_ids = [
+        job_id for job_id, job in jobs.items()
+        if job.finished_at is not None and job.finished_at < expiration_time
+    ]
+    for job_id in expired_job_ids:
+        del jobs[job_id]
+        job_futures.pop(job_id, None)
+
+
+def _run_job(job_id: str, pipeline: Callable[..., dict], media_duration_in_seconds: float):
+    with jobs_lock:
+        job = jobs[job_id]
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.now()
+    jobs_queued.dec()
+    jobs_in_flight.inc()
+
+    print_info_log(
+        tag=LogTag.JOB_QUEUE,
+        message=f"Job {job_id} started for project {job.request.project_id}."
+    )
+
+    try:
+        # Pipeline errors are already logged and sent to Sentry by catch_error
+        with measure_stage(PipelineStage.JOB):
+            result = pipeline(**get_pipeline_kwargs(job.request))
+        status = JobStatus.COMPLETED
+        error = None
+    except Exception as e:
+        result = None
+        status = JobStatus.FAILED
+        error = str(e)
+    finally:
+        jobs_in_flight.dec()
+        release_job(media_duration_in_seconds)
+
+    with jobs_lock:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = datetime.now()
+        del in_flight_job_ids[get_job_deduplication_key(job.request)]
+    jobs_finished_total.labels(status=status.value).inc()
+
+    print_info_log(
+        tag=LogTag.JOB_QUEUE,
+        message=f"Job {job_id} finished with status '{status.value}'."
+    )
+
+
+def submit_job(job_request: GenerateJobRequest, pipeline: Callable[..., dict]) -> Job:
+    """
+    Enqueue the dub pipeline for the given request and return immediately.
+    If the same job is already queued or running, the existing job is returned instead of a new one.
+
+    :param job_request: The arguments of the dub pipeline.
+    :param pipeline: The function that processes the job, it is called with job_request fields as kwargs.
+
+    :return: The created job in 'queued' status or the already queued or running duplicate job.
+
+    :raises AdmissionRejectedError: If the machine or the shared queue has no capacity for the job,
+        the client should retry later.
+    """
+
+    deduplication_key = get_job_deduplication_key(job_request)
+
+    # Jobs of the shared queue are processed by machines in worker mode, its depth is checked in the queue database
+    if IS_SHARED_JOB_QUEUE_ENABLED:
+        return enqueue_shared_job(job_request, deduplication_key)
+
+    duplicate_job = _get_in_flight_job(deduplication_key)
+    if duplicate_job is not None:
+        return duplicate_job
+
+    media_duration_in_seconds = job_request.media_duration_seconds
+    if media_duration_in_seconds is None:
+        media_duration_in_seconds = estimate_media_duration_in_seconds(job_request.original_file_location)
+    admit_job(media_duration_in_seconds)
+
+    job = Job(
+        job_id=uuid.uuid4().hex,
+        status=JobStatus.QUEUED,
+        request=job_request,
+        created_at=datetime.now()
+    )
+
+    with jobs_lock:
+        # The same job could be submitted while media duration was estimated
+        if deduplication_key in in_flight_job_ids:
+            release_job(media_duration_in_seconds)
+            return _get_deduplicated_job(in_flight_job_ids[deduplication_key])
+
+        _remove_expired_jobs()
+        jobs[job.job_id] = job
+        in_flight_job_ids[deduplication_key] = job.job_id
+        jobs_queued.inc()
+        job_futures[job.job_id] = jobs_executor.submit(_run_job, job.job_id, pipeline, media_duration_in_seconds)
+
+    print_info_log(
+        tag=LogTag.JOB_QUEUE,
+        message=f"Job {job.job_id} queued for project {job_request.project_id}."
+    )
+
+    return job.copy()
+
+
+def _get_deduplicated_job(job_id: str) -> Job:
+    """Must be called with jobs_lock held."""
+
+    job = jobs[job_id]
+    print_info_log(
+        tag=LogTag.JOB_QUEUE,
+        message=f"Project {job.request.project_id} is already processed by job {job_id}, request is attached to it."
+    )
+    return job.copy()
+
+
+def _get_in_flight_job(deduplication_key: str) -> Optional[Job]:
+    with jobs_lock:
+        if deduplication_key not in in_flight_job_ids:
+            return None
+        return _get_deduplicated_job(in_flight_job_ids[deduplication_key])
+
+
+def get_job_by_id(job_id: str) -> Optional[Job]:
+    if IS_SHARED_JOB_QUEUE_ENABLED:
+        return get_shared_job_by_id(job_id)
+
+    with jobs_lock:
+        job = jobs.get(job_id)
+        return job.copy() if job is not None else None
+
+
+def wait_for_job(job_id: str) -> Optional[Job]:
+    """Block until the job is finished and return it, or None if job is not found."""
+
+    if IS_SHARED_JOB_QUEUE_ENABLED:
+        job = get_shared_job_by_id(job_id)
+        while job is not None and job.status not in (JobStatus.COMPLETED, JobStatus.FAILED):
+            time.sleep(JOB_QUEUE_POLL_INTERVAL_SECONDS)
+            job = get_shared_job_by_id(job_id)
+        return job
+
+    with jobs_lock:
+        job_future = job_futures.get(job_id)
+    if job_future is None:
+        return get_job_by_id(job_id)
+
+    wait([job_future])
+    return get_job_by_id(job_id)
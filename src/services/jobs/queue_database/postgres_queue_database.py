@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+POSTGRES_CONNECT_TIMEOUT_SECONDS = 10
+# Any constant keys, machines that start at the same time create the schema one by one
+SCHEMA_ADVISORY_LOCK_KEY = 7236101
+ENQUEUE_ADVISORY_LOCK_KEY = 7236102
+
+
+class PostgresConnection:
+    """Cursor with the sqlite3.Connection.execute API, so queue queries are written once with '?' placeholders."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def execute(self, query: str, parameters: tuple = ()):
+        self.cursor.execute(query.replace("?", "%s"), parameters)
+        return self.cursor
+
+
+class PostgresQueueDatabase:
+    """
+    Shared job queue in Postgres at SHARED_JOB_QUEUE_URL, reachable from every machine of the app.
+    A connection is opened per queue operation, workers call the queue only every few seconds.
+    """
+
+    # Workers that lease at the same time skip the job already being leased instead of leasing it twice
+    row_lock_clause = " FOR UPDATE SKIP LOCKED"
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def init_schema(self, create_queries: list):
+        with self.connect(write=True) as connection:
+            connection.execute("SELECT pg_advisory_xact_lock(?)", (SCHEMA_ADVISORY_LOCK_KEY,))
+            for create_query in create_queries:
+                connection.execute(create_query)
+
+    @contextmanager
+    def connect(self, write: bool = False):
+        """Open connection to the queue database, the transaction is committed if no error is raised."""
+
+        connection = psycopg2.connect(
+            self.url,
+            connect_timeout=POSTGRES_CONNECT_TIMEOUT_SECONDS,
+            cursor_factory=RealDictCursor
+        )
+        try:
+            connection.set_session(readonly=not write)
+            # Commits on exit, rolls back on error
+            with connection:
+                with connection.cursor() as cursor:
+                    yield PostgresConnection(cursor)
+        finally:
+            connection.close()
+
+    def lock_enqueue(self, connection: PostgresConnection):
+        """
+        Hold the enqueue lock until the transaction ends, so machines do not enqueue the same job at the same time
+        and do not add jobs over the queue depth limit together.
+        """
+
+        connection.execute("SELECT pg_advisory_xact_lock(?)", (ENQUEUE_ADVISORY_LOCK_KEY,))
@@ -0,0 +1,53 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+SQLITE_BUSY_TIMEOUT_SECONDS = 30
+
+
+class SqliteQueueDatabase:
+    """
+    Shared job queue in a local SQLite file, used instead of Postgres if SHARED_JOB_QUEUE_DB_PATH is set.
+    The file is shared only by processes of one machine (fly.io volumes attach to a single machine and
+    SQLite locking is unsafe on network filesystems), so it is meant for local runs and tests of worker mode.
+    """
+
+    # BEGIN IMMEDIATE already serializes writers, so rows do not need locks
+    row_lock_clause = ""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def init_schema(self, create_queries: list):
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        connection = sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS)
+        try:
+            # WAL lets workers read job states while another worker leases a job
+            connection.execute("PRAGMA journal_mode=WAL")
+            for create_query in create_queries:
+                connection.execute(create_query)
+            connection.commit()
+        finally:
+            connection.close()
+
+    @contextmanager
+    def connect(self, write: bool = False):
+        """Open connection to the queue database, write transactions lock the database immediately."""
+
+        connection = sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            yield connection
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def lock_enqueue(self, connection: sqlite3.Connection):
+        """The write transaction holds the database lock, so jobs can not be enqueued concurrently."""
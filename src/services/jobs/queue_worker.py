@@ -0,0 +1,140 @@
+import threading
+from typing import Callable, List
+
+from configs.env import (
+    MAX_CONCURRENT_JOBS,
+    WORKER_ID,
+    JOB_LEASE_RENEWAL_INTERVAL_SECONDS,
+    JOB_QUEUE_POLL_INTERVAL_SECONDS
+)
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from models.job import JobStatus
+from models.pipeline_stage import PipelineStage
+from services.jobs.shared_job_queue import (
+    lease_next_job,
+    renew_job_lease,
+    finish_shared_job,
+    release_worker_leases
+)
+from services.metrics.metrics import jobs_in_flight, jobs_finished_total, measure_stage
+
+stop_event = threading.Event()
+worker_threads: List[threading.Thread] = []
+
+
+def _renew_lease_until_done(job_id: str, job_done_event: threading.Event, cancel_event: threading.Event):
+    """
+    Heartbeat of the running job, keeps its lease while the pipeline is running.
+    If the lease is lost, the job is cancelled, so it is not processed by two workers at the same time.
+    """
+
+    while not job_done_event.wait(JOB_LEASE_RENEWAL_INTERVAL_SECONDS):
+        try:
+            if not renew_job_lease(job_id, WORKER_ID):
+                print_info_log(
+                    tag=LogTag.QUEUE_WORKER,
+                    message=f"Lease of job {job_id} is lost, the job is cancelled."
+                )
+                cancel_event.set()
+                return
+        except Exception as e:
+            # Lease is still valid until visibility timeout, so renewal is retried on the next heartbeat
+            print_info_log(
+                tag=LogTag.QUEUE_WORKER,
+                message=f"Lease renewal of job {job_id} failed: {str(e)}"
+            )
+
+
+def _process_leased_job(job_id: str, job_kwargs: dict, pipeline: Callable[..., dict]):
+    job_done_event = threading.Event()
+    cancel_event = threading.Event()
+    heartbeat_thread = threading.Thread(
+        target=_renew_lease_until_done,
+        args=(job_id, job_done_event, cancel_event),
+        name=f"job-heartbeat-{job_id}",
+        daemon=True
+    )
+    heartbeat_thread.start()
+    jobs_in_flight.inc()
+
+    print_info_log(
+        tag=LogTag.QUEUE_WORKER,
+        message=f"Job {job_id} leased by worker {WORKER_ID}."
+    )
+
+    try:
+        # Pipeline errors are already logged and sent to Sentry by catch_error
+        with measure_stage(PipelineStage.JOB):
+            result = pipeline(**job_kwargs, cancel_event=cancel_event)
+        status = JobStatus.COMPLETED
+        error = None
+    except Exception as e:
+        result = None
+        status = JobStatus.FAILED
+        error = str(e)
+    finally:
+        job_done_event.set()
+        heartbeat_thread.join()
+        jobs_in_flight.dec()
+
+    # The worker that leased the job again saves its result
+    if cancel_event.is_set():
+        return
+
+    if finish_shared_job(job_id, WORKER_ID, status, result=result, error=error):
+        jobs_finished_total.labels(status=status.value).inc()
+        print_info_log(
+            tag=LogTag.QUEUE_WORKER,
+            message=f"Job {job_id} finished with status '{status.value}'."
+        )
+
+
+def _run_worker(pipeline: Callable[..., dict], get_pipeline_kwargs: Callable):
+    """Pull jobs from the shared queue one by one until the worker is stopped."""
+
+    while not stop_event.is_set():
+        try:
+            leased_job = lease_next_job(WORKER_ID)
+        except Exception as e:
+            print_info_log(
+                tag=LogTag.QUEUE_WORKER,
+                message=f"Leasing job failed: {str(e)}"
+            )
+            leased_job = None
+
+        if leased_job is None:
+            stop_event.wait(JOB_QUEUE_POLL_INTERVAL_SECONDS)
+            continue
+
+        job_id, job_request = leased_job
+        _process_leased_job(job_id, get_pipeline_kwargs(job_request), pipeline)
+
+
+def start_queue_workers(pipeline: Callable[..., dict], get_pipeline_kwargs: Callable):
+    """
+    Start MAX_CONCURRENT_JOBS workers that pull jobs from the shared queue,
+    so every machine in worker mode takes only as many jobs as it can process at the same time.
+    """
+
+    for worker_index in range(MAX_CONCURRENT_JOBS):
+        worker_thread = threading.Thread(
+            target=_run_worker,
+            args=(pipeline, get_pipeline_kwargs),
+            name=f"queue-worker-{worker_index}",
+            daemon=True
+        )
+        worker_thread.start()
+        worker_threads.append(worker_thread)
+
+    print_info_log(
+        tag=LogTag.QUEUE_WORKER,
+        message=f"Worker {WORKER_ID} started with {MAX_CONCURRENT_JOBS} job slots."
+    )
+
+
+def stop_queue_workers():
+    """Stop pulling new jobs and return leases of running jobs, so other machines continue them right away."""
+
+    stop_event.set()
+    release_worker_leases(WORKER_ID)
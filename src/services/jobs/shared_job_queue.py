@@ -0,0 +1,217 @@
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Mapping, Optional, Tuple
+
+from configs.env import (
+    SHARED_JOB_QUEUE_URL,
+    SHARED_JOB_QUEUE_DB_PATH,
+    JOB_VISIBILITY_TIMEOUT_SECONDS,
+    JOB_MAX_ATTEMPTS
+)
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from models.job import GenerateJobRequest, Job, JobStatus
+from services.jobs.admission_control import admit_shared_job
+
+# Durable job queue shared by all machines, stored in Postgres at SHARED_JOB_QUEUE_URL
+# (or in local SQLite database at SHARED_JOB_QUEUE_DB_PATH for local runs and tests).
+# Worker leases a job for JOB_VISIBILITY_TIMEOUT_SECONDS and renews the lease while the job is running.
+# If the worker stops, the lease expires and another worker leases the job again,
+# the job continues from the stage checkpoints saved by the previous attempt.
+
+if SHARED_JOB_QUEUE_URL:
+    from services.jobs.queue_database.postgres_queue_database import PostgresQueueDatabase
+
+    queue_database = PostgresQueueDatabase(SHARED_JOB_QUEUE_URL)
+elif SHARED_JOB_QUEUE_DB_PATH:
+    from services.jobs.queue_database.sqlite_queue_database import SqliteQueueDatabase
+
+    queue_database = SqliteQueueDatabase(SHARED_JOB_QUEUE_DB_PATH)
+else:
+    queue_database = None
+
+# Queries are shared by both databases, timestamps are seconds since epoch
+CREATE_JOBS_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    deduplication_key TEXT NOT NULL,
+    request TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires_at DOUBLE PRECISION,
+    created_at DOUBLE PRECISION NOT NULL,
+    started_at DOUBLE PRECISION,
+    finished_at DOUBLE PRECISION,
+    result TEXT,
+    error TEXT
+)
+"""
+CREATE_JOBS_INDEX_QUERY = "CREATE INDEX IF NOT EXISTS jobs_status_created_at ON jobs (status, created_at)"
+
+
+def init_shared_job_queue():
+    queue_database.init_schema([CREATE_JOBS_TABLE_QUERY, CREATE_JOBS_INDEX_QUERY])
+
+
+def _to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(timestamp) if timestamp is not None else None
+
+
+def _row_to_job(row: Mapping) -> Job:
+    return Job(
+        job_id=row["job_id"],
+        status=JobStatus(row["status"]),
+        request=GenerateJobRequest.parse_raw(row["request"]),
+        created_at=_to_datetime(row["created_at"]),
+        started_at=_to_datetime(row["started_at"]),
+        finished_at=_to_datetime(row["finished_at"]),
+        result=json.loads(row["result"]) if row["result"] is not None else None,
+        error=row["error"]
+    )
+
+
+def enqueue_shared_job(job_request: GenerateJobRequest, deduplication_key: str) -> Job:
+    """
+    Add the job to the shared queue.
+    If the same job is already queued or running on any machine, the existing job is returned instead.
+
+    :raises AdmissionRejectedError: If the shared queue is full, the client should retry later.
+    """
+
+    with queue_database.connect(write=True) as connection:
+        queue_database.lock_enqueue(connection)
+        duplicate_row = connection.execute(
+            "SELECT * FROM jobs WHERE deduplication_key = ? AND status IN (?, ?)",
+            (deduplication_key, JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+        ).fetchone()
+        if duplicate_row is not None:
+            print_info_log(
+                tag=LogTag.SHARED_JOB_QUEUE,
+                message=f"Project {job_request.project_id} is already processed by job {duplicate_row['job_id']}."
+            )
+            return _row_to_job(duplicate_row)
+
+        queued_jobs_count = connection.execute(
+            "SELECT COUNT(*) AS queued_jobs_count FROM jobs WHERE status = ?",
+            (JobStatus.QUEUED.value,)
+        ).fetchone()["queued_jobs_count"]
+        admit_shared_job(queued_jobs_count)
+
+        job_id = uuid.uuid4().hex
+        connection.execute(
+            "INSERT INTO jobs (job_id, deduplication_key, request, status, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, deduplication_key, job_request.json(), JobStatus.QUEUED.value, time.time())
+        )
+        row = connection.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+
+    print_info_log(
+        tag=LogTag.SHARED_JOB_QUEUE,
+        message=f"Job {job_id} queued for project {job_request.project_id}."
+    )
+
+    return _row_to_job(row)
+
+
+def lease_next_job(worker_id: str) -> Optional[Tuple[str, GenerateJobRequest]]:
+    """
+    Lease the oldest queued job, or the oldest running job whose lease expired because its worker stopped.
+    Jobs whose lease expired JOB_MAX_ATTEMPTS times are failed.
+
+    :return: The leased job id and request, or None if the queue is empty.
+    """
+
+    now = time.time()
+    with queue_database.connect(write=True) as connection:
+        connection.execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, lease_owner = NULL, "
+            "error = 'Job lease expired ' || attempts || ' times, workers stopped while processing it.' "
+            "WHERE status = ? AND lease_expires_at < ? AND attempts >= ?",
+            (JobStatus.FAILED.value, now, JobStatus.RUNNING.value, now, JOB_MAX_ATTEMPTS)
+        )
+
+        row = connection.execute(
+            "SELECT job_id, request, attempts FROM jobs "
+            "WHERE status = ? OR (status = ? AND lease_expires_at < ?) "
+            "ORDER BY created_at LIMIT 1" + queue_database.row_lock_clause,
+            (JobStatus.QUEUED.value, JobStatus.RUNNING.value, now)
+        ).fetchone()
+        if row is None:
+            return None
+
+        connection.execute(
+            "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires_at = ?, "
+            "started_at = ? WHERE job_id = ?",
+            (JobStatus.RUNNING.value, worker_id, now + JOB_VISIBILITY_TIMEOUT_SECONDS, now, row["job_id"])
+        )
+
+    if row["attempts"] > 0:
+        print_info_log(
+            tag=LogTag.SHARED_JOB_QUEUE,
+            message=f"Job {row['job_id']} lease expired, it is leased again by {worker_id}."
+        )
+
+    return row["job_id"], GenerateJobRequest.parse_raw(row["request"])
+
+
+def renew_job_lease(job_id: str, worker_id: str) -> bool:
+    """
+    Extend the lease of the running job.
+
+    :return: False if the lease is lost, e.g. it expired and the job was leased by another worker.
+    """
+
+    with queue_database.connect(write=True) as connection:
+        cursor = connection.execute(
+            "UPDATE jobs SET lease_expires_at = ? WHERE job_id = ? AND lease_owner = ? AND status = ?",
+            (time.time() + JOB_VISIBILITY_TIMEOUT_SECONDS, job_id, worker_id, JobStatus.RUNNING.value)
+        )
+        return cursor.rowcount == 1
+
+
+def finish_shared_job(
+    job_id: str,
+    worker_id: str,
+    status: JobStatus,
+    result: Optional[dict] = None,
+    error: Optional[str] = None
+) -> bool:
+    """
+    Save the job result, if the worker still holds the lease.
+
+    :return: False if the lease is lost and the result is ignored.
+    """
+
+    with queue_database.connect(write=True) as connection:
+        cursor = connection.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_owner = NULL "
+            "WHERE job_id = ? AND lease_owner = ? AND status = ?",
+            (
+                status.value,
+                json.dumps(result) if result is not None else None,
+                error,
+                time.time(),
+                job_id,
+                worker_id,
+                JobStatus.RUNNING.value
+            )
+        )
+        return cursor.rowcount == 1
+
+
+def release_worker_leases(worker_id: str):
+    """Make running jobs of the stopping worker available to other workers right away."""
+
+    with queue_database.connect(write=True) as connection:
+        connection.execute(
+            "UPDATE jobs SET lease_expires_at = 0 WHERE lease_owner = ? AND status = ?",
+            (worker_id, JobStatus.RUNNING.value)
+        )
+
+
+def get_shared_job_by_id(job_id: str) -> Optional[Job]:
+    with queue_database.connect() as connection:
+        row = connection.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+    return _row_to_job(row) if row is not None else None
@@ -0,0 +1,234 @@
+import base64
+import hashlib
+import os
+import shutil
+import uuid
+from typing import Callable
+
+from configs.env import MEDIA_CACHE_MAX_BYTES
+from configs.logger import print_info_log
+from constants.files import MEDIA_CACHE_DIR_PATH
+from constants.log_tags import LogTag
+from services.metrics.metrics import media_cache_requests_total
+from utils.files import lock_file
+
+# Cache entries are files named by the content of the blob, next to their lock files and partial downloads.
+# Entries are handed off to job workspaces as hard links, so an evicted entry stays readable by running jobs.
+# Entry is removed together with its lock file and only by the holder of the lock, so it is never evicted between
+# the hit check and the hand-off.
+CACHE_INDEX_LOCK_NAME = ".index.lock"
+LOCK_FILE_EXTENSION = ".lock"
+PARTIAL_FILE_EXTENSION = ".partial"
+
+
+def get_media_cache_key(blob) -> str:
+    """Key of the blob content, the same file uploaded to another path has the same key."""
+
+    checksum = blob.crc32c or blob.md5_hash
+    if checksum:
+        return f"{base64.b64decode(checksum).hex()}-{blob.size}"
+    return hashlib.sha256(f"{blob.name}#{blob.generation}".encode("utf-8")).hexdigest()
+
+
+def _is_cache_entry(file_name: str) -> bool:
+    return not file_name.endswith((LOCK_FILE_EXTENSION, PARTIAL_FILE_EXTENSION))
+
+
+def _evict_entries(required_bytes: int):
+    """
+    Remove least recently used entries until the required bytes fit into MEDIA_CACHE_MAX_BYTES.
+    Must be called with the cache index lock held.
+    """
+
+    entries = []
+    for file_name in os.listdir(MEDIA_CACHE_DIR_PATH):
+        if not _is_cache_entry(file_name):
+            continue
+        try:
+            entry_stat = os.stat(f"{MEDIA_CACHE_DIR_PATH}/{file_name}")
+        except FileNotFoundError:
+            continue
+        entries.append((entry_stat.st_mtime, file_name, entry_stat))
+
+    cache_bytes = sum(entry_stat.st_size for _, _, entry_stat in entries)
+    for _, file_name, entry_stat in sorted(entries):
+        if cache_bytes + required_bytes <= MEDIA_CACHE_MAX_BYTES:
+            break
+        # Entry linked to a workspace does not free disk space until its job ends
+        if entry_stat.st_nlink > 1:
+            continue
+
+        if not _remove_entry(f"{MEDIA_CACHE_DIR_PATH}/{file_name}"):
+            continue
+        cache_bytes -= entry_stat.st_size
+        print_info_log(
+            tag=LogTag.MEDIA_CACHE,
+            message=f"Evicted {file_name} ({entry_stat.st_size} bytes)."
+        )
+
+
+def _remove_entry(entry_path: str) -> bool:
+    """
+    Remove the entry and its lock file, unless the entry is locked by a job that is handing it off right now.
+    The lock is not waited for, the job holding it may be waiting for the cache index lock held by the caller.
+
+    :return: True if the entry is removed.
+    """
+
+    entry_lock_file_path = f"{entry_path}{LOCK_FILE_EXTENSION}"
+    with lock_file(entry_lock_file_path, blocking=False) as is_locked:
+        if not is_locked:
+            return False
+        try:
+            os.remove(entry_path)
+        except FileNotFoundError:
+            return False
+        finally:
+            os.remove(entry_lock_file_path)
+    return True
+
+
+def _hand_off(entry_path: str, destination_file_path: str):
+    """Place the cached file into the workspace atomically, as a hard link or as a copy on another file system."""
+
+    try:
+        os.link(entry_path, destination_file_path)
+    except OSError:
+        partial_file_path = f"{destination_file_path}.{uuid.uuid4().hex}{PARTIAL_FILE_EXTENSION}"
+        shutil.copyfile(entry_path, partial_file_path)
+        os.replace(partial_file_path, destination_file_path)
+
+
+def _hand_off_cached_entry(entry_path: str, destination_file_path: str) -> bool:
+    """
+    Place the cached entry into the workspace, must be called with the entry lock held.
+
+    :return: False on miss, including the entry removed outside of the cache, e.g. by a disk cleanup.
+    """
+
+    try:
+        # Access time is kept in mtime, so eviction does not depend on noatime mounts
+        os.utime(entry_path)
+        _hand_off(entry_path, destination_file_path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def download_with_media_cache(
+    blob,
+    destination_file_path: str,
+    download: Callable[[str], None],
+    show_logs: bool = False
+):
+    """
+    Place the blob to the destination from local media cache, the blob is downloaded to the cache on miss.
+    Concurrent jobs of the same file wait for a single download.
+
+    :param blob: The blob with loaded metadata (size and checksums).
+    :param destination_file_path: The path in the job workspace.
+    :param download: The function that downloads the blob to the given path.
+    :param show_logs: Determines whether to display logs.
+    """
+
+    if blob.size > MEDIA_CACHE_MAX_BYTES:
+        media_cache_requests_total.labels(result="miss").inc()
+        download(destination_file_path)
+        return
+
+    os.makedirs(MEDIA_CACHE_DIR_PATH, exist_ok=True)
+    cache_key = get_media_cache_key(blob)
+    entry_path = f"{MEDIA_CACHE_DIR_PATH}/{cache_key}"
+
+    with lock_file(f"{entry_path}{LOCK_FILE_EXTENSION}"):
+        if _hand_off_cached_entry(entry_path, destination_file_path):
+            media_cache_requests_total.labels(result="hit").inc()
+            if show_logs:
+                print_info_log(
+                    tag=LogTag.MEDIA_CACHE,
+                    message=f"{blob.name} is served from media cache."
+                )
+            return
+
+        media_cache_requests_total.labels(result="miss").inc()
+        with lock_file(f"{MEDIA_CACHE_DIR_PATH}/{CACHE_INDEX_LOCK_NAME}"):
+            _evict_entries(blob.size)
+
+        partial_file_path = f"{entry_path}.{uuid.uuid4().hex}{PARTIAL_FILE_EXTENSION}"
+        try:
+            download(partial_file_path)
+            os.replace(partial_file_path, entry_path)
+        finally:
+            if os.path.exists(partial_file_path):
+                os.remove(partial_file_path)
+
+        _hand_off(entry_path, destination_file_path)
+
+    if show_logs:
+        print_info_log(
+            tag=LogTag.MEDIA_CACHE,
+            message=f"{blob.name} is downloaded to media cache."
+        )
+
+
+def is_in_media_cache(blob) -> bool:
+    return MEDIA_CACHE_MAX_BYTES > 0 and os.path.exists(f"{MEDIA_CACHE_DIR_PATH}/{get_media_cache_key(blob)}")
+
+
+def add_to_media_cache(blob, file_path: str):
+    """Add the file downloaded outside of the cache (e.g. by streaming ingest), so next jobs of the blob reuse it."""
+
+    if MEDIA_CACHE_MAX_BYTES <= 0 or blob.size > MEDIA_CACHE_MAX_BYTES:
+        return
+
+    os.makedirs(MEDIA_CACHE_DIR_PATH, exist_ok=True)
+    entry_path = f"{MEDIA_CACHE_DIR_PATH}/{get_media_cache_key(blob)}"
+
+    with lock_file(f"{entry_path}{LOCK_FILE_EXTENSION}"):
+        if os.path.exists(entry_path):
+            return
+        with lock_file(f"{MEDIA_CACHE_DIR_PATH}/{CACHE_INDEX_LOCK_NAME}"):
+            _evict_entries(blob.size)
+        _hand_off(file_path, entry_path)
+
+
+def sweep_media_cache_partials():
+    """
+    Remove partial downloads left by a stopped or crashed process. Called on startup.
+    Partials of entries locked by another process of the machine are still written, so they are kept.
+    """
+
+    if not os.path.exists(MEDIA_CACHE_DIR_PATH):
+        return
+
+    for file_name in os.listdir(MEDIA_CACHE_DIR_PATH):
+        if file_name.endswith(PARTIAL_FILE_EXTENSION):
+            _remove_abandoned_partial_file(f"{MEDIA_CACHE_DIR_PATH}/{file_name}")
+
+    # Lock files of entries whose partials were just removed are orphaned too
+    for file_name in os.listdir(MEDIA_CACHE_DIR_PATH):
+        if file_name.endswith(LOCK_FILE_EXTENSION) and file_name != CACHE_INDEX_LOCK_NAME:
+            _remove_orphaned_lock_file(f"{MEDIA_CACHE_DIR_PATH}/{file_name}")
+
+
+def _remove_abandoned_partial_file(partial_file_path: str):
+    """Remove the partial file of the entry, unless the entry is locked by the process that writes the partial."""
+
+    # Partial files are named "{entry_path}.{uuid}.partial"
+    entry_path = partial_file_path[:-len(PARTIAL_FILE_EXTENSION)].rsplit(".", 1)[0]
+    with lock_file(f"{entry_path}{LOCK_FILE_EXTENSION}", blocking=False) as is_locked:
+        if not is_locked:
+            return
+        try:
+            os.remove(partial_file_path)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_orphaned_lock_file(entry_lock_file_path: str):
+    """Remove the lock file of the entry that was never added, e.g. its download failed."""
+
+    entry_path = entry_lock_file_path[:-len(LOCK_FILE_EXTENSION)]
+    with lock_file(entry_lock_file_path, blocking=False) as is_locked:
+        if is_locked and not os.path.exists(entry_path):
+            os.remove(entry_lock_file_path)
@@ -0,0 +1,99 @@
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from models.external_service import ExternalService
+from models.pipeline_stage import PipelineStage
+
+# Stages of long videos take tens of minutes, external calls take from milliseconds to few minutes
+PIPELINE_STAGE_DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+EXTERNAL_CALL_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+pipeline_stage_duration_seconds = Histogram(
+    "speechmate_pipeline_stage_duration_seconds",
+    "Wall time spent in a dub pipeline stage per job.",
+    ["stage"],
+    buckets=PIPELINE_STAGE_DURATION_BUCKETS
+)
+external_call_duration_seconds = Histogram(
+    "speechmate_external_call_duration_seconds",
+    "Latency of a single call to an external service.",
+    ["service"],
+    buckets=EXTERNAL_CALL_DURATION_BUCKETS
+)
+external_call_errors_total = Counter(
+    "speechmate_external_call_errors_total",
+    "Calls to an external service that raised an error.",
+    ["service"]
+)
+external_call_retries_total = Counter(
+    "speechmate_external_call_retries_total",
+    "Calls to an external service repeated after an error.",
+    ["service", "reason"]
+)
+whisper_cold_starts_total = Counter(
+    "speechmate_whisper_cold_starts_total",
+    "Whisper endpoint starts from zero, found by warm-up while the endpoint is scaled to zero."
+)
+rate_limit_sleeps_total = Counter(
+    "speechmate_rate_limit_sleeps_total",
+    "Sleeps before repeating a call rejected by an external service rate limit.",
+    ["service"]
+)
+media_cache_requests_total = Counter(
+    "speechmate_media_cache_requests_total",
+    "Original file downloads served from local media cache (hit) or from Cloud Storage (miss).",
+    ["result"]
+)
+transcript_cache_requests_total = Counter(
+    "speechmate_transcript_cache_requests_total",
+    "Audio windows transcribed from local transcript cache (hit) or by Whisper endpoint (miss).",
+    ["result"]
+)
+jobs_in_flight = Gauge(
+    "speechmate_jobs_in_flight",
+    "Dub jobs that are currently running."
+)
+jobs_queued = Gauge(
+    "speechmate_jobs_queued",
+    "Dub jobs waiting for a free worker."
+)
+jobs_finished_total = Counter(
+    "speechmate_jobs_finished_total",
+    "Finished dub jobs.",
+    ["status"]
+)
+
+
+@contextmanager
+def measure_stage(stage: PipelineStage):
+    """Observe the wall time of the wrapped block in pipeline stage histogram."""
+
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        pipeline_stage_duration_seconds.labels(stage=stage.value).observe(time.perf_counter() - start_time)
+
+
+def observe_stage_duration(stage: PipelineStage, duration_in_seconds: float):
+    pipeline_stage_duration_seconds.labels(stage=stage.value).observe(duration_in_seconds)
+
+
+@contextmanager
+def measure_external_call(service: ExternalService):
+    """Observe the latency of the wrapped external call and count it as error if it raises."""
+
+    start_time = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        external_call_errors_total.labels(service=service.value).inc()
+        raise
+    finally:
+        external_call_duration_seconds.labels(service=service.value).observe(time.perf_counter() - start_time)
+
+
+def count_retry(service: ExternalService, reason: str):
+    external_call_retries_total.labels(service=service.value, reason=reason).inc()
@@ -0,0 +1,25 @@
+from pydub import AudioSegment
+
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from utils.files import get_file_extension
+
+
+def extract_source_audio(video_path: str, output_audio_file_path: str, show_logs: bool = False) -> str:
+    """
+    Decode the audio of the video once to WAV, so speech to text and overlay of every dubbed language
+    read the decoded audio instead of decoding the video again.
+
+    :return: The path to the extracted WAV file.
+    """
+
+    audio = AudioSegment.from_file(video_path, format=get_file_extension(video_path))
+    audio.export(output_audio_file_path, format="wav")
+
+    if show_logs:
+        print_info_log(
+            tag=LogTag.OVERLAY_AUDIO,
+            message=f"Source audio extracted to {output_audio_file_path}"
+        )
+
+    return output_audio_file_path
@@ -1,12 +1,12 @@
 import os
 import tempfile
-from typing import List
+from typing import List, Optional
 
 from audiostretchy.stretch import stretch_audio
 from moviepy.editor import VideoFileClip, AudioFileClip
 from pydub import AudioSegment
 
-from configs.logger import catch_error, print_info_log
+from configs.logger import print_info_log
 from constants.codecs import MP4_CODEC
 from constants.files import VIDEO_SUPPORTED_EXTENSIONS, AUDIO_SUPPORTED_EXTENSIONS, PROCESSING_FILES_DIR_PATH
 from constants.log_tags import LogTag
@@ -15,198 +15,203 @@ from services.overlay.lower_volume_in_segments import lower_volume_in_segments
 from utils.files import get_file_extension, get_file_name
 
 
+def get_translated_video_path(video_path: str, workspace_dir: str, translated_file_name: Optional[str] = None) -> str:
+    """The path overlay_audio_to_video writes the translated video to."""
+
+    if translated_file_name is None:
+        translated_file_name = f"{get_file_name(video_path)}-translated"
+    return f"{workspace_dir}/{translated_file_name}.{get_file_extension(video_path)}"
+
+
 def overlay_audio_to_video(
     video_path: str,
     audio_path: str,
     text_segments_with_audio_timestamp: List[TextSegmentWithAudioTimestamp],
-    project_id: str,
     silent_original_audio: bool = True,
+    workspace_dir: str = PROCESSING_FILES_DIR_PATH,
+    source_audio_path: Optional[str] = None,
+    translated_file_name: Optional[str] = None,
     show_logs: bool = False
 ):
-    try:
-        if show_logs:
-            print_info_log(
-                tag=LogTag.OVERLAY_AUDIO,
-                message=f"Overlaying text_segments - {text_segments_with_audio_timestamp}"
-            )
+    """
+    Overlay translated audio segments to the video at the original segments timestamps.
+    Runs in process pool, so errors are raised to the job, which reports them to Sentry and the project once.
 
-        video_file_name = get_file_name(video_path)
-        video_file_suffix = get_file_extension(video_path)
-        audio_file_suffix = get_file_extension(audio_path)
+    :param source_audio_path: Optional WAV file with already decoded audio of the video,
+        so the video audio is not decoded again for every dubbed language.
+    :param translated_file_name: The name of the output video without extension,
+        must be unique in the workspace if several languages are dubbed at the same time.
 
-        # Check if paths exist
-        if not os.path.exists(video_path):
-            catch_error(
-                tag=LogTag.OVERLAY_AUDIO,
-                error=ValueError(f"Video path {video_path} does not exist."),
-                project_id=project_id
-            )
-        if not os.path.exists(audio_path):
-            catch_error(
-                tag=LogTag.OVERLAY_AUDIO,
-                error=ValueError(f"Audio path {audio_path} does not exist."),
-                project_id=project_id
-            )
+    :return: The path to the translated video.
+    """
+
+    if show_logs:
+        print_info_log(
+            tag=LogTag.OVERLAY_AUDIO,
+            message=f"Overlaying text_segments - {text_segments_with_audio_timestamp}"
+        )
+
+    video_file_name = get_file_name(video_path)
+    video_file_suffix = get_file_extension(video_path)
+    audio_file_suffix = get_file_extension(audio_path)
+
+    # Check if paths exist
+    if not os.path.exists(video_path):
+        raise ValueError(f"Video path {video_path} does not exist.")
+    if not os.path.exists(audio_path):
+        raise ValueError(f"Audio path {audio_path} does not exist.")
+
+    # Check for supported file extensions
+    if video_file_suffix not in VIDEO_SUPPORTED_EXTENSIONS:
+        raise ValueError(
+            f"Invalid video format: {video_file_suffix}. Only {VIDEO_SUPPORTED_EXTENSIONS} are supported."
+        )
+    if audio_file_suffix not in AUDIO_SUPPORTED_EXTENSIONS:
+        raise ValueError(
+            f"Invalid audio format: {audio_file_suffix}. Only {AUDIO_SUPPORTED_EXTENSIONS} are supported."
+        )
 
-        # Check for supported file extensions
-        if video_file_suffix not in VIDEO_SUPPORTED_EXTENSIONS:
-            catch_error(
+    translated_video_path = get_translated_video_path(video_path, workspace_dir, translated_file_name)
+    if translated_file_name is None:
+        translated_file_name = f"{video_file_name}-translated"
+
+    original_video = VideoFileClip(video_path)
+    original_video_duration = original_video.duration
+    translated_audio = AudioFileClip(audio_path)
+
+    if show_logs:
+        print_info_log(
+            tag=LogTag.OVERLAY_AUDIO,
+            message=f"Input video duration: {original_video_duration}s"
+        )
+        print_info_log(
+            tag=LogTag.OVERLAY_AUDIO,
+            message=f"Input audio duration: {translated_audio.duration}s"
+        )
+
+    if source_audio_path is not None:
+        final_audio = AudioSegment.from_file(source_audio_path, format="wav")
+    else:
+        final_audio = AudioSegment.from_file(video_path, format=video_file_suffix)
+
+    # Remove original video sound
+    if silent_original_audio:
+        if show_logs:
+            print_info_log(
                 tag=LogTag.OVERLAY_AUDIO,
-                error=ValueError(
-                    f"Invalid video format: {video_file_suffix}. Only {VIDEO_SUPPORTED_EXTENSIONS} are supported."
-                ),
-                project_id=project_id
+                message=f"Remove original video sound."
             )
-        if audio_file_suffix not in AUDIO_SUPPORTED_EXTENSIONS:
-            catch_error(
+        final_audio = final_audio.silent(duration=original_video_duration * 1000)
+    else:
+        final_audio = lower_volume_in_segments(final_audio, text_segments_with_audio_timestamp, 15)
+
+    for segment in text_segments_with_audio_timestamp:
+        if show_logs:
+            print_info_log(
                 tag=LogTag.OVERLAY_AUDIO,
-                error=ValueError(
-                    f"Invalid audio format: {audio_file_suffix}. Only {AUDIO_SUPPORTED_EXTENSIONS} are supported."
-                ),
-                project_id=project_id
+                message=f"Processing segment {segment}"
             )
 
-        translated_video_path = f"{PROCESSING_FILES_DIR_PATH}/{video_file_name}-translated.{video_file_suffix}"
+        video_start_time, video_end_time = segment.original_timestamp
+        video_duration = (video_end_time - video_start_time) * 1000
 
-        original_video = VideoFileClip(video_path)
-        original_video_duration = original_video.duration
-        translated_audio = AudioFileClip(audio_path)
+        audio_start_time, audio_end_time = segment.audio_timestamp
+        audio_segment = AudioSegment.from_file(audio_path)[audio_start_time:audio_end_time]
+        audio_duration = audio_end_time - audio_start_time
 
         if show_logs:
             print_info_log(
                 tag=LogTag.OVERLAY_AUDIO,
-                message=f"Input video duration: {original_video_duration}s"
+                message=f"Video segment duration: {video_duration:.2f}ms | {video_duration / 1000:.2f}s"
             )
             print_info_log(
                 tag=LogTag.OVERLAY_AUDIO,
-                message=f"Input audio duration: {translated_audio.duration}s"
+                message=f"Audio segment duration: {audio_duration:.2f}ms | {audio_duration / 1000:.2f}s"
             )
 
-        final_audio = AudioSegment.from_file(video_path, format=video_file_suffix)
-
-        # Remove original video sound
-        if silent_original_audio:
-            if show_logs:
-                print_info_log(
-                    tag=LogTag.OVERLAY_AUDIO,
-                    message=f"Remove original video sound."
-                )
-            final_audio = final_audio.silent(duration=original_video_duration * 1000)
-        else:
-            final_audio = lower_volume_in_segments(final_audio, text_segments_with_audio_timestamp, 15)
-
-        for segment in text_segments_with_audio_timestamp:
-            if show_logs:
-                print_info_log(
-                    tag=LogTag.OVERLAY_AUDIO,
-                    message=f"Processing segment {segment}"
-                )
-
-            video_start_time, video_end_time = segment.original_timestamp
-            video_duration = (video_end_time - video_start_time) * 1000
-
-            audio_start_time, audio_end_time = segment.audio_timestamp
-            audio_segment = AudioSegment.from_file(audio_path)[audio_start_time:audio_end_time]
-            audio_duration = audio_end_time - audio_start_time
-
-            if show_logs:
-                print_info_log(
-                    tag=LogTag.OVERLAY_AUDIO,
-                    message=f"Video segment duration: {video_duration:.2f}ms | {video_duration / 1000:.2f}s"
-                )
-                print_info_log(
-                    tag=LogTag.OVERLAY_AUDIO,
-                    message=f"Audio segment duration: {audio_duration:.2f}ms | {audio_duration / 1000:.2f}s"
-                )
+        # Speed up audio if it's need
+        if audio_duration - video_duration > 0.5:
+            # ratio = audio_duration / video_duration
+            ratio = video_duration / audio_duration
+            # Do not use "with", because temp file will not be deleted
+            temp_file = tempfile.NamedTemporaryFile(
+                dir=f"{workspace_dir}/",
+                suffix=".wav",
+                delete=True
+            )
+            stretched_audio_file_path = f"{workspace_dir}/{translated_file_name}-stretched-audio-segment.wav"
+            audio_segment.export(temp_file.name, format="wav")
+            stretch_audio(temp_file.name, stretched_audio_file_path, ratio)
+            audio_segment = AudioSegment.from_file(stretched_audio_file_path)
+            # Close and auto-delete temp file
+            temp_file.close()
+            # Delete stretched audio segment file
+            os.remove(stretched_audio_file_path)
 
-            # Speed up audio if it's need
-            if audio_duration - video_duration > 0.5:
-                # ratio = audio_duration / video_duration
-                ratio = video_duration / audio_duration
-                # Do not use "with", because temp file will not be deleted
-                temp_file = tempfile.NamedTemporaryFile(
-                    dir=f"{PROCESSING_FILES_DIR_PATH}/",
-                    suffix=".wav",
-                    delete=True
-                )
-                stretched_audio_file_path = f"stretched-audio-segment-{project_id}.wav"
-                audio_segment.export(temp_file.name, format="wav")
-                stretch_audio(temp_file.name, stretched_audio_file_path, ratio)
-                audio_segment = AudioSegment.from_file(stretched_audio_file_path)
-                # Close and auto-delete temp file
-                temp_file.close()
-                # Delete stretched audio segment file
-                os.remove(stretched_audio_file_path)
-
-                if show_logs:
-                    print_info_log(
-                        tag=LogTag.OVERLAY_AUDIO,
-                        message=f"Speeding up audio by a factor of: {ratio:.2f}"
-                    )
-
-            final_audio = final_audio.overlay(audio_segment, position=video_start_time * 1000)
             if show_logs:
                 print_info_log(
                     tag=LogTag.OVERLAY_AUDIO,
-                    message=f"Overlaying audio at {video_start_time:.2f}s in video."
+                    message=f"Speeding up audio by a factor of: {ratio:.2f}"
                 )
 
+        final_audio = final_audio.overlay(audio_segment, position=video_start_time * 1000)
         if show_logs:
             print_info_log(
                 tag=LogTag.OVERLAY_AUDIO,
-                message=f"Processing all segments completed."
+                message=f"Overlaying audio at {video_start_time:.2f}s in video."
             )
 
-        overlay_audio_name = f"overlay-audio-{project_id}.mp3"
-        final_audio.export(overlay_audio_name, format="mp3")
-        final_audio_clip = AudioFileClip(overlay_audio_name)
+    if show_logs:
+        print_info_log(
+            tag=LogTag.OVERLAY_AUDIO,
+            message=f"Processing all segments completed."
+        )
 
-        # Set the audio of the video to the new audio clip
-        final_video = original_video.set_audio(final_audio_clip)
+    overlay_audio_name = f"{workspace_dir}/{translated_file_name}-overlay-audio.mp3"
+    final_audio.export(overlay_audio_name, format="mp3")
+    final_audio_clip = AudioFileClip(overlay_audio_name)
 
-        if show_logs:
-            print_info_log(
-                tag=LogTag.OVERLAY_AUDIO,
-                message=f"Output video duration: {final_video.duration}"
-            )
-            print_info_log(
-                tag=LogTag.OVERLAY_AUDIO,
-                message=f"Output audio duration: {final_audio_clip.duration}"
-            )
+    # Set the audio of the video to the new audio clip
+    final_video = original_video.set_audio(final_audio_clip)
 
-        final_video.write_videofile(
-            filename=translated_video_path,
-            codec=MP4_CODEC,
-            fps=original_video.fps,
-            logger=None
+    if show_logs:
+        print_info_log(
+            tag=LogTag.OVERLAY_AUDIO,
+            message=f"Output video duration: {final_video.duration}"
+        )
+        print_info_log(
+            tag=LogTag.OVERLAY_AUDIO,
+            message=f"Output audio duration: {final_audio_clip.duration}"
         )
 
-        # TODO: use clean FFmpeg
-        # input_video = ffmpeg.input(video_path)
-        # input_audio = ffmpeg.input(audio_path)
-        # ffmpeg.concat(input_video, input_audio, v=1, a=1).output(str(translated_video_path)).run()  # Error here
+    final_video.write_videofile(
+        filename=translated_video_path,
+        codec=MP4_CODEC,
+        fps=original_video.fps,
+        # moviepy writes temp audio to the current dir by default
+        temp_audiofile=f"{workspace_dir}/{translated_file_name}-temp-audio.mp3",
+        logger=None
+    )
 
-        # Close the clips to free up memory
-        final_video.close()
-        translated_audio.close()
-        # Remove audio overlay file
-        os.remove(overlay_audio_name)
+    # TODO: use clean FFmpeg
+    # input_video = ffmpeg.input(video_path)
+    # input_audio = ffmpeg.input(audio_path)
+    # ffmpeg.concat(input_video, input_audio, v=1, a=1).output(str(translated_video_path)).run()  # Error here
 
-        if show_logs:
-            print_info_log(
-                tag=LogTag.OVERLAY_AUDIO,
-                message=f"Overlay video saved to {translated_video_path}"
-            )
+    # Close the clips to free up memory
+    final_video.close()
+    translated_audio.close()
+    # Remove audio overlay file
+    os.remove(overlay_audio_name)
 
-        return translated_video_path
-
-    except Exception as e:
-        catch_error(
+    if show_logs:
+        print_info_log(
             tag=LogTag.OVERLAY_AUDIO,
-            error=e,
-            project_id=project_id
+            message=f"Overlay video saved to {translated_video_path}"
         )
 
+    return translated_video_path
+
 
 # For local test
 if __name__ == "__main__":
@@ -279,6 +284,5 @@ if __name__ == "__main__":
         video_path=test_video_path,
         audio_path=test_audio_path,
         text_segments_with_audio_timestamp=test_text_segments_with_audio_timestamps,
-        project_id=test_project_id,
         show_logs=True
     )
@@ -0,0 +1,349 @@
+import math
+import os
+import queue
+import threading
+import time
+from contextlib import ExitStack
+from typing import Callable, List, Optional, Tuple
+
+from configs.env import WHISPER_MAX_IN_FLIGHT_WINDOWS
+from configs.logger import catch_error, print_info_log
+from constants.log_tags import LogTag
+from models.pipeline_stage import PipelineStage
+from models.dub_target import DubTarget
+from models.streaming_pipeline_result import StreamingPipelineResult, StreamingTargetResult
+from models.text_segment import TextSegment, TextSegmentWithAudioTimestamp
+from services.executors.executors import submit_cpu_stage
+from services.metrics.metrics import measure_stage, observe_stage_duration
+from services.ingest.streaming_ingest import StreamingIngest
+from services.ingest.pcm_audio_windows import extract_audio_windows, get_media_duration_ms
+from services.jobs.job_cancellation import JobCancelledError, raise_if_job_cancelled
+from services.speech_to_text.audio_windows import MIN_WINDOW_DURATION_MS
+from services.speech_to_text.speech_to_text import transcribe_audio_windows
+from services.text_to_speech.combine_audio_parts import combine_audio_parts
+from services.text_to_speech.text_to_speech import text_to_speech
+from services.translation.translate_text import translate_text
+
+# Put to stage queue when previous stage has no more windows
+END_OF_STREAM = None
+# Windows waiting for a stage, a slow stage holds back the previous ones instead of collecting all windows in memory
+STAGE_QUEUE_MAX_SIZE = WHISPER_MAX_IN_FLIGHT_WINDOWS
+
+
+def _run_stage_worker(
+    stage: PipelineStage,
+    input_queue: queue.Queue,
+    output_queue: queue.Queue,
+    process_window: Callable,
+    stop_event: threading.Event,
+    errors: List[Exception]
+):
+    """
+    Process windows from input_queue until END_OF_STREAM and pass results to output_queue.
+    On error the whole pipeline is stopped, the rest of input_queue is drained so its bounded producer never blocks,
+    and next stage still receives END_OF_STREAM.
+    The stage busy time of all windows is observed in stage metrics.
+    """
+
+    busy_time_in_seconds = 0.0
+    try:
+        while True:
+            window = input_queue.get()
+            if window is END_OF_STREAM:
+                break
+            # Drain the rest of the windows if pipeline is stopped
+            if stop_event.is_set():
+                continue
+
+            window_index, window_text_segments = window
+            window_start_time = time.perf_counter()
+            try:
+                processed_window = process_window(window_index, window_text_segments)
+            except Exception as e:
+                print_info_log(
+                    tag=LogTag.STREAMING_PIPELINE,
+                    message=f"Stage '{stage.value}' failed: {str(e)}"
+                )
+                errors.append(e)
+                stop_event.set()
+                continue
+            busy_time_in_seconds += time.perf_counter() - window_start_time
+            output_queue.put((window_index, processed_window))
+
+        if not stop_event.is_set():
+            observe_stage_duration(stage, busy_time_in_seconds)
+
+    finally:
+        output_queue.put(END_OF_STREAM)
+
+
+def _start_target_stage_threads(
+    target: DubTarget,
+    project_id: str,
+    workspace_dir: str,
+    stop_event: threading.Event,
+    errors: List[Exception],
+    cancel_event: Optional[threading.Event],
+    show_logs: bool
+) -> Tuple[queue.Queue, list, List[threading.Thread]]:
+    """
+    Start translation, text to speech and audio parts collecting threads of one target.
+
+    :return: The input queue of the target, the list its audio parts are collected to and the started threads.
+    """
+
+    translation_queue = queue.Queue(maxsize=STAGE_QUEUE_MAX_SIZE)
+    text_to_speech_queue = queue.Queue(maxsize=STAGE_QUEUE_MAX_SIZE)
+    audio_parts_queue = queue.Queue(maxsize=STAGE_QUEUE_MAX_SIZE)
+    audio_parts = []
+    # Windows are translated one by one in order, so the previous window is the context of the next one
+    previous_window_text_segments: List[TextSegment] = []
+
+    def translate_window(window_index: int, window_text_segments: List[TextSegment]) -> List[TextSegment]:
+        nonlocal previous_window_text_segments
+
+        raise_if_job_cancelled(cancel_event)
+        # translate_text changes segments in place, so keep the original ones untouched
+        translated_text_segments = translate_text(
+            text_segments=[segment.copy() for segment in window_text_segments],
+            language=target.target_language,
+            project_id=project_id,
+            show_logs=show_logs,
+            context_text_segments=previous_window_text_segments
+        )
+        previous_window_text_segments = window_text_segments
+        return translated_text_segments
+
+    def synthesize_window(
+        window_index: int,
+        window_text_segments: List[TextSegment]
+    ) -> Tuple[str, List[TextSegment], List[TextSegmentWithAudioTimestamp]]:
+        raise_if_job_cancelled(cancel_event)
+        audio_part_file_path, window_text_segments_with_audio_timestamp = text_to_speech(
+            text_segments=window_text_segments,
+            voice_id=target.voice_id,
+            project_id=project_id,
+            translated_audio_file_path=f"{workspace_dir}/{project_id}-{target.target_id}-translated-{window_index}.mp3",
+            show_logs=show_logs
+        )
+        return audio_part_file_path, window_text_segments, window_text_segments_with_audio_timestamp
+
+    stage_threads = [
+        threading.Thread(
+            target=_run_stage_worker,
+            args=(
+                PipelineStage.TRANSLATE_TEXT,
+                translation_queue,
+                text_to_speech_queue,
+                translate_window,
+                stop_event,
+                errors
+            ),
+            name=f"translate-{target.target_id}-{project_id}"
+        ),
+        threading.Thread(
+            target=_run_stage_worker,
+            args=(
+                PipelineStage.TEXT_TO_SPEECH,
+                text_to_speech_queue,
+                audio_parts_queue,
+                synthesize_window,
+                stop_event,
+                errors
+            ),
+            name=f"text-to-speech-{target.target_id}-{project_id}"
+        ),
+        threading.Thread(
+            target=_collect_audio_parts,
+            args=(audio_parts_queue, audio_parts),
+            name=f"audio-parts-{target.target_id}-{project_id}"
+        )
+    ]
+    for stage_thread in stage_threads:
+        stage_thread.start()
+
+    return translation_queue, audio_parts, stage_threads
+
+
+def _collect_audio_parts(audio_parts_queue: queue.Queue, audio_parts: list):
+    """Take audio parts while they are synthesized, so the bounded queue never blocks text to speech."""
+
+    while True:
+        audio_part = audio_parts_queue.get()
+        if audio_part is END_OF_STREAM:
+            break
+        audio_parts.append(audio_part)
+
+
+def run_streaming_pipeline(
+    file_path: str,
+    targets: List[DubTarget],
+    project_id: str,
+    workspace_dir: str,
+    on_speech_to_text_completed: Optional[Callable[[List[TextSegment], int], None]] = None,
+    on_window_transcribed: Optional[Callable[[int, Optional[int]], None]] = None,
+    streaming_ingest: Optional[StreamingIngest] = None,
+    cancel_event: Optional[threading.Event] = None,
+    show_logs: bool = False
+) -> StreamingPipelineResult:
+    """
+    Run speech to text, translation and text to speech as overlapping stages.
+    Every transcribed window is translated and synthesized while the next windows are still transcribed,
+    so the whole run takes about the time of the slowest stage instead of the sum of all stages.
+    Speech to text runs once, every window is passed to translation and text to speech of every target.
+
+    :param file_path: The path to the original video or audio file.
+    :param targets: The languages and voices to dub the file to.
+    :param project_id: The id of the processing project.
+    :param workspace_dir: The job directory for temporary and output files.
+    :param on_speech_to_text_completed: Called with all original text segments and used tokens
+        as soon as transcription is done, while the next stages can be still running.
+    :param on_window_transcribed: Called with the count of transcribed windows and the estimated count of all
+        windows, which is None if the audio is still extracting by streaming ingest.
+    :param streaming_ingest: Optional ingest of the original file that is still downloading,
+        its audio windows are transcribed as soon as they are extracted instead of reading file_path.
+    :param cancel_event: Optional event of the job, the pipeline stops at the next window once it is set.
+    :param show_logs: Determines whether to display logs while processing.
+
+    :return: The outputs of speech to text and outputs of translation and text to speech of every target.
+    """
+
+    stop_event = threading.Event()
+    errors: List[Exception] = []
+
+    translation_queues = []
+    target_audio_parts = []
+    stage_threads = []
+    for target in targets:
+        translation_queue, audio_parts, target_stage_threads = _start_target_stage_threads(
+            target=target,
+            project_id=project_id,
+            workspace_dir=workspace_dir,
+            stop_event=stop_event,
+            errors=errors,
+            cancel_event=cancel_event,
+            show_logs=show_logs
+        )
+        translation_queues.append(translation_queue)
+        target_audio_parts.append(audio_parts)
+        stage_threads.extend(target_stage_threads)
+
+    original_text_segments: List[TextSegment] = []
+    try:
+        speech_to_text_start_time = time.perf_counter()
+        windows_count = None
+        with ExitStack() as exit_stack:
+            if streaming_ingest is not None:
+                audio_windows_reader = streaming_ingest
+            else:
+                # Audio is decoded window by window, the whole audio is never in memory
+                audio_windows_reader = exit_stack.enter_context(extract_audio_windows(file_path))
+                media_duration_ms = get_media_duration_ms(file_path)
+                if media_duration_ms:
+                    # Windows are planned while decoding, their count is estimated for progress only
+                    windows_count = math.ceil(media_duration_ms / MIN_WINDOW_DURATION_MS)
+
+            if show_logs:
+                print_info_log(
+                    tag=LogTag.STREAMING_PIPELINE,
+                    message=f"Converting speech to text of {file_path}"
+                )
+
+            window_text_segments_iterator = transcribe_audio_windows(
+                audio_windows=audio_windows_reader.iterate_audio_windows(),
+                show_logs=show_logs
+            )
+            for window_index, window_text_segments in enumerate(window_text_segments_iterator):
+                if stop_event.is_set():
+                    break
+                raise_if_job_cancelled(cancel_event)
+                original_text_segments.extend(window_text_segments)
+                # Windows without speech have nothing to translate and synthesize
+                if window_text_segments:
+                    for translation_queue in translation_queues:
+                        translation_queue.put((window_index, window_text_segments))
+                if on_window_transcribed is not None:
+                    on_window_transcribed(window_index + 1, windows_count)
+
+            # Audio length is known when the whole audio is extracted
+            used_tokens_in_seconds = audio_windows_reader.audio_length_in_seconds
+
+        if not stop_event.is_set():
+            observe_stage_duration(PipelineStage.SPEECH_TO_TEXT, time.perf_counter() - speech_to_text_start_time)
+            if show_logs:
+                print_info_log(
+                    tag=LogTag.STREAMING_PIPELINE,
+                    message="Speech to text completed, waiting for translation and text to speech..."
+                )
+            if on_speech_to_text_completed is not None:
+                on_speech_to_text_completed(original_text_segments, used_tokens_in_seconds)
+
+    except Exception as e:
+        errors.append(e)
+        stop_event.set()
+
+    finally:
+        for translation_queue in translation_queues:
+            translation_queue.put(END_OF_STREAM)
+        for stage_thread in stage_threads:
+            stage_thread.join()
+
+    try:
+        if errors:
+            raise errors[0]
+
+        translated_audio_file_paths = [
+            f"{workspace_dir}/{project_id}-{target.target_id}-translated.mp3" for target in targets
+        ]
+        # Audio parts of all targets are combined at the same time
+        with measure_stage(PipelineStage.COMBINE_AUDIO_PARTS):
+            combine_futures = [
+                submit_cpu_stage(
+                    combine_audio_parts,
+                    audio_parts=[
+                        (audio_part_file_path, window_text_segments_with_audio_timestamp)
+                        for _, (audio_part_file_path, _, window_text_segments_with_audio_timestamp) in audio_parts
+                    ],
+                    output_audio_file_path=translated_audio_file_path,
+                    show_logs=show_logs
+                )
+                for translated_audio_file_path, audio_parts in zip(translated_audio_file_paths, target_audio_parts)
+            ]
+            target_text_segments_with_audio_timestamp = [future.result() for future in combine_futures]
+
+        target_results = []
+        for target, audio_parts, translated_audio_file_path, text_segments_with_audio_timestamp in zip(
+            targets, target_audio_parts, translated_audio_file_paths, target_text_segments_with_audio_timestamp
+        ):
+            # Windows are processed one by one in each stage, so parts are already in playing order
+            target_results.append(StreamingTargetResult(
+                target=target,
+                translated_text_segments=[
+                    segment for _, (_, window_text_segments, _) in audio_parts for segment in window_text_segments
+                ],
+                translated_audio_file_path=translated_audio_file_path,
+                text_segments_with_audio_timestamp=text_segments_with_audio_timestamp
+            ))
+
+        return StreamingPipelineResult(
+            original_text_segments=original_text_segments,
+            used_tokens_in_seconds=used_tokens_in_seconds,
+            target_results=target_results
+        )
+
+    except JobCancelledError:
+        raise
+
+    except Exception as e:
+        catch_error(
+            tag=LogTag.STREAMING_PIPELINE,
+            error=e,
+            project_id=project_id
+        )
+
+    finally:
+        # Remove synthesized parts, they are combined to one audio file per target
+        for audio_parts in target_audio_parts:
+            for _, (audio_part_file_path, _, _) in audio_parts:
+                if os.path.exists(audio_part_file_path):
+                    os.remove(audio_part_file_path)
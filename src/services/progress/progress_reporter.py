@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import Dict, Set, Tuple
+
+from configs.env import PROGRESS_REPORT_INTERVAL_SECONDS, UPDATE_PROJECT_TIMEOUT_SECONDS
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from models.pipeline_stage import PipelineStage
+from models.project import ProjectStatus
+from services.executors.executors import submit_io_stage
+from services.firebase.firestore.project import update_project_status_and_translated_link_by_id
+
+# Job progress in percent at the start of every reported stage, the stage ends where the next one starts.
+# Translation and text to speech run together with speech to text in streaming pipeline.
+# Every report sets "translating" status, so download is not reported and the status is changed after it.
+PROGRESS_PERCENT_BY_STAGE = {
+    PipelineStage.SPEECH_TO_TEXT: 10,
+    PipelineStage.OVERLAY_AUDIO: 70,
+    PipelineStage.UPLOAD_BLOB: 90
+}
+COMPLETED_PERCENT = 100
+
+# Projects of running jobs, progress reported after the job is finished is ignored
+active_project_ids: Set[str] = set()
+# Latest not reported progress by project id, newer updates replace it until it is reported
+pending_progress: Dict[str, Tuple[PipelineStage, int]] = {}
+# The highest progress of the project, so parallel targets do not move the progress back
+highest_percents: Dict[str, int] = {}
+last_report_times: Dict[str, float] = {}
+reporting_project_ids: Set[str] = set()
+progress_condition = threading.Condition()
+reporter_thread = None
+
+
+def get_stage_progress_percent(stage: PipelineStage, stage_fraction: float = 0.0) -> int:
+    stage_percents = sorted(PROGRESS_PERCENT_BY_STAGE.values())
+    stage_start_percent = PROGRESS_PERCENT_BY_STAGE[stage]
+    next_stage_percents = [percent for percent in stage_percents if percent > stage_start_percent]
+    stage_end_percent = next_stage_percents[0] if next_stage_percents else COMPLETED_PERCENT
+    return int(stage_start_percent + (stage_end_percent - stage_start_percent) * min(max(stage_fraction, 0.0), 1.0))
+
+
+def start_progress_reporting(project_id: str):
+    with progress_condition:
+        active_project_ids.add(project_id)
+
+
+def report_progress(project_id: str, stage: PipelineStage, stage_fraction: float = 0.0):
+    """
+    Publish the job progress to the project without waiting for the update project function.
+    Updates of the project are coalesced, the function gets at most one call every PROGRESS_REPORT_INTERVAL_SECONDS.
+
+    :param stage: The running stage, it must be in PROGRESS_PERCENT_BY_STAGE.
+    :param stage_fraction: The done part of the stage from 0 to 1.
+    """
+
+    global reporter_thread
+
+    percent = get_stage_progress_percent(stage, stage_fraction)
+    with progress_condition:
+        if project_id not in active_project_ids or percent < highest_percents.get(project_id, 0):
+            return
+        highest_percents[project_id] = percent
+        pending_progress[project_id] = (stage, percent)
+
+        if reporter_thread is None:
+            reporter_thread = threading.Thread(target=_run_reporter, name="progress-reporter", daemon=True)
+            reporter_thread.start()
+        progress_condition.notify_all()
+
+
+def _run_reporter():
+    """Send pending progress of every project as soon as its interval since the previous report is over."""
+
+    while True:
+        with progress_condition:
+            now = time.monotonic()
+            ready_updates = []
+            next_report_times = []
+            for project_id, progress in pending_progress.items():
+                if project_id in reporting_project_ids:
+                    continue
+                next_report_time = last_report_times.get(project_id, 0) + PROGRESS_REPORT_INTERVAL_SECONDS
+                if next_report_time <= now:
+                    ready_updates.append((project_id, progress))
+                else:
+                    next_report_times.append(next_report_time)
+
+            if not ready_updates:
+                progress_condition.wait(timeout=min(next_report_times) - now if next_report_times else None)
+                continue
+
+            for project_id, _ in ready_updates:
+                del pending_progress[project_id]
+                reporting_project_ids.add(project_id)
+                last_report_times[project_id] = now
+
+        for project_id, (stage, percent) in ready_updates:
+            submit_io_stage(_send_progress, project_id=project_id, stage=stage, percent=percent)
+
+
+def _send_progress(project_id: str, stage: PipelineStage, percent: int):
+    try:
+        update_project_status_and_translated_link_by_id(
+            project_id=project_id,
+            status=ProjectStatus.TRANSLATING.value,
+            translated_file_link="",
+            progress_stage=stage.value,
+            progress_percent=percent
+        )
+    except Exception as e:
+        # Progress is informational, the next update or the final status fixes a lost one
+        print_info_log(
+            tag=LogTag.PROGRESS_REPORTER,
+            message=f"Progress update of project {project_id} failed: {str(e)}"
+        )
+    finally:
+        with progress_condition:
+            reporting_project_ids.discard(project_id)
+            progress_condition.notify_all()
+
+
+def finish_progress_reporting(project_id: str):
+    """
+    Drop pending progress of the project and wait for the update that is being sent,
+    so it can not overwrite the final status of the project. Called before the final status update.
+    """
+
+    with progress_condition:
+        active_project_ids.discard(project_id)
+        pending_progress.pop(project_id, None)
+        progress_condition.wait_for(
+            lambda: project_id not in reporting_project_ids,
+            timeout=UPDATE_PROJECT_TIMEOUT_SECONDS
+        )
+        highest_percents.pop(project_id, None)
+        last_report_times.pop(project_id, None)
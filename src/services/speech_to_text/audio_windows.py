@@ -0,0 +1,80 @@
+from typing import List, Tuple
+
+from pydub import AudioSegment
+from pydub.silence import detect_nonsilent
+
+from configs.env import STT_SILENCE_WINDOWING
+
+# Audio is transcribed in windows of 30 seconds to 1 minute, cut inside pauses between speech
+WINDOW_DURATION_MS = 1 * 60 * 1000
+MIN_WINDOW_DURATION_MS = 30 * 1000
+MIN_PAUSE_MS = 500
+# Speech is sent with some silence around it, so first and last words are not cut
+SPEECH_PADDING_MS = 300
+# Silence is quieter than the average loudness of the audio by this number of dB
+SILENCE_THRESHOLD_BELOW_AVERAGE_DB = 16
+# Audio quieter than this is silence even if the whole audio is quiet
+MIN_SILENCE_THRESHOLD_DBFS = -60
+SILENCE_SEEK_STEP_MS = 50
+
+
+def detect_speech_ranges(audio_segment: AudioSegment) -> List[Tuple[int, int]]:
+    """Find not silent ranges of the audio in milliseconds, padded with SPEECH_PADDING_MS and merged if they overlap."""
+
+    mono_audio_segment = audio_segment.set_channels(1)
+    # Digital silence has no loudness, there is nothing to transcribe
+    if mono_audio_segment.rms == 0:
+        return []
+
+    speech_ranges: List[Tuple[int, int]] = []
+    for start, end in detect_nonsilent(
+        audio_segment=mono_audio_segment,
+        min_silence_len=MIN_PAUSE_MS,
+        silence_thresh=max(mono_audio_segment.dBFS - SILENCE_THRESHOLD_BELOW_AVERAGE_DB, MIN_SILENCE_THRESHOLD_DBFS),
+        seek_step=SILENCE_SEEK_STEP_MS
+    ):
+        start, end = max(start - SPEECH_PADDING_MS, 0), min(end + SPEECH_PADDING_MS, len(audio_segment))
+        if speech_ranges and start <= speech_ranges[-1][1]:
+            speech_ranges[-1] = (speech_ranges[-1][0], end)
+        else:
+            speech_ranges.append((start, end))
+    return speech_ranges
+
+
+def plan_audio_windows(audio_segment: AudioSegment) -> List[Tuple[int, int]]:
+    """
+    Plan start and end times in milliseconds of windows sent to Whisper.
+    Windows are cut inside pauses once they are MIN_WINDOW_DURATION_MS long, and never exceed WINDOW_DURATION_MS.
+    Pauses of shorter windows stay in them, so pause-heavy speech is not split into many short requests.
+    Audio without speech between windows is not in any window.
+    Fixed 1-minute windows are planned if STT_SILENCE_WINDOWING is off.
+    """
+
+    if not STT_SILENCE_WINDOWING:
+        return [
+            (start_time, min(len(audio_segment), start_time + WINDOW_DURATION_MS))
+            for start_time in range(0, len(audio_segment), WINDOW_DURATION_MS)
+        ]
+
+    windows: List[Tuple[int, int]] = []
+    window_start = window_end = None
+    for speech_start, speech_end in detect_speech_ranges(audio_segment):
+        if window_start is not None and (
+            speech_end - window_start > WINDOW_DURATION_MS
+            or window_end - window_start >= MIN_WINDOW_DURATION_MS
+        ):
+            windows.append((window_start, window_end))
+            window_start = None
+
+        if window_start is None:
+            window_start = speech_start
+        window_end = speech_end
+
+        # Speech without pauses is cut at fixed length
+        while window_end - window_start > WINDOW_DURATION_MS:
+            windows.append((window_start, window_start + WINDOW_DURATION_MS))
+            window_start += WINDOW_DURATION_MS
+
+    if window_start is not None:
+        windows.append((window_start, window_end))
+    return windows
@@ -0,0 +1,42 @@
+import subprocess
+
+from pydub import AudioSegment
+
+# Whisper resamples audio to 16 kHz mono, so higher rates only make the request larger.
+# Lossless FLAC keeps the recognition accuracy of WAV at about a tenth of the size of 44.1 kHz stereo WAV.
+WHISPER_SAMPLE_RATE = 16000
+WHISPER_SAMPLE_WIDTH = 2
+WHISPER_CHANNELS = 1
+WHISPER_AUDIO_CONTENT_TYPE = "audio/flac"
+
+
+def resample_audio_window(audio_window: AudioSegment) -> AudioSegment:
+    """Resample the window to 16 kHz mono 16-bit, windows of streaming ingest are already in this format."""
+
+    return (
+        audio_window
+        .set_sample_width(WHISPER_SAMPLE_WIDTH)
+        .set_channels(WHISPER_CHANNELS)
+        .set_frame_rate(WHISPER_SAMPLE_RATE)
+    )
+
+
+def encode_audio_window(audio_window: AudioSegment) -> bytes:
+    """Resample the window to 16 kHz mono 16-bit and encode it to FLAC in memory, ffmpeg reads and writes pipes."""
+
+    pcm_window = resample_audio_window(audio_window)
+    ffmpeg_result = subprocess.run(
+        [
+            "ffmpeg", "-loglevel", "error",
+            "-f", "s16le", "-ar", str(WHISPER_SAMPLE_RATE), "-ac", str(WHISPER_CHANNELS), "-i", "pipe:0",
+            "-f", "flac", "pipe:1"
+        ],
+        input=pcm_window.raw_data,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    if ffmpeg_result.returncode != 0:
+        ffmpeg_error = ffmpeg_result.stderr.decode("utf-8", errors="replace")
+        raise RuntimeError(f"ffmpeg failed to encode audio window ({ffmpeg_result.returncode}): {ffmpeg_error}")
+
+    return ffmpeg_result.stdout
@@ -1,90 +1,168 @@
-import os
-import tempfile
-from pathlib import Path
-from typing import List, Tuple
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Tuple
 
 from pydub import AudioSegment
 
+from configs.env import WHISPER_MAX_IN_FLIGHT_WINDOWS, WHISPER_WINDOW_MAX_ATTEMPTS
 from constants.files import PROCESSING_FILES_DIR_PATH
 from constants.log_tags import LogTag
+from models.external_service import ExternalService
 from models.text_segment import TextSegment
-from services.speech_to_text.whisper_endpoint import send_request_to_whisper_endpoint
+from services.ingest.pcm_audio_windows import extract_audio_windows
+from services.metrics.metrics import count_retry
+from services.speech_to_text.encode_audio_window import encode_audio_window, resample_audio_window
+from services.speech_to_text.transcript_cache import (
+    get_transcript_cache_key,
+    load_cached_transcript,
+    save_transcript_to_cache
+)
+from services.speech_to_text.whisper_batcher import transcribe_with_batching
 from configs.logger import catch_error, print_info_log
 
 MINIMUM_AUDIO_LENGTH_MS = 100  # 0.1 seconds in milliseconds
+DELAY_TO_REPEAT_WINDOW_IN_SECONDS = 5
+
+
+def transcribe_audio_window(
+    audio_window: AudioSegment,
+    window_start_time_ms: int,
+    show_logs: bool = False
+) -> List[TextSegment]:
+    """Transcribe one audio window, returned segments timestamps are relative to the whole audio."""
+
+    # Check if segment length is at least 0.1 seconds - Whisper won't accept small files
+    if len(audio_window) < MINIMUM_AUDIO_LENGTH_MS:
+        return []
+
+    window_text_segments: List[TextSegment] = []
+
+    # The same audio is transcribed once, e.g. on re-run of the project or dubbing to another language
+    whisper_window = resample_audio_window(audio_window)
+    transcript_cache_key = get_transcript_cache_key(whisper_window.raw_data)
+    json_response = load_cached_transcript(transcript_cache_key)
+    if json_response is None:
+        # Window is sent as 16 kHz mono FLAC encoded in memory, no temporary file is written
+        json_response = transcribe_with_batching(
+            audio_data=encode_audio_window(whisper_window),
+            show_logs=show_logs
+        )
+        save_transcript_to_cache(transcript_cache_key, json_response)
+
+    # Adjust the timestamps by adding the window start time
+    for chunk in json_response['chunks']:
+        # Convert milliseconds to seconds
+        chunk['timestamp'][0] += window_start_time_ms / 1000
+        chunk['timestamp'][1] += window_start_time_ms / 1000
+        segment = {
+            "original_timestamp": tuple(chunk['timestamp']),
+            "text": chunk['text']
+        }
+
+        # Add chunk to window segments as TextSegment
+        window_text_segments.append(
+            TextSegment(**segment)
+        )
 
+    return window_text_segments
 
-def speech_to_text(file_path: str, project_id: str, show_logs: bool = False) -> Tuple[List[TextSegment], int]:
-    """Convert the audio content of file into text."""
-
-    try:
-        # Check if the file exists
-        if not os.path.exists(file_path):
-            raise ValueError(f"File not found: {file_path}")
-
-        file = Path(file_path)
-        file_format = file.suffix.replace('.', '')  # Strip the dot from the suffix
-
-        # Extract Audio from Video
-        audio_segment = AudioSegment.from_file(file_path, format=file_format)
-        audio_len_in_seconds = len(audio_segment) // 1000
-
-        # Determine the 1-minute Mark
-        one_minute_in_ms = 1 * 60 * 1000
 
-        # Initialize an Empty Transcript parts
-        transcript_parts: List[TextSegment] = []
+def _transcribe_audio_window_with_retries(
+    audio_window: AudioSegment,
+    window_start_time_ms: int,
+    show_logs: bool
+) -> List[TextSegment]:
+    """Transcribe the window, a failed window is retried on its own, so other windows are not sent again."""
 
-        # Loop Through 10-minute Segments
-        elapsed_time = 0  # in milliseconds
+    for attempt in range(1, WHISPER_WINDOW_MAX_ATTEMPTS + 1):
+        try:
+            return transcribe_audio_window(
+                audio_window=audio_window,
+                window_start_time_ms=window_start_time_ms,
+                show_logs=show_logs
+            )
+        except Exception as e:
+            if attempt == WHISPER_WINDOW_MAX_ATTEMPTS:
+                raise
+            count_retry(ExternalService.WHISPER_ENDPOINT, reason="window")
+            print_info_log(
+                tag=LogTag.SPEECH_TO_TEXT,
+                message=f"Window at {window_start_time_ms} ms failed ({str(e)}), attempt {attempt + 1} in "
+                        f"{DELAY_TO_REPEAT_WINDOW_IN_SECONDS * attempt} seconds..."
+            )
+            time.sleep(DELAY_TO_REPEAT_WINDOW_IN_SECONDS * attempt)
+
+
+def transcribe_audio_windows(
+    audio_windows: Iterable[Tuple[int, AudioSegment]],
+    show_logs: bool = False
+) -> Iterator[List[TextSegment]]:
+    """
+    Transcribe windows as they arrive, e.g. from streaming ingest, WHISPER_MAX_IN_FLIGHT_WINDOWS windows at the same
+    time. Yields text segments of every window in window order.
+    """
+
+    audio_windows_iterator = iter(audio_windows)
+    window_futures = deque()
+    # Windows have their own pool, speech to text already runs in a job thread or in the shared IO pool
+    with ThreadPoolExecutor(
+        max_workers=WHISPER_MAX_IN_FLIGHT_WINDOWS,
+        thread_name_prefix="speech-to-text-window"
+    ) as executor:
+        try:
+            while True:
+                # Finished first window is yielded before waiting for the next window to arrive
+                while len(window_futures) < WHISPER_MAX_IN_FLIGHT_WINDOWS and not (
+                    window_futures and window_futures[0].done()
+                ):
+                    audio_window = next(audio_windows_iterator, None)
+                    if audio_window is None:
+                        break
+                    window_start_time_ms, window_audio = audio_window
+                    window_futures.append(executor.submit(
+                        _transcribe_audio_window_with_retries,
+                        audio_window=window_audio,
+                        window_start_time_ms=window_start_time_ms,
+                        show_logs=show_logs
+                    ))
+
+                if not window_futures:
+                    break
+                yield window_futures.popleft().result()
+
+        finally:
+            # Stopped consumer or failed window, windows that were not sent yet are dropped
+            for window_future in window_futures:
+                window_future.cancel()
+
+
+def speech_to_text(
+    file_path: str,
+    project_id: str,
+    show_logs: bool = False
+) -> Tuple[List[TextSegment], int]:
+    """Convert the audio content of file into text."""
 
+    try:
         if show_logs:
             print_info_log(
                 tag=LogTag.SPEECH_TO_TEXT,
                 message=f"Converting speech to text of {file_path}"
             )
 
-        for start_time in range(0, len(audio_segment), one_minute_in_ms):
-            end_time = min(len(audio_segment), start_time + one_minute_in_ms)
-            current_segment = audio_segment[start_time:end_time]
-
-            # Check if segment length is at least 0.1 seconds - Whisper won't accept small files
-            if len(current_segment) < MINIMUM_AUDIO_LENGTH_MS:
-                continue
-
-            # Use a temporary file to avoid overwriting conflicts
-            with tempfile.NamedTemporaryFile(
-                dir=PROCESSING_FILES_DIR_PATH,
-                suffix=".wav",
-                delete=True
-            ) as temp_file:
-                current_segment.export(temp_file.name, format="wav")
-
-                # Use OpenAI's Whisper ASR to transcribe
-                json_response = send_request_to_whisper_endpoint(
-                    temp_file_name=temp_file.name,
-                    show_logs=show_logs
-                )
-
-                # Adjust the timestamps by adding the elapsed_time
-                for chunk in json_response['chunks']:
-                    # Convert milliseconds to seconds
-                    chunk['timestamp'][0] += elapsed_time / 1000
-                    chunk['timestamp'][1] += elapsed_time / 1000
-                    segment = {
-                        "original_timestamp": tuple(chunk['timestamp']),
-                        "text": chunk['text']
-                    }
-
-                    # Add chunk to transcript parts as TextSegment
-                    transcript_parts.append(
-                        TextSegment(**segment)
-                    )
-
-            # Update the elapsed_time
-            elapsed_time += one_minute_in_ms
-
-        return transcript_parts, audio_len_in_seconds
+        # Initialize an Empty Transcript parts
+        transcript_parts: List[TextSegment] = []
+
+        # Audio is decoded window by window, the whole audio is never in memory
+        with extract_audio_windows(file_path) as audio_windows_reader:
+            for window_text_segments in transcribe_audio_windows(
+                audio_windows=audio_windows_reader.iterate_audio_windows(),
+                show_logs=show_logs
+            ):
+                transcript_parts.extend(window_text_segments)
+
+        return transcript_parts, audio_windows_reader.audio_length_in_seconds
 
     except ValueError as ve:
         catch_error(
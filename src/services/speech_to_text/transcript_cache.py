@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from typing import Optional
+
+from configs.env import ENDPOINT_WHISPER_API_URL, TRANSCRIPT_CACHE_MAX_BYTES, WHISPER_MODEL_VERSION
+from configs.logger import print_info_log
+from constants.files import TRANSCRIPT_CACHE_DIR_PATH
+from constants.log_tags import LogTag
+from services.metrics.metrics import transcript_cache_requests_total
+from utils.files import lock_file
+
+# Whisper responses of audio windows are kept as JSON files named by the hash of the window audio,
+# their timestamps are relative to the window, so the same audio at another time of another file is a hit.
+CACHE_INDEX_LOCK_NAME = ".index.lock"
+ENTRY_FILE_EXTENSION = ".json"
+PARTIAL_FILE_EXTENSION = ".partial"
+
+# Cache size known to this process, counted on save, so the directory is scanned only when it exceeds the limit.
+# Entries saved by other processes of the machine are counted on the next scan.
+cache_bytes_lock = threading.Lock()
+cache_bytes: Optional[int] = None
+# Eviction frees a tenth of the cache, so the next scan is needed only after that much is saved again
+EVICTION_TARGET_RATIO = 0.9
+
+
+def get_transcript_cache_key(pcm_data: bytes) -> str:
+    """Key of the decoded window audio and the model, responses of another model are never served."""
+
+    key_hash = hashlib.sha256(f"{ENDPOINT_WHISPER_API_URL}#{WHISPER_MODEL_VERSION}#".encode("utf-8"))
+    key_hash.update(pcm_data)
+    return key_hash.hexdigest()
+
+
+def load_cached_transcript(cache_key: str) -> Optional[dict]:
+    """Whisper response of the window from the cache, or None if it is not cached."""
+
+    if TRANSCRIPT_CACHE_MAX_BYTES <= 0:
+        return None
+
+    entry_path = f"{TRANSCRIPT_CACHE_DIR_PATH}/{cache_key}{ENTRY_FILE_EXTENSION}"
+    try:
+        with open(entry_path, "r") as f:
+            whisper_response = json.load(f)
+        # Access time is kept in mtime, so eviction does not depend on noatime mounts
+        os.utime(entry_path)
+    except (FileNotFoundError, json.JSONDecodeError):
+        transcript_cache_requests_total.labels(result="miss").inc()
+        return None
+
+    transcript_cache_requests_total.labels(result="hit").inc()
+    return whisper_response
+
+
+def save_transcript_to_cache(cache_key: str, whisper_response: dict):
+    """Save Whisper response of the window, the least recently used entries are removed to fit the cache size."""
+
+    global cache_bytes
+
+    if TRANSCRIPT_CACHE_MAX_BYTES <= 0:
+        return
+
+    os.makedirs(TRANSCRIPT_CACHE_DIR_PATH, exist_ok=True)
+    entry_path = f"{TRANSCRIPT_CACHE_DIR_PATH}/{cache_key}{ENTRY_FILE_EXTENSION}"
+    partial_file_path = f"{entry_path}.{uuid.uuid4().hex}{PARTIAL_FILE_EXTENSION}"
+    try:
+        entry_data = json.dumps(whisper_response).encode("utf-8")
+        with open(partial_file_path, "wb") as f:
+            f.write(entry_data)
+        # Readers see the whole entry or no entry
+        os.replace(partial_file_path, entry_path)
+    finally:
+        if os.path.exists(partial_file_path):
+            os.remove(partial_file_path)
+
+    with cache_bytes_lock:
+        if cache_bytes is not None:
+            cache_bytes += len(entry_data)
+        is_scan_needed = cache_bytes is None or cache_bytes > TRANSCRIPT_CACHE_MAX_BYTES
+    if not is_scan_needed:
+        return
+
+    with lock_file(f"{TRANSCRIPT_CACHE_DIR_PATH}/{CACHE_INDEX_LOCK_NAME}"):
+        remaining_cache_bytes = _evict_entries()
+    with cache_bytes_lock:
+        cache_bytes = remaining_cache_bytes
+
+
+def _evict_entries() -> int:
+    """
+    If the cache exceeds TRANSCRIPT_CACHE_MAX_BYTES, remove least recently used entries
+    until it fits into EVICTION_TARGET_RATIO of it.
+
+    :return: Size of the remaining entries.
+    """
+
+    entries = []
+    with os.scandir(TRANSCRIPT_CACHE_DIR_PATH) as dir_entries:
+        for dir_entry in dir_entries:
+            if not dir_entry.name.endswith(ENTRY_FILE_EXTENSION):
+                continue
+            try:
+                entry_stat = dir_entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((entry_stat.st_mtime, dir_entry.path, entry_stat.st_size))
+
+    entries_bytes = sum(entry_size for _, _, entry_size in entries)
+    if entries_bytes <= TRANSCRIPT_CACHE_MAX_BYTES:
+        return entries_bytes
+
+    evicted_entries_count = 0
+    for _, entry_path, entry_size in sorted(entries):
+        if entries_bytes <= TRANSCRIPT_CACHE_MAX_BYTES * EVICTION_TARGET_RATIO:
+            break
+        try:
+            os.remove(entry_path)
+        except FileNotFoundError:
+            pass
+        entries_bytes -= entry_size
+        evicted_entries_count += 1
+
+    print_info_log(
+        tag=LogTag.TRANSCRIPT_CACHE,
+        message=f"Evicted {evicted_entries_count} transcripts."
+    )
+
+    return entries_bytes
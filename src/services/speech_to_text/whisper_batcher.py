@@ -0,0 +1,92 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Tuple
+
+from configs.env import WHISPER_BATCH_MAX_SIZE, WHISPER_BATCH_MAX_WAIT_MS, WHISPER_BATCH_MAX_IN_FLIGHT
+from services.speech_to_text.whisper_endpoint import (
+    send_batch_request_to_whisper_endpoint,
+    send_request_to_whisper_endpoint
+)
+
+# Windows of all jobs of the machine wait here until the dispatcher sends them in a batch
+pending_windows: List[Tuple[bytes, Future]] = []
+batch_condition = threading.Condition()
+# Batches are collected only when a batch can be sent, so windows pile up into bigger batches while the endpoint is busy
+in_flight_batches = threading.BoundedSemaphore(WHISPER_BATCH_MAX_IN_FLIGHT)
+batch_executor = None
+dispatcher_thread = None
+
+
+def transcribe_with_batching(audio_data: bytes, show_logs: bool = False) -> dict:
+    """
+    Transcribe the encoded audio window with Whisper endpoint, in one batch with windows of other jobs.
+    Every window is sent on its own if WHISPER_BATCH_MAX_SIZE is 1.
+
+    :return: Whisper response of the window.
+    """
+
+    global batch_executor, dispatcher_thread
+
+    if WHISPER_BATCH_MAX_SIZE <= 1:
+        return send_request_to_whisper_endpoint(
+            audio_data=audio_data,
+            show_logs=show_logs
+        )
+
+    window_future = Future()
+    with batch_condition:
+        if dispatcher_thread is None:
+            batch_executor = ThreadPoolExecutor(
+                max_workers=WHISPER_BATCH_MAX_IN_FLIGHT,
+                thread_name_prefix="whisper-batch"
+            )
+            dispatcher_thread = threading.Thread(target=_run_dispatcher, name="whisper-batcher", daemon=True)
+            dispatcher_thread.start()
+        pending_windows.append((audio_data, window_future))
+        batch_condition.notify_all()
+
+    return window_future.result()
+
+
+def _run_dispatcher():
+    """Collect up to WHISPER_BATCH_MAX_SIZE windows, waiting at most WHISPER_BATCH_MAX_WAIT_MS after the first one."""
+
+    while True:
+        in_flight_batches.acquire()
+        with batch_condition:
+            batch_condition.wait_for(lambda: pending_windows)
+            batch_deadline = time.monotonic() + WHISPER_BATCH_MAX_WAIT_MS / 1000
+            while len(pending_windows) < WHISPER_BATCH_MAX_SIZE:
+                remaining_wait_seconds = batch_deadline - time.monotonic()
+                if remaining_wait_seconds <= 0:
+                    break
+                batch_condition.wait(timeout=remaining_wait_seconds)
+
+            batch = pending_windows[:WHISPER_BATCH_MAX_SIZE]
+            del pending_windows[:WHISPER_BATCH_MAX_SIZE]
+
+        batch_executor.submit(_send_batch, batch)
+
+
+def _send_batch(batch: List[Tuple[bytes, Future]]):
+    """Send the batch and pass every result to the job waiting for its window, errors fail all windows of the batch."""
+
+    try:
+        audio_datas = [audio_data for audio_data, _ in batch]
+        if len(batch) == 1:
+            results = [send_request_to_whisper_endpoint(audio_data=audio_datas[0], show_logs=False)]
+        else:
+            results = send_batch_request_to_whisper_endpoint(audio_datas=audio_datas, show_logs=False)
+
+        for (_, window_future), result in zip(batch, results):
+            window_future.set_result(result)
+
+    except Exception as e:
+        # Windows are retried one by one by their jobs
+        for _, window_future in batch:
+            if not window_future.done():
+                window_future.set_exception(e)
+
+    finally:
+        in_flight_batches.release()
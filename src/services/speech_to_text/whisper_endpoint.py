@@ -1,26 +1,81 @@
+import base64
+import json
 import time
 from datetime import datetime
+from typing import List
 
-import requests
 from requests.exceptions import SSLError
 
 from configs.env import WHISPER_BEARER_TOKEN, ENDPOINT_WHISPER_API_URL
 from configs.logger import print_info_log, catch_error
 from constants.log_tags import LogTag
+from models.external_service import ExternalService
+from services.cassette.provider_cassette import post_with_cassette
+from services.http_client.http_client import http_post
+from services.metrics.metrics import count_retry, measure_external_call
+from services.speech_to_text.encode_audio_window import WHISPER_AUDIO_CONTENT_TYPE
+from services.speech_to_text.whisper_warm_up import (
+    mark_whisper_endpoint_ready,
+    start_whisper_warm_up,
+    wait_for_whisper_endpoint
+)
 
 headers = {
-    "Authorization": f"Bearer {WHISPER_BEARER_TOKEN}",
-    "Content-Type": "audio/m4a"
+    "Authorization": f"Bearer {WHISPER_BEARER_TOKEN}"
 }
+# Batch is posted as JSON with base64 audio windows in "inputs", results are returned in the same order in "results",
+# the endpoint must be deployed with whisper_endpoint/handler.py, stock ASR endpoints accept only one audio
+BATCH_CONTENT_TYPE = "application/json"
 
-DELAY_TO_REPEAT_REQUEST_IN_SECONDS = 3 * 60
 DELAY_FOR_UNKNOWN_ERRORS_IN_SECONDS = 5
 
 
-def send_request_to_whisper_endpoint(temp_file_name: str, show_logs: bool):
+def send_request_to_whisper_endpoint(audio_data: bytes, show_logs: bool):
+    """
+    Transcribe the audio with Whisper endpoint.
+
+    :param audio_data: The audio window encoded with encode_audio_window, it is posted straight from memory.
+    """
+
+    return _post_to_whisper_endpoint(
+        data=audio_data,
+        content_type=WHISPER_AUDIO_CONTENT_TYPE,
+        show_logs=show_logs
+    )
+
+
+def send_batch_request_to_whisper_endpoint(audio_datas: List[bytes], show_logs: bool) -> List[dict]:
+    """
+    Transcribe several audio windows with one request to Whisper endpoint, which processes them as one batch.
+
+    :return: Responses of the windows in the order of audio_datas.
+    """
+
+    batch_data = json.dumps({
+        "inputs": [base64.b64encode(audio_data).decode("utf-8") for audio_data in audio_datas]
+    }).encode("utf-8")
+    batch_response = _post_to_whisper_endpoint(
+        data=batch_data,
+        content_type=BATCH_CONTENT_TYPE,
+        show_logs=show_logs
+    )
+    results = batch_response.get("results") if isinstance(batch_response, dict) else None
+    if not isinstance(results, list):
+        raise ValueError(
+            "Whisper endpoint response to the batch has no \"results\" list, the endpoint does not accept batches: "
+            "deploy it with whisper_endpoint/handler.py or set WHISPER_BATCH_MAX_SIZE=1."
+        )
+    if len(results) != len(audio_datas):
+        raise ValueError(
+            f"Whisper endpoint returned {len(results)} results for the batch of {len(audio_datas)} windows."
+        )
+    return results
+
+
+def _post_to_whisper_endpoint(data: bytes, content_type: str, show_logs: bool) -> dict:
     try:
-        with open(temp_file_name, "rb") as f:
-            data = f.read()
+        # Requests wait while the endpoint is warming up instead of waking it up one by one
+        wait_for_whisper_endpoint()
 
         if show_logs:
             print_info_log(
@@ -29,7 +84,16 @@ def send_request_to_whisper_endpoint(temp_file_name: str, show_logs: bool):
             )
 
         request_time = datetime.now()
-        response = requests.post(ENDPOINT_WHISPER_API_URL, headers=headers, data=data)
+        with measure_external_call(ExternalService.WHISPER_ENDPOINT):
+            response = post_with_cassette(
+                service=ExternalService.WHISPER_ENDPOINT,
+                request_data=data,
+                post=lambda: http_post(
+                    ENDPOINT_WHISPER_API_URL,
+                    headers={**headers, "Content-Type": content_type},
+                    data=data
+                )
+            )
         response_time = datetime.now()
         time_difference = response_time - request_time
 
@@ -42,24 +106,17 @@ def send_request_to_whisper_endpoint(temp_file_name: str, show_logs: bool):
         if not response.ok:
             # If Whisper endpoint is scaled to zero (is sleeping)
             if response.status_code == 502:
+                count_retry(ExternalService.WHISPER_ENDPOINT, reason="cold_start")
                 # Wait while endpoint started
                 if show_logs:
                     print_info_log(
                         tag=LogTag.WHISPER_ENDPOINT_RESPONSE,
-                        message=f"Whisper endpoint is scaled to zero (is sleeping)."
-                    )
-                    print_info_log(
-                        tag=LogTag.WHISPER_ENDPOINT_RESPONSE,
-                        message=f"Wait {DELAY_TO_REPEAT_REQUEST_IN_SECONDS} seconds to repeat..."
+                        message=f"Whisper endpoint is scaled to zero (is sleeping), waiting for warm-up..."
                     )
-                time.sleep(DELAY_TO_REPEAT_REQUEST_IN_SECONDS)
-                if show_logs:
-                    print_info_log(
-                        tag=LogTag.WHISPER_ENDPOINT_RESPONSE,
-                        message=f"Trying to send request to Whisper endpoint again..."
-                    )
-                return send_request_to_whisper_endpoint(
-                    temp_file_name=temp_file_name,
+                start_whisper_warm_up(is_endpoint_sleeping=True)
+                return _post_to_whisper_endpoint(
+                    data=data,
+                    content_type=content_type,
                     show_logs=show_logs
                 )
 
@@ -70,6 +127,7 @@ def send_request_to_whisper_endpoint(temp_file_name: str, show_logs: bool):
                     error=Exception(f"Whisper API Error ({response.status_code}): {response.text}")
                 )
 
+        mark_whisper_endpoint_ready()
         if show_logs:
             print_info_log(
                 tag=LogTag.WHISPER_ENDPOINT_RESPONSE,
@@ -78,25 +136,25 @@ def send_request_to_whisper_endpoint(temp_file_name: str, show_logs: bool):
         return response.json()
 
     except SSLError as se:
+        count_retry(ExternalService.WHISPER_ENDPOINT, reason="ssl_error")
         print_info_log(
             tag=LogTag.WHISPER_ENDPOINT_RESPONSE,
             message=f"Connection SSLError: {str(se)}"
         )
+        # Endpoint that is starting can fail TLS handshake, the request waits for warm-up
+        start_whisper_warm_up(is_endpoint_sleeping=True)
         print_info_log(
             tag=LogTag.WHISPER_ENDPOINT_REQUEST,
-            message=f"Wait {DELAY_TO_REPEAT_REQUEST_IN_SECONDS} seconds to repeat..."
-        )
-        time.sleep(DELAY_TO_REPEAT_REQUEST_IN_SECONDS)
-        print_info_log(
-            tag=LogTag.WHISPER_ENDPOINT_REQUEST,
-            message=f"Trying to send request to Whisper endpoint again..."
+            message=f"Trying to send request to Whisper endpoint after warm-up..."
         )
-        return send_request_to_whisper_endpoint(
-            temp_file_name=temp_file_name,
+        return _post_to_whisper_endpoint(
+            data=data,
+            content_type=content_type,
             show_logs=show_logs
         )
 
     except ConnectionResetError as cre:
+        count_retry(ExternalService.WHISPER_ENDPOINT, reason="connection_reset")
         # Try again because something went wrong
         print_info_log(
             tag=LogTag.WHISPER_ENDPOINT_RESPONSE,
@@ -111,7 +169,8 @@ def send_request_to_whisper_endpoint(temp_file_name: str, show_logs: bool):
             tag=LogTag.WHISPER_ENDPOINT_RESPONSE,
             message="Trying to send request to Whisper endpoint again..."
         )
-        return send_request_to_whisper_endpoint(
-            temp_file_name=temp_file_name,
+        return _post_to_whisper_endpoint(
+            data=data,
+            content_type=content_type,
             show_logs=show_logs
         )
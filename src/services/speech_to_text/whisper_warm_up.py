@@ -0,0 +1,144 @@
+import threading
+import time
+
+from requests.exceptions import RequestException
+
+from configs.env import (
+    ENDPOINT_WHISPER_API_URL,
+    WHISPER_BEARER_TOKEN,
+    WHISPER_READY_TTL_SECONDS,
+    WHISPER_WARM_UP_TIMEOUT_SECONDS,
+    WHISPER_WARM_UP_MIN_POLL_INTERVAL_SECONDS,
+    WHISPER_WARM_UP_MAX_POLL_INTERVAL_SECONDS
+)
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from models.cassette_mode import CassetteMode
+from models.external_service import ExternalService
+from services.cassette.provider_cassette import cassette_mode
+from services.http_client.http_client import http_get
+from services.metrics.metrics import measure_external_call, whisper_cold_starts_total
+
+# Statuses of the endpoint that is scaled to zero or is still starting
+NOT_READY_STATUS_CODES = [502, 503]
+PROBE_READ_TIMEOUT_SECONDS = 30
+
+warm_up_condition = threading.Condition()
+is_endpoint_ready = False
+is_warming_up = False
+last_ready_time = 0.0
+
+
+def start_whisper_warm_up(is_endpoint_sleeping: bool = False):
+    """
+    Wake up Whisper endpoint in background, e.g. while the original file of the job is downloading.
+    Readiness is polled with backoff, requests to the endpoint wait for it in wait_for_whisper_endpoint.
+
+    :param is_endpoint_sleeping: The endpoint answered as scaled to zero, the known readiness is outdated.
+    """
+
+    global is_endpoint_ready, is_warming_up
+
+    # Replayed calls do not reach the endpoint
+    if cassette_mode == CassetteMode.REPLAY or not ENDPOINT_WHISPER_API_URL:
+        return
+
+    with warm_up_condition:
+        if is_endpoint_sleeping:
+            is_endpoint_ready = False
+        elif is_endpoint_ready and time.monotonic() - last_ready_time < WHISPER_READY_TTL_SECONDS:
+            return
+        if is_warming_up:
+            return
+        is_warming_up = True
+
+    threading.Thread(
+        target=_warm_up,
+        args=(is_endpoint_sleeping,),
+        name="whisper-warm-up",
+        daemon=True
+    ).start()
+
+
+def _is_endpoint_ready() -> bool:
+    """Any answer except scaled to zero statuses means the endpoint is up, the probe itself starts a sleeping one."""
+
+    try:
+        with measure_external_call(ExternalService.WHISPER_ENDPOINT):
+            response = http_get(
+                ENDPOINT_WHISPER_API_URL,
+                read_timeout_seconds=PROBE_READ_TIMEOUT_SECONDS,
+                headers={"Authorization": f"Bearer {WHISPER_BEARER_TOKEN}"}
+            )
+    except RequestException:
+        return False
+    return response.status_code not in NOT_READY_STATUS_CODES
+
+
+def _warm_up(is_endpoint_sleeping: bool):
+    global is_warming_up
+
+    start_time = time.monotonic()
+    poll_interval = WHISPER_WARM_UP_MIN_POLL_INTERVAL_SECONDS
+    is_ready = False
+    is_first_probe = True
+    try:
+        # The endpoint has just answered as sleeping, the immediate probe would not find it up
+        if is_endpoint_sleeping:
+            time.sleep(poll_interval)
+        while True:
+            is_ready = _is_endpoint_ready()
+            if is_ready:
+                break
+            if is_first_probe:
+                is_first_probe = False
+                whisper_cold_starts_total.inc()
+                print_info_log(
+                    tag=LogTag.WHISPER_WARM_UP,
+                    message="Whisper endpoint is scaled to zero (is sleeping), waiting for it to start..."
+                )
+            if time.monotonic() - start_time + poll_interval > WHISPER_WARM_UP_TIMEOUT_SECONDS:
+                print_info_log(
+                    tag=LogTag.WHISPER_WARM_UP,
+                    message=f"Whisper endpoint is not ready after {WHISPER_WARM_UP_TIMEOUT_SECONDS} seconds."
+                )
+                break
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, WHISPER_WARM_UP_MAX_POLL_INTERVAL_SECONDS)
+
+    finally:
+        with warm_up_condition:
+            is_warming_up = False
+            if is_ready:
+                _set_endpoint_ready()
+            warm_up_condition.notify_all()
+
+    if is_ready:
+        print_info_log(
+            tag=LogTag.WHISPER_WARM_UP,
+            message=f"Whisper endpoint is ready in {time.monotonic() - start_time:.1f} seconds."
+        )
+
+
+def _set_endpoint_ready():
+    global is_endpoint_ready, last_ready_time
+
+    is_endpoint_ready = True
+    last_ready_time = time.monotonic()
+
+
+def mark_whisper_endpoint_ready():
+    """Called on every successful response, so the next job does not probe the endpoint that is already up."""
+
+    with warm_up_condition:
+        _set_endpoint_ready()
+
+
+def wait_for_whisper_endpoint():
+    """Hold the request while the endpoint is warming up, all waiting requests are released once it is ready."""
+
+    with warm_up_condition:
+        warm_up_condition.wait_for(
+            lambda: not is_warming_up,
+            timeout=WHISPER_WARM_UP_TIMEOUT_SECONDS
+        )
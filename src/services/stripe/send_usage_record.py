@@ -1,9 +1,10 @@
 from datetime import datetime
 
-import requests
-
 from configs.env import STRIPE_SECRET_KEY
 from configs.logger import catch_error
+from models.external_service import ExternalService
+from services.http_client.http_client import http_post
+from services.metrics.metrics import measure_external_call
 
 stripe_api_exception = Exception("Error while sending usage record to Stripe API")
 
@@ -25,11 +26,12 @@ def send_usage_record(subscription_item_id: str, used_minutes_count: int, projec
         }
         auth_with_token = (STRIPE_SECRET_KEY, "")
 
-        response = requests.post(
-            url=request_url,
-            data=usage_record_data,
-            auth=auth_with_token
-        )
+        with measure_external_call(ExternalService.STRIPE):
+            response = http_post(
+                url=request_url,
+                data=usage_record_data,
+                auth=auth_with_token
+            )
 
         if not response.ok:
             catch_error(
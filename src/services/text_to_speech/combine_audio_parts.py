@@ -0,0 +1,56 @@
+from typing import List, Tuple
+
+from pydub import AudioSegment
+
+from configs.logger import print_info_log
+from constants.log_tags import LogTag
+from models.text_segment import TextSegmentWithAudioTimestamp
+
+
+def combine_audio_parts(
+    audio_parts: List[Tuple[str, List[TextSegmentWithAudioTimestamp]]],
+    output_audio_file_path: str,
+    show_logs: bool = False
+) -> List[TextSegmentWithAudioTimestamp]:
+    """
+    Concatenate separately synthesized audio parts into one audio file.
+
+    :param audio_parts: The list of audio part file paths with text segments of this part, in playing order.
+    :param output_audio_file_path: The path to save combined audio to.
+    :param show_logs: Determines whether to display logs while combining.
+
+    :return: The text segments of all parts with audio timestamps shifted to the combined audio.
+    """
+
+    if show_logs:
+        print_info_log(
+            tag=LogTag.COMBINE_AUDIO_PARTS,
+            message=f"Combining {len(audio_parts)} audio parts to {output_audio_file_path}"
+        )
+
+    combined_audio = AudioSegment.silent(duration=0)
+    combined_text_segments: List[TextSegmentWithAudioTimestamp] = []
+
+    for audio_part_file_path, part_text_segments in audio_parts:
+        part_offset = len(combined_audio)
+        combined_audio += AudioSegment.from_file(audio_part_file_path)
+
+        for segment in part_text_segments:
+            audio_start_time, audio_end_time = segment.audio_timestamp
+            combined_text_segments.append(
+                TextSegmentWithAudioTimestamp(
+                    original_timestamp=segment.original_timestamp,
+                    text=segment.text,
+                    audio_timestamp=(audio_start_time + part_offset, audio_end_time + part_offset)
+                )
+            )
+
+    combined_audio.export(output_audio_file_path, format="mp3")
+
+    if show_logs:
+        print_info_log(
+            tag=LogTag.COMBINE_AUDIO_PARTS,
+            message=f"Combined audio duration: {len(combined_audio) / 1000:.2f}s"
+        )
+
+    return combined_text_segments
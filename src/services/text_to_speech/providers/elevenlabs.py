@@ -5,12 +5,17 @@ from elevenlabs import APIError, generate as generate_audio, set_api_key, RateLi
 
 from configs.logger import print_info_log, catch_error
 from constants.log_tags import LogTag
+from models.external_service import ExternalService
 from models.text_segment import TextSegment
 from configs.env import ELEVEN_LABS_API_KEY
+from services.cassette.provider_cassette import call_with_cassette
+from services.metrics.metrics import count_retry, measure_external_call, rate_limit_sleeps_total
 
+# The SDK calls module-level requests.post without a session hook, so it does not use the shared HTTP pool
 set_api_key(ELEVEN_LABS_API_KEY)
 
 DELAY_TO_WAIT_IN_SECONDS = 5 * 60
+ELEVEN_LABS_MODEL = "eleven_multilingual_v2"
 
 
 def generate_audio_with_elevenlabs_provider(
@@ -28,11 +33,18 @@ def generate_audio_with_elevenlabs_provider(
         combined_text += segment.text + pause_tag
 
     try:
-        audio = generate_audio(
-            text=combined_text,
-            voice=voice_id,
-            model="eleven_multilingual_v2"
-        )
+        with measure_external_call(ExternalService.ELEVEN_LABS):
+            audio = call_with_cassette(
+                service=ExternalService.ELEVEN_LABS,
+                request_data={"text": combined_text, "voice": voice_id, "model": ELEVEN_LABS_MODEL},
+                call=lambda: generate_audio(
+                    text=combined_text,
+                    voice=voice_id,
+                    model=ELEVEN_LABS_MODEL
+                ),
+                encode_response=lambda audio_bytes: ({}, audio_bytes),
+                decode_response=lambda _, audio_bytes: audio_bytes
+            )
         with open(output_audio_file_path, 'wb') as f:
             f.write(audio)
 
@@ -41,6 +53,8 @@ def generate_audio_with_elevenlabs_provider(
 
         # If too many requests to 11labs, wait and then try again
         if isinstance(api_error, RateLimitError):
+            rate_limit_sleeps_total.labels(service=ExternalService.ELEVEN_LABS.value).inc()
+            count_retry(ExternalService.ELEVEN_LABS, reason="rate_limit")
             if show_logs:
                 print_info_log(
                     tag=LogTag.ELEVENLABS_PROVIDER,
@@ -1,20 +1,38 @@
-from typing import List
+from types import SimpleNamespace
+from typing import List, Optional
 
 from azure.cognitiveservices.speech import SpeechConfig, SpeechSynthesizer, ResultReason, CancellationReason
 from azure.cognitiveservices.speech.audio import AudioOutputConfig
 
 from configs.logger import catch_error, print_info_log
 from constants.log_tags import LogTag
+from models.external_service import ExternalService
 from models.text_segment import TextSegment
 from configs.env import SPEECH_REGION, SPEECH_KEY
+from services.cassette.provider_cassette import call_with_cassette
+from services.metrics.metrics import measure_external_call
 
 # This example requires environment variables named "SPEECH_KEY" and "SPEECH_REGION"
+# The Speech SDK connects with its native client, so it does not use the shared HTTP pool
 speech_config = SpeechConfig(
     subscription=SPEECH_KEY,
     region=SPEECH_REGION
 )
 
 
+class ReplayedSynthesisResult:
+    """Speech synthesis result replayed from provider cassette."""
+
+    def __init__(self, result_data: dict):
+        self.reason = ResultReason[result_data["reason"]]
+        self.cancellation_details = None
+        if result_data["cancellation_reason"] is not None:
+            self.cancellation_details = SimpleNamespace(
+                reason=CancellationReason[result_data["cancellation_reason"]],
+                error_details=result_data["error_details"]
+            )
+
+
 # languages can be found at https://learn.microsoft.com/en-us/azure/ai-services/speech-service/language-support?tabs=tts
 def create_ssml_with_pauses(
     text_segments: List[TextSegment],
@@ -54,19 +72,6 @@ def generate_audio_with_microsoft_provider(
     project_id: str,
     show_logs: bool
 ):
-    audio_config = AudioOutputConfig(filename=output_audio_file_path)
-
-    if show_logs:
-        print_info_log(
-            tag=LogTag.MICROSOFT_PROVIDER,
-            message=f"Initializing speech synthesizer..."
-        )
-
-    speech_synthesizer = SpeechSynthesizer(
-        speech_config=speech_config,
-        audio_config=audio_config
-    )
-
     if show_logs:
         print_info_log(
             tag=LogTag.MICROSOFT_PROVIDER,
@@ -87,7 +92,50 @@ def generate_audio_with_microsoft_provider(
             message=f"Synthesizing text - {text_for_synthesizing}"
         )
 
-    speech_synthesis_result = speech_synthesizer.speak_ssml_async(text_for_synthesizing).get()
+    def synthesize():
+        audio_config = AudioOutputConfig(filename=output_audio_file_path)
+
+        if show_logs:
+            print_info_log(
+                tag=LogTag.MICROSOFT_PROVIDER,
+                message=f"Initializing speech synthesizer..."
+            )
+
+        speech_synthesizer = SpeechSynthesizer(
+            speech_config=speech_config,
+            audio_config=audio_config
+        )
+        result = speech_synthesizer.speak_ssml_async(text_for_synthesizing).get()
+        # Synthesizer closes the output file when it is deleted
+        del speech_synthesizer
+        return result
+
+    def encode_synthesis_result(result) -> tuple:
+        audio = None
+        if result.reason == ResultReason.SynthesizingAudioCompleted:
+            with open(output_audio_file_path, "rb") as f:
+                audio = f.read()
+        cancellation_details = result.cancellation_details if result.reason == ResultReason.Canceled else None
+        return {
+            "reason": result.reason.name,
+            "cancellation_reason": cancellation_details.reason.name if cancellation_details else None,
+            "error_details": cancellation_details.error_details if cancellation_details else None
+        }, audio
+
+    def decode_synthesis_result(result_data: dict, audio: Optional[bytes]):
+        if audio is not None:
+            with open(output_audio_file_path, "wb") as f:
+                f.write(audio)
+        return ReplayedSynthesisResult(result_data)
+
+    with measure_external_call(ExternalService.MICROSOFT):
+        speech_synthesis_result = call_with_cassette(
+            service=ExternalService.MICROSOFT,
+            request_data=text_for_synthesizing,
+            call=synthesize,
+            encode_response=encode_synthesis_result,
+            decode_response=decode_synthesis_result
+        )
 
     # If synthesizing completed
     if speech_synthesis_result.reason == ResultReason.SynthesizingAudioCompleted:
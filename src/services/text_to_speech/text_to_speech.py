@@ -1,10 +1,11 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from pydub import AudioSegment
 from pydub.silence import detect_nonsilent
 
 from constants.files import PROCESSING_FILES_DIR_PATH
 from constants.log_tags import LogTag
+from services.executors.executors import run_cpu_stage
 from services.text_to_speech.providers.elevenlabs import generate_audio_with_elevenlabs_provider
 from services.text_to_speech.providers.microsoft import generate_audio_with_microsoft_provider
 from models.text_segment import TextSegment, TextSegmentWithAudioTimestamp
@@ -94,9 +95,11 @@ def text_to_speech(
     text_segments: List[TextSegment],
     voice_id: int,
     project_id: str,
+    translated_audio_file_path: Optional[str] = None,
     show_logs: bool = False
 ):
-    translated_audio_file_path = f"{PROCESSING_FILES_DIR_PATH}/{project_id}-translated.mp3"
+    if translated_audio_file_path is None:
+        translated_audio_file_path = f"{PROCESSING_FILES_DIR_PATH}/{project_id}-translated.mp3"
     try:
         voice_from_config = get_voice_by_id(voice_id)
         original_voice_id = voice_from_config.original_id
@@ -145,7 +148,9 @@ def text_to_speech(
                 message=f"Translated audio save to {translated_audio_file_path}"
             )
 
-        translated_text_segments_with_audio_timestamp = add_audio_timestamps_to_segments(
+        # Silence detection is pure Python, so it runs in process pool
+        translated_text_segments_with_audio_timestamp = run_cpu_stage(
+            add_audio_timestamps_to_segments,
             audio_file_path=translated_audio_file_path,
             text_segments=text_segments
         )
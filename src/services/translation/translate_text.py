@@ -1,5 +1,5 @@
 import re
-from typing import List
+from typing import List, Optional
 
 from configs.logger import catch_error, print_info_log
 from constants.log_tags import LogTag
@@ -8,12 +8,23 @@ from services.translation.combine_text_segments import combine_text_segments
 from services.translation.split_text_to_chunks import split_text_to_chunks
 from services.translation.translate_text_chunk_with_gpt import translate_text_chunk_with_gpt
 
+# Length of the previous text given to GPT as context, a few sentences are enough to continue a cut sentence
+CONTEXT_MAX_CHARS = 500
+
+
+def get_translation_context(text_segments: List[TextSegment]) -> str:
+    """End of the original text of the segments, without [] symbols, which mark segments of the translated text."""
+
+    context_text = "".join(segment.text for segment in text_segments)
+    return re.sub(r"[\[\]]", "", context_text)[-CONTEXT_MAX_CHARS:].strip()
+
 
 def translate_text(
     text_segments: List[TextSegment],
     language: str,
     project_id: str,
-    show_logs: bool = False
+    show_logs: bool = False,
+    context_text_segments: Optional[List[TextSegment]] = None
 ) -> List[TextSegment]:
     """
     Translate given text segments into the specified language.
@@ -22,6 +33,8 @@ def translate_text(
     :param text_segments: The list of TextSegments with original text segments and timestamps.
     :param project_id: The id of the processing project.
     :param show_logs: Determines whether to display logs while translating.
+    :param context_text_segments: Optional original segments before the given ones, e.g. of the previous window,
+        their end is given to GPT as context of the first chunk, but is not translated.
 
     :returns: The list of dictionaries with translated text segments and timestamps.
     """
@@ -43,13 +56,16 @@ def translate_text(
                 message=f"Translating text chunks - {text_chunks}"
             )
 
+        context_text = get_translation_context(context_text_segments) if context_text_segments else None
+
         translated_text_chunks = []
-        for chuck in text_chunks:
+        for chunk_index, chuck in enumerate(text_chunks):
             translated_chunk = translate_text_chunk_with_gpt(
                 language=language,
                 text_chunk=chuck,
                 project_id=project_id,
-                show_logs=show_logs
+                show_logs=show_logs,
+                context_text=context_text if chunk_index == 0 else None
             )
             translated_text_chunks.append(translated_chunk)
 
@@ -1,13 +1,21 @@
+import json
 from datetime import datetime
+from typing import Optional
 
 import openai
 
 from configs.env import OPEN_AI_API_KEY
 from configs.logger import print_info_log, catch_error
 from constants.log_tags import LogTag
+from models.external_service import ExternalService
+from services.cassette.provider_cassette import call_with_cassette
+from services.http_client.http_client import http_session
+from services.metrics.metrics import measure_external_call
 
 # Set OpenAI API key
 openai.api_key = OPEN_AI_API_KEY
+# OpenAI calls reuse connections of the shared session
+openai.requestssession = http_session
 
 gpt_model = "gpt-4"
 # gpt_model = "gpt-3.5-turbo"
@@ -21,17 +29,24 @@ If the text is already in {language}, you must write this text in the answer wit
 If you are not able to translate this text, you must write this text in the answer without translation.
 You must remain all [] symbols on their places in original text.
 Your answer must be only translated text.
-
+{context}
 The text you need to translate to {language} language:
 {text_chunk}
 """
 
+translation_context_gpt_prompt = """
+The text you need to translate continues the text below. Use it only to understand the context,
+do not translate it and do not include it in your answer:
+{context_text}
+"""
+
 
 def translate_text_chunk_with_gpt(
     language: str,
     text_chunk: str,
     project_id: str,
-    show_logs: bool
+    show_logs: bool,
+    context_text: Optional[str] = None
 ) -> str:
     """
     Translates a given text into the specified language using OpenAI's model.
@@ -40,6 +55,8 @@ def translate_text_chunk_with_gpt(
     :param text_chunk: The text chunks to be translated.
     :param project_id: The id of the processing project.
     :param show_logs: Determines whether to display logs while translating with gpt.
+    :param context_text: Optional original text before the chunk, e.g. the end of the previous window,
+        so a sentence cut at the chunk start is translated in its context.
 
     Returns:
     - str: Translated text or original text if translation is not possible.
@@ -54,16 +71,25 @@ def translate_text_chunk_with_gpt(
 
         query_content = translation_gpt_prompt.format(
             language=language,
-            text_chunk=text_chunk
-        )
-        response = openai.ChatCompletion.create(
-            model=gpt_model,
-            messages=[{
-                "role": "user",
-                "content": query_content
-            }],
+            text_chunk=text_chunk,
+            context=translation_context_gpt_prompt.format(context_text=context_text) if context_text else ""
         )
         request_time = datetime.now()
+        with measure_external_call(ExternalService.OPEN_AI):
+            response = call_with_cassette(
+                service=ExternalService.OPEN_AI,
+                request_data={"model": gpt_model, "content": query_content},
+                call=lambda: openai.ChatCompletion.create(
+                    model=gpt_model,
+                    messages=[{
+                        "role": "user",
+                        "content": query_content
+                    }],
+                ),
+                # OpenAI response is a dict, only its JSON content is needed
+                encode_response=lambda chat_completion: (json.loads(json.dumps(chat_completion)), None),
+                decode_response=lambda response_data, _: response_data
+            )
         translated_text = response['choices'][0]['message']['content']
         response_time = datetime.now()
         time_difference = response_time - request_time
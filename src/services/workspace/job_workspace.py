@@ -0,0 +1,159 @@
+import os
+import re
+import shutil
+import threading
+import uuid
+from typing import Dict
+
+from configs.env import (
+    WORKSPACES_MAX_BYTES,
+    JOB_WORKSPACE_MAX_BYTES,
+    TMPFS_WORKSPACES_DIR_PATH,
+    TMPFS_MAX_JOB_BYTES
+)
+from configs.logger import print_info_log
+from constants.files import WORKSPACES_DIR_PATH
+from constants.log_tags import LogTag
+
+# Original file and translated audio and video of every target are kept in workspace at the same time
+TARGET_WORKSPACE_SIZE_TO_MEDIA_SIZE_RATIO = 2
+
+# Workspace directories are named {project_id}-{hex8}, other entries of the root dirs are not touched by sweep
+WORKSPACE_NAME_PATTERN = re.compile(r"^.+-[0-9a-f]{8}$")
+
+# Reserved bytes by workspace path of running jobs
+reserved_workspaces: Dict[str, int] = {}
+workspaces_lock = threading.Lock()
+
+
+def _get_workspaces_root_dirs():
+    if TMPFS_WORKSPACES_DIR_PATH:
+        return [WORKSPACES_DIR_PATH, TMPFS_WORKSPACES_DIR_PATH]
+    return [WORKSPACES_DIR_PATH]
+
+
+def _can_use_tmpfs(expected_workspace_bytes: int) -> bool:
+    if not TMPFS_WORKSPACES_DIR_PATH or expected_workspace_bytes > TMPFS_MAX_JOB_BYTES:
+        return False
+
+    os.makedirs(TMPFS_WORKSPACES_DIR_PATH, exist_ok=True)
+    reserved_tmpfs_bytes = sum(
+        reserved_bytes for workspace_dir, reserved_bytes in reserved_workspaces.items()
+        if workspace_dir.startswith(TMPFS_WORKSPACES_DIR_PATH)
+    )
+    tmpfs_free_bytes = shutil.disk_usage(TMPFS_WORKSPACES_DIR_PATH).free
+    return reserved_tmpfs_bytes + expected_workspace_bytes <= tmpfs_free_bytes
+
+
+def get_dir_size_in_bytes(dir_path: str) -> int:
+    dir_size = 0
+    for root, _, file_names in os.walk(dir_path):
+        for file_name in file_names:
+            try:
+                dir_size += os.path.getsize(os.path.join(root, file_name))
+            except OSError:
+                # File was removed while walking
+                pass
+    return dir_size
+
+
+def create_job_workspace(
+    project_id: str,
+    original_file_size_in_bytes: int,
+    targets_count: int = 1,
+    show_logs: bool = False
+) -> str:
+    """
+    Create a separate directory for all files of the job.
+    Small jobs are placed on RAM-backed tmpfs if TMPFS_WORKSPACES_DIR_PATH is set.
+
+    :param project_id: The id of the processing project.
+    :param original_file_size_in_bytes: The size of the original file, used to reserve disk budget.
+    :param targets_count: The number of languages the file is dubbed to.
+    :param show_logs: Determines whether to display logs while creating workspace.
+
+    :return: The path to the created workspace directory.
+
+    :raises Exception: If workspaces of running jobs would exceed WORKSPACES_MAX_BYTES.
+    """
+
+    expected_workspace_bytes = min(
+        original_file_size_in_bytes * (1 + TARGET_WORKSPACE_SIZE_TO_MEDIA_SIZE_RATIO * targets_count),
+        JOB_WORKSPACE_MAX_BYTES
+    )
+
+    with workspaces_lock:
+        reserved_bytes = sum(reserved_workspaces.values())
+        if reserved_workspaces and reserved_bytes + expected_workspace_bytes > WORKSPACES_MAX_BYTES:
+            raise Exception(
+                f"Workspaces disk budget exceeded: {reserved_bytes} bytes are reserved, "
+                f"job needs {expected_workspace_bytes} bytes, limit is {WORKSPACES_MAX_BYTES} bytes."
+            )
+
+        workspaces_root_dir = TMPFS_WORKSPACES_DIR_PATH \
+            if _can_use_tmpfs(expected_workspace_bytes) else WORKSPACES_DIR_PATH
+        workspace_dir = f"{workspaces_root_dir}/{project_id}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(workspace_dir)
+        reserved_workspaces[workspace_dir] = expected_workspace_bytes
+
+    if show_logs:
+        print_info_log(
+            tag=LogTag.WORKSPACE,
+            message=f"Workspace {workspace_dir} created, reserved {expected_workspace_bytes} bytes."
+        )
+
+    return workspace_dir
+
+
+def check_workspace_quota(workspace_dir: str):
+    """
+    Check that the job files do not exceed JOB_WORKSPACE_MAX_BYTES.
+
+    :raises Exception: If workspace is too big.
+    """
+
+    workspace_size = get_dir_size_in_bytes(workspace_dir)
+    if workspace_size > JOB_WORKSPACE_MAX_BYTES:
+        raise Exception(
+            f"Job workspace {workspace_dir} has {workspace_size} bytes, limit is {JOB_WORKSPACE_MAX_BYTES} bytes."
+        )
+
+
+def remove_job_workspace(workspace_dir: str, show_logs: bool = False):
+    """Remove workspace with all job files and release its disk budget."""
+
+    shutil.rmtree(workspace_dir, ignore_errors=True)
+    with workspaces_lock:
+        reserved_workspaces.pop(workspace_dir, None)
+
+    if show_logs:
+        print_info_log(
+            tag=LogTag.WORKSPACE,
+            message=f"Workspace {workspace_dir} removed."
+        )
+
+
+def sweep_orphaned_workspaces():
+    """
+    Remove workspaces left by jobs of a stopped or crashed process. Called on startup.
+    Root dirs can be shared (e.g. /dev/shm), so only directories named like workspaces are removed.
+    """
+
+    for workspaces_root_dir in _get_workspaces_root_dirs():
+        if not os.path.exists(workspaces_root_dir):
+            continue
+
+        for workspace_name in os.listdir(workspaces_root_dir):
+            workspace_dir = f"{workspaces_root_dir}/{workspace_name}"
+            if not WORKSPACE_NAME_PATTERN.match(workspace_name) or not os.path.isdir(workspace_dir):
+                continue
+
+            with workspaces_lock:
+                if workspace_dir in reserved_workspaces:
+                    continue
+
+            print_info_log(
+                tag=LogTag.WORKSPACE,
+                message=f"Removing orphaned workspace {workspace_dir}..."
+            )
+            shutil.rmtree(workspace_dir, ignore_errors=True)
@@ -1,3 +1,6 @@
+import fcntl
+import os
+from contextlib import contextmanager
 from pathlib import Path
 
 from constants.files import VIDEO_SUPPORTED_EXTENSIONS, AUDIO_SUPPORTED_EXTENSIONS
@@ -30,6 +33,39 @@ def get_file_type(file_path: str) -> FileType:
         raise Exception(f"Unsupported file type with extension: {file_extension}")
 
 
+@contextmanager
+def lock_file(lock_file_path: str, blocking: bool = True):
+    """
+    Exclusive lock between threads and processes of the machine.
+    The holder may remove the lock file, e.g. together with the cache entry, waiters then lock the new file.
+
+    :param blocking: If False, the lock is not waited for and False is yielded if it is held by someone else.
+    """
+
+    while True:
+        lock_file_handle = open(lock_file_path, "a")
+        try:
+            fcntl.flock(lock_file_handle, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file_handle.close()
+            yield False
+            return
+
+        # The lock file was removed by the previous holder while this one waited for it
+        try:
+            if os.stat(lock_file_path).st_ino == os.fstat(lock_file_handle.fileno()).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        lock_file_handle.close()
+
+    try:
+        yield True
+    finally:
+        fcntl.flock(lock_file_handle, fcntl.LOCK_UN)
+        lock_file_handle.close()
+
+
 if __name__ == "__main__":
     test_file_path = "video.mp4"
     # test_file_path = "video.ext"  # For raise Exception
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# Modules are imported from src like in main.py, provider clients are configured with placeholder keys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+os.environ.setdefault("LOCAL_BUCKET_DIR_PATH", tempfile.mkdtemp(prefix="speechmate-tests-bucket-"))
+os.environ.setdefault("ELEVEN_LABS_API_KEY", "test")
+os.environ.setdefault("OPEN_AI_API_KEY", "test")
+os.environ.setdefault("SPEECH_KEY", "test")
+os.environ.setdefault("SPEECH_REGION", "test")
+os.environ.setdefault("CPU_EXECUTOR_WORKERS", "0")
+os.environ.setdefault("SENTRY_DSN", "")
@@ -0,0 +1,110 @@
+import pytest
+from fastapi import HTTPException
+
+from controllers.jobs import create_job
+from models.job import GenerateJobRequest
+from services.jobs import admission_control, job_queue, shared_job_queue
+from services.jobs.admission_control import (
+    AdmissionRejectedError,
+    admit_job,
+    release_job,
+    estimate_media_duration_in_seconds,
+    ESTIMATED_AUDIO_BYTES_PER_SECOND,
+    ESTIMATED_VIDEO_BYTES_PER_SECOND
+)
+from services.jobs.queue_database.sqlite_queue_database import SqliteQueueDatabase
+
+MAX_CONCURRENT_JOBS = 1
+MAX_QUEUED_JOBS = 1
+MAX_IN_FLIGHT_MEDIA_SECONDS = 100
+RETRY_AFTER_SECONDS = 42
+
+
+@pytest.fixture(autouse=True)
+def admission_limits(monkeypatch):
+    monkeypatch.setattr(admission_control, "MAX_CONCURRENT_JOBS", MAX_CONCURRENT_JOBS)
+    monkeypatch.setattr(admission_control, "MAX_QUEUED_JOBS", MAX_QUEUED_JOBS)
+    monkeypatch.setattr(admission_control, "MAX_IN_FLIGHT_MEDIA_SECONDS", MAX_IN_FLIGHT_MEDIA_SECONDS)
+    monkeypatch.setattr(admission_control, "ADMISSION_RETRY_AFTER_SECONDS", RETRY_AFTER_SECONDS)
+    monkeypatch.setattr(admission_control, "admitted_jobs_count", 0)
+    monkeypatch.setattr(admission_control, "admitted_media_seconds", 0.0)
+
+
+def create_job_request(project_id: str) -> GenerateJobRequest:
+    return GenerateJobRequest(
+        original_file_location=f"{project_id}/original.mp4",
+        target_language="Russian",
+        voice_id=1,
+        project_id=project_id,
+        organization_id="test-organization",
+        user_email="test@example.com",
+        media_duration_seconds=10
+    )
+
+
+def test_jobs_over_running_and_queued_limit_are_rejected():
+    for _ in range(MAX_CONCURRENT_JOBS + MAX_QUEUED_JOBS):
+        admit_job(10)
+
+    with pytest.raises(AdmissionRejectedError) as error_info:
+        admit_job(10)
+    assert error_info.value.retry_after_seconds == RETRY_AFTER_SECONDS
+
+    release_job(10)
+    admit_job(10)
+
+
+def test_media_over_in_flight_limit_is_rejected():
+    admit_job(80)
+
+    with pytest.raises(AdmissionRejectedError):
+        admit_job(30)
+
+    release_job(80)
+    # The first job is admitted even if its media alone exceeds the limit
+    admit_job(MAX_IN_FLIGHT_MEDIA_SECONDS * 2)
+
+
+@pytest.mark.parametrize(
+    "original_file_location, bytes_per_second",
+    [
+        ("project/original.mp4", ESTIMATED_VIDEO_BYTES_PER_SECOND),
+        ("project/original.mp3", ESTIMATED_AUDIO_BYTES_PER_SECOND)
+    ]
+)
+def test_media_duration_is_estimated_by_file_size(monkeypatch, original_file_location, bytes_per_second):
+    monkeypatch.setattr(admission_control, "get_blob_size", lambda source_blob_path: 120 * bytes_per_second)
+
+    assert estimate_media_duration_in_seconds(original_file_location) == 120
+
+
+def test_media_duration_of_missing_file_is_not_estimated(monkeypatch):
+    def get_blob_size(source_blob_path):
+        raise FileNotFoundError(source_blob_path)
+
+    monkeypatch.setattr(admission_control, "get_blob_size", get_blob_size)
+
+    assert estimate_media_duration_in_seconds("project/original.mp4") == 0.0
+
+
+def assert_rejected_with_retry_after(job_request: GenerateJobRequest):
+    with pytest.raises(HTTPException) as error_info:
+        create_job(job_request)
+    assert error_info.value.status_code == 429
+    assert error_info.value.headers == {"Retry-After": str(RETRY_AFTER_SECONDS)}
+
+
+def test_api_responds_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(admission_control, "admitted_jobs_count", MAX_CONCURRENT_JOBS + MAX_QUEUED_JOBS)
+
+    assert_rejected_with_retry_after(create_job_request("project-over-limit"))
+
+
+def test_api_responds_429_when_shared_queue_is_full(monkeypatch, tmp_path):
+    monkeypatch.setattr(job_queue, "IS_SHARED_JOB_QUEUE_ENABLED", True)
+    monkeypatch.setattr(shared_job_queue, "queue_database", SqliteQueueDatabase(str(tmp_path / "jobs.db")))
+    shared_job_queue.init_shared_job_queue()
+    for project_index in range(MAX_QUEUED_JOBS):
+        create_job(create_job_request(f"project-{project_index}"))
+
+    assert_rejected_with_retry_after(create_job_request("project-over-limit"))
@@ -0,0 +1,40 @@
+import io
+
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from services.ingest.pcm_audio_windows import PCM_SAMPLE_RATE, PcmAudioWindowsReader
+from services.speech_to_text.audio_windows import MIN_WINDOW_DURATION_MS, WINDOW_DURATION_MS, plan_audio_windows
+
+SPEECH_DURATION_MS = 3000
+# Longer than 2 seconds with speech padding, such pauses ended short windows before
+PAUSE_DURATION_MS = 3000
+PHRASES_COUNT = 60
+
+
+def create_pause_heavy_audio() -> AudioSegment:
+    phrase = Sine(440, sample_rate=PCM_SAMPLE_RATE).to_audio_segment(duration=SPEECH_DURATION_MS, volume=-10)
+    pause = AudioSegment.silent(duration=PAUSE_DURATION_MS, frame_rate=PCM_SAMPLE_RATE)
+    audio = AudioSegment.empty()
+    for _ in range(PHRASES_COUNT):
+        audio += phrase + pause
+    return audio.set_channels(1).set_sample_width(2).set_frame_rate(PCM_SAMPLE_RATE)
+
+
+def assert_windows_are_long_enough(window_durations_ms):
+    assert len(window_durations_ms) > 1
+    for window_duration_ms in window_durations_ms[:-1]:
+        assert MIN_WINDOW_DURATION_MS <= window_duration_ms <= WINDOW_DURATION_MS
+
+
+def test_pause_heavy_speech_is_planned_in_long_windows():
+    windows = plan_audio_windows(create_pause_heavy_audio())
+
+    assert_windows_are_long_enough([end_time - start_time for start_time, end_time in windows])
+
+
+def test_pause_heavy_speech_is_read_in_long_windows():
+    audio = create_pause_heavy_audio()
+    reader = PcmAudioWindowsReader(io.BytesIO(audio.raw_data))
+
+    assert_windows_are_long_enough([len(window_audio) for _, window_audio in reader.iterate_audio_windows()])
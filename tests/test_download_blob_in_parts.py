@@ -0,0 +1,84 @@
+import base64
+import hashlib
+import os
+import threading
+
+import google_crc32c
+import pytest
+
+from services.firebase.storage import download_blob_in_parts as download_module
+from services.firebase.storage.download_blob_in_parts import BlobIntegrityError, download_blob_in_parts
+
+PART_SIZE_BYTES = 1000
+# The last part is shorter than the others
+BLOB_SIZE_BYTES = PART_SIZE_BYTES * 5 + 123
+
+
+class FakeBlob:
+    """Blob that serves byte ranges of its data, the first download of failing ranges raises."""
+
+    name = "original.mp4"
+
+    def __init__(self, data: bytes, use_crc32c: bool = True, failing_range_starts=(), corrupted_range_starts=()):
+        self.data = data
+        self.size = len(data)
+        self.crc32c = base64.b64encode(google_crc32c.Checksum(data).digest()).decode("utf-8") if use_crc32c else None
+        self.md5_hash = base64.b64encode(hashlib.md5(data).digest()).decode("utf-8")
+        self.failing_range_starts = set(failing_range_starts)
+        self.corrupted_range_starts = set(corrupted_range_starts)
+        self.requested_ranges = []
+        self.lock = threading.Lock()
+
+    def download_as_bytes(self, start: int, end: int, checksum=None) -> bytes:
+        with self.lock:
+            self.requested_ranges.append((start, end))
+            if start in self.failing_range_starts:
+                self.failing_range_starts.remove(start)
+                raise ConnectionError(f"Connection reset while downloading {start}-{end}")
+
+        data = self.data[start:end + 1]
+        if start in self.corrupted_range_starts:
+            data = bytes(byte ^ 0xFF for byte in data)
+        return data
+
+
+@pytest.fixture(autouse=True)
+def small_parts(monkeypatch):
+    monkeypatch.setattr(download_module, "DOWNLOAD_PART_SIZE_BYTES", PART_SIZE_BYTES)
+    monkeypatch.setattr(download_module, "DELAY_TO_REPEAT_PART_IN_SECONDS", 0)
+
+
+def test_parts_are_reassembled_in_place(tmp_path):
+    blob = FakeBlob(os.urandom(BLOB_SIZE_BYTES))
+    destination_file_path = str(tmp_path / "original.mp4")
+
+    download_blob_in_parts(blob, destination_file_path)
+
+    with open(destination_file_path, "rb") as f:
+        assert f.read() == blob.data
+    assert sorted(blob.requested_ranges) == [
+        (start, min(start + PART_SIZE_BYTES, BLOB_SIZE_BYTES) - 1)
+        for start in range(0, BLOB_SIZE_BYTES, PART_SIZE_BYTES)
+    ]
+
+
+def test_failed_range_is_retried_alone(tmp_path):
+    failing_range_start = PART_SIZE_BYTES * 2
+    blob = FakeBlob(os.urandom(BLOB_SIZE_BYTES), failing_range_starts=[failing_range_start])
+    destination_file_path = str(tmp_path / "original.mp4")
+
+    download_blob_in_parts(blob, destination_file_path)
+
+    with open(destination_file_path, "rb") as f:
+        assert f.read() == blob.data
+    requested_range_starts = [start for start, _ in blob.requested_ranges]
+    assert requested_range_starts.count(failing_range_start) == 2
+    assert len(requested_range_starts) == len(set(requested_range_starts)) + 1
+
+
+@pytest.mark.parametrize("use_crc32c", [True, False], ids=["crc32c", "md5"])
+def test_corrupted_part_raises(tmp_path, use_crc32c):
+    blob = FakeBlob(os.urandom(BLOB_SIZE_BYTES), use_crc32c=use_crc32c, corrupted_range_starts=[PART_SIZE_BYTES])
+
+    with pytest.raises(BlobIntegrityError):
+        download_blob_in_parts(blob, str(tmp_path / "original.mp4"))
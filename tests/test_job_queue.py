@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from models.job import GenerateJobRequest, JobStatus
+from services.jobs.job_queue import submit_job, wait_for_job
+
+PIPELINE_TIMEOUT_SECONDS = 5
+
+
+def create_job_request(project_id: str) -> GenerateJobRequest:
+    return GenerateJobRequest(
+        original_file_location=f"{project_id}/original.mp4",
+        target_language="Russian",
+        voice_id=1,
+        project_id=project_id,
+        organization_id="test-organization",
+        user_email="test@example.com",
+        media_duration_seconds=60
+    )
+
+
+class BlockedPipeline:
+    """Pipeline that runs until it is released, so the job stays in flight while duplicates are submitted."""
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.release_event = threading.Event()
+        self.calls_count = 0
+
+    def __call__(self, **kwargs):
+        self.calls_count += 1
+        assert self.release_event.wait(PIPELINE_TIMEOUT_SECONDS)
+        if self.error is not None:
+            raise self.error
+        return {"translated_file_link": f"https://storage/{kwargs['project_id']}"}
+
+
+def test_duplicate_submission_returns_in_flight_job():
+    pipeline = BlockedPipeline()
+    job = submit_job(create_job_request("project-duplicate"), pipeline)
+
+    duplicate_job = submit_job(create_job_request("project-duplicate"), pipeline)
+    other_job = submit_job(create_job_request("project-other"), pipeline)
+
+    assert duplicate_job.job_id == job.job_id
+    assert other_job.job_id != job.job_id
+    pipeline.release_event.set()
+    assert wait_for_job(job.job_id).status == JobStatus.COMPLETED
+    assert wait_for_job(other_job.job_id).status == JobStatus.COMPLETED
+    assert pipeline.calls_count == 2
+
+
+@pytest.mark.parametrize(
+    "error, finished_status",
+    [(None, JobStatus.COMPLETED), (RuntimeError("Pipeline failed"), JobStatus.FAILED)],
+    ids=["completed", "failed"]
+)
+def test_finished_job_is_not_coalesced(error, finished_status):
+    pipeline = BlockedPipeline(error)
+    pipeline.release_event.set()
+    job = submit_job(create_job_request(f"project-{finished_status.value}"), pipeline)
+    assert wait_for_job(job.job_id).status == finished_status
+
+    next_job = submit_job(create_job_request(f"project-{finished_status.value}"), pipeline)
+
+    assert next_job.job_id != job.job_id
+    assert wait_for_job(next_job.job_id).status == finished_status
+    assert pipeline.calls_count == 2
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from services.workspace import job_workspace
+from services.workspace.job_workspace import create_job_workspace, remove_job_workspace, sweep_orphaned_workspaces
+
+
+@pytest.fixture
+def workspaces_dirs(monkeypatch, tmp_path):
+    workspaces_dir = tmp_path / "workspaces"
+    tmpfs_workspaces_dir = tmp_path / "shm"
+    workspaces_dir.mkdir()
+    tmpfs_workspaces_dir.mkdir()
+    monkeypatch.setattr(job_workspace, "WORKSPACES_DIR_PATH", str(workspaces_dir))
+    monkeypatch.setattr(job_workspace, "TMPFS_WORKSPACES_DIR_PATH", str(tmpfs_workspaces_dir))
+    return workspaces_dir, tmpfs_workspaces_dir
+
+
+def test_sweep_removes_only_orphaned_workspaces(workspaces_dirs):
+    workspaces_dir, tmpfs_workspaces_dir = workspaces_dirs
+    orphaned_workspace_dirs = [workspaces_dir / "project-1-0123abcd", tmpfs_workspaces_dir / "project-2-89ef4567"]
+    for orphaned_workspace_dir in orphaned_workspace_dirs:
+        orphaned_workspace_dir.mkdir()
+        (orphaned_workspace_dir / "original.mp4").write_bytes(b"original")
+    running_workspace_dir = create_job_workspace("project-3", original_file_size_in_bytes=1)
+    # Tmpfs root dir is shared with other programs of the machine
+    foreign_entries = [
+        tmpfs_workspaces_dir / "other-program-state",
+        tmpfs_workspaces_dir / "project-4-0123abcd.lock",
+        tmpfs_workspaces_dir / "file-0123abcd"
+    ]
+    foreign_entries[0].mkdir()
+    foreign_entries[1].write_bytes(b"")
+    foreign_entries[2].write_bytes(b"")
+
+    try:
+        sweep_orphaned_workspaces()
+
+        for orphaned_workspace_dir in orphaned_workspace_dirs:
+            assert not orphaned_workspace_dir.exists()
+        assert os.path.isdir(running_workspace_dir)
+        for foreign_entry in foreign_entries:
+            assert foreign_entry.exists()
+    finally:
+        remove_job_workspace(running_workspace_dir)
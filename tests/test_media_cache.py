@@ -0,0 +1,130 @@
+import base64
+import hashlib
+import os
+
+import pytest
+
+from services.media_cache import media_cache
+from services.media_cache.media_cache import (
+    download_with_media_cache,
+    get_media_cache_key,
+    sweep_media_cache_partials,
+    LOCK_FILE_EXTENSION
+)
+from utils.files import lock_file
+
+BLOB_SIZE_BYTES = 100
+MEDIA_CACHE_MAX_BYTES = 250
+
+
+class FakeBlob:
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self.data = data
+        self.size = len(data)
+        self.crc32c = None
+        self.md5_hash = base64.b64encode(hashlib.md5(data).digest()).decode("utf-8")
+        self.generation = 1
+
+
+@pytest.fixture
+def cache_dir(monkeypatch, tmp_path):
+    cache_dir = str(tmp_path / "media-cache")
+    monkeypatch.setattr(media_cache, "MEDIA_CACHE_DIR_PATH", cache_dir)
+    monkeypatch.setattr(media_cache, "MEDIA_CACHE_MAX_BYTES", MEDIA_CACHE_MAX_BYTES)
+    return cache_dir
+
+
+@pytest.fixture
+def workspace_dir(tmp_path):
+    workspace_dir = tmp_path / "workspace"
+    workspace_dir.mkdir()
+    return workspace_dir
+
+
+class Downloader:
+    def __init__(self, blob: FakeBlob):
+        self.blob = blob
+        self.downloads_count = 0
+
+    def __call__(self, file_path: str):
+        self.downloads_count += 1
+        with open(file_path, "wb") as f:
+            f.write(self.blob.data)
+
+
+def download(blob: FakeBlob, destination_file_path: str) -> Downloader:
+    downloader = Downloader(blob)
+    download_with_media_cache(blob, destination_file_path, downloader)
+    return downloader
+
+
+def get_entry_path(cache_dir: str, blob: FakeBlob) -> str:
+    return f"{cache_dir}/{get_media_cache_key(blob)}"
+
+
+def test_hit_is_hard_linked_into_workspace(cache_dir, workspace_dir):
+    blob = FakeBlob("project-1/original.mp4", os.urandom(BLOB_SIZE_BYTES))
+
+    assert download(blob, str(workspace_dir / "first.mp4")).downloads_count == 1
+    assert download(blob, str(workspace_dir / "second.mp4")).downloads_count == 0
+
+    # The same file uploaded to another path is a hit too
+    same_content_blob = FakeBlob("project-2/original.mp4", blob.data)
+    assert download(same_content_blob, str(workspace_dir / "third.mp4")).downloads_count == 0
+
+    entry_stat = os.stat(get_entry_path(cache_dir, blob))
+    assert os.stat(workspace_dir / "second.mp4").st_ino == entry_stat.st_ino
+    assert entry_stat.st_nlink == 4
+    assert (workspace_dir / "third.mp4").read_bytes() == blob.data
+
+
+def test_least_recently_used_entry_is_evicted(cache_dir, workspace_dir):
+    blobs = [FakeBlob(f"project-{index}/original.mp4", os.urandom(BLOB_SIZE_BYTES)) for index in range(3)]
+    for blob in blobs[:2]:
+        download(blob, str(workspace_dir / "original.mp4"))
+        # Job ended and its workspace is removed
+        os.remove(workspace_dir / "original.mp4")
+    os.utime(get_entry_path(cache_dir, blobs[0]), (1000, 1000))
+    os.utime(get_entry_path(cache_dir, blobs[1]), (2000, 2000))
+
+    # Hit makes the older entry the most recently used one
+    download(blobs[0], str(workspace_dir / "original.mp4"))
+    os.remove(workspace_dir / "original.mp4")
+    download(blobs[2], str(workspace_dir / "original.mp4"))
+
+    assert os.path.exists(get_entry_path(cache_dir, blobs[0]))
+    assert not os.path.exists(get_entry_path(cache_dir, blobs[1]))
+    assert not os.path.exists(f"{get_entry_path(cache_dir, blobs[1])}{LOCK_FILE_EXTENSION}")
+    assert os.path.exists(get_entry_path(cache_dir, blobs[2]))
+
+
+def test_entry_linked_to_running_job_is_not_evicted(cache_dir, workspace_dir):
+    blobs = [FakeBlob(f"project-{index}/original.mp4", os.urandom(BLOB_SIZE_BYTES)) for index in range(3)]
+    for index, blob in enumerate(blobs):
+        download(blob, str(workspace_dir / f"original-{index}.mp4"))
+
+    # Cache is over its limit until the jobs end, but files of running jobs stay in it
+    for blob in blobs:
+        assert os.path.exists(get_entry_path(cache_dir, blob))
+
+
+def test_sweep_keeps_partial_of_locked_entry(cache_dir):
+    os.makedirs(cache_dir)
+    abandoned_entry_path = f"{cache_dir}/abandoned-100"
+    abandoned_partial_path = f"{abandoned_entry_path}.{'a' * 32}.partial"
+    downloading_entry_path = f"{cache_dir}/downloading-100"
+    downloading_partial_path = f"{downloading_entry_path}.{'b' * 32}.partial"
+    for partial_path in (abandoned_partial_path, downloading_partial_path):
+        open(partial_path, "wb").close()
+    open(f"{abandoned_entry_path}{LOCK_FILE_EXTENSION}", "wb").close()
+
+    # Another process of the machine is still downloading the entry
+    with lock_file(f"{downloading_entry_path}{LOCK_FILE_EXTENSION}"):
+        sweep_media_cache_partials()
+
+        assert os.path.exists(downloading_partial_path)
+        assert os.path.exists(f"{downloading_entry_path}{LOCK_FILE_EXTENSION}")
+
+    assert not os.path.exists(abandoned_partial_path)
+    assert not os.path.exists(f"{abandoned_entry_path}{LOCK_FILE_EXTENSION}")
@@ -0,0 +1,93 @@
+import pytest
+
+from models.job import GenerateJobRequest, JobStatus
+from services.jobs import admission_control, queue_worker, shared_job_queue
+from services.jobs.admission_control import AdmissionRejectedError
+from services.jobs.job_cancellation import JobCancelledError, raise_if_job_cancelled
+from services.jobs.job_queue import get_job_deduplication_key, get_pipeline_kwargs
+from services.jobs.queue_database.sqlite_queue_database import SqliteQueueDatabase
+
+MAX_QUEUED_JOBS = 2
+LEASE_LOSS_TIMEOUT_SECONDS = 5
+
+
+@pytest.fixture
+def queue_database(monkeypatch, tmp_path):
+    queue_database = SqliteQueueDatabase(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(shared_job_queue, "queue_database", queue_database)
+    monkeypatch.setattr(admission_control, "MAX_QUEUED_JOBS", MAX_QUEUED_JOBS)
+    shared_job_queue.init_shared_job_queue()
+    return queue_database
+
+
+def create_job_request(project_id: str) -> GenerateJobRequest:
+    return GenerateJobRequest(
+        original_file_location=f"{project_id}/original.mp4",
+        target_language="Russian",
+        voice_id=1,
+        project_id=project_id,
+        organization_id="test-organization",
+        user_email="test@example.com"
+    )
+
+
+def enqueue(job_request: GenerateJobRequest):
+    return shared_job_queue.enqueue_shared_job(job_request, get_job_deduplication_key(job_request))
+
+
+def test_full_shared_queue_rejects_new_jobs(queue_database):
+    for project_index in range(MAX_QUEUED_JOBS):
+        enqueue(create_job_request(f"project-{project_index}"))
+
+    with pytest.raises(AdmissionRejectedError):
+        enqueue(create_job_request("project-over-limit"))
+
+
+def test_full_shared_queue_attaches_duplicate_to_queued_job(queue_database):
+    queued_jobs = [enqueue(create_job_request(f"project-{project_index}")) for project_index in range(MAX_QUEUED_JOBS)]
+
+    assert enqueue(create_job_request("project-0")).job_id == queued_jobs[0].job_id
+
+
+
+@pytest.mark.parametrize("finished_status", [JobStatus.COMPLETED, JobStatus.FAILED])
+def test_finished_shared_job_is_not_coalesced(queue_database, finished_status):
+    job = enqueue(create_job_request("project-0"))
+    job_id, _ = shared_job_queue.lease_next_job("test-worker")
+    assert enqueue(create_job_request("project-0")).job_id == job.job_id
+
+    shared_job_queue.finish_shared_job(job_id, "test-worker", finished_status)
+
+    assert enqueue(create_job_request("project-0")).job_id != job.job_id
+
+def test_leased_jobs_free_shared_queue(queue_database):
+    for project_index in range(MAX_QUEUED_JOBS):
+        enqueue(create_job_request(f"project-{project_index}"))
+    shared_job_queue.lease_next_job("test-worker")
+
+    enqueue(create_job_request("project-after-lease"))
+
+
+def test_worker_cancels_job_when_lease_is_lost(queue_database, monkeypatch):
+    monkeypatch.setattr(queue_worker, "JOB_LEASE_RENEWAL_INTERVAL_SECONDS", 0.01)
+    job = enqueue(create_job_request("project-0"))
+    job_id, job_request = shared_job_queue.lease_next_job(queue_worker.WORKER_ID)
+    # Lease expired and the job was leased by another worker
+    with queue_database.connect(write=True) as connection:
+        connection.execute("UPDATE jobs SET lease_owner = ? WHERE job_id = ?", ("other-worker", job_id))
+
+    cancelled_jobs = []
+
+    def pipeline(cancel_event, **kwargs):
+        cancel_event.wait(LEASE_LOSS_TIMEOUT_SECONDS)
+        try:
+            raise_if_job_cancelled(cancel_event)
+        except JobCancelledError:
+            cancelled_jobs.append(kwargs["project_id"])
+            raise
+
+    queue_worker._process_leased_job(job_id, get_pipeline_kwargs(job_request), pipeline)
+
+    assert cancelled_jobs == ["project-0"]
+    running_job = shared_job_queue.get_shared_job_by_id(job.job_id)
+    assert running_job.status == JobStatus.RUNNING
@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+from controllers import generate as generate_module
+from controllers.generate import dub_target
+from models.dub_target import DubTarget
+from models.pipeline_stage import PipelineStage
+from models.text_segment import TextSegment, TextSegmentWithAudioTimestamp
+from services.checkpoints import stage_checkpoints
+from services.checkpoints.stage_checkpoints import get_checkpoint_blob_path
+from services.firebase.storage.local_bucket import LocalBucket
+
+PROJECT_ID = "project-checkpoints"
+ORIGINAL_FILE_LOCATION = f"{PROJECT_ID}/original.mp3"
+TARGET = DubTarget(target_language="Russian", voice_id=1)
+ORIGINAL_TEXT_SEGMENTS = [TextSegment(original_timestamp=(0, 1), text="Hello")]
+TRANSLATED_AUDIO_DATA = b"translated audio"
+
+
+class FakeStages:
+    """Translation, text to speech and upload that record their calls instead of calling providers."""
+
+    def __init__(self):
+        self.translate_text_calls_count = 0
+        self.text_to_speech_calls_count = 0
+        self.uploaded_data = []
+
+    def translate_text(self, text_segments, **kwargs):
+        self.translate_text_calls_count += 1
+        return [
+            TextSegment(original_timestamp=segment.original_timestamp, text="Привет") for segment in text_segments
+        ]
+
+    def text_to_speech(self, text_segments, translated_audio_file_path, **kwargs):
+        self.text_to_speech_calls_count += 1
+        with open(translated_audio_file_path, "wb") as f:
+            f.write(TRANSLATED_AUDIO_DATA)
+        return translated_audio_file_path, [
+            TextSegmentWithAudioTimestamp(**segment.dict(), audio_timestamp=(0, 1)) for segment in text_segments
+        ]
+
+    def upload_blob(self, source_file_name, destination_blob_name, **kwargs):
+        with open(source_file_name, "rb") as f:
+            self.uploaded_data.append(f.read())
+        return f"https://storage/{destination_blob_name}"
+
+
+@pytest.fixture
+def bucket(monkeypatch, tmp_path):
+    bucket = LocalBucket(str(tmp_path / "bucket"))
+    monkeypatch.setattr(stage_checkpoints, "bucket", bucket)
+    return bucket
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    fake_stages = FakeStages()
+    monkeypatch.setattr(generate_module, "translate_text", fake_stages.translate_text)
+    monkeypatch.setattr(generate_module, "text_to_speech", fake_stages.text_to_speech)
+    monkeypatch.setattr(generate_module, "upload_blob", fake_stages.upload_blob)
+    return fake_stages
+
+
+def run_dub_target(workspace_dir, original_file_location: str = ORIGINAL_FILE_LOCATION) -> str:
+    workspace_dir.mkdir()
+    return dub_target(
+        project_id=PROJECT_ID,
+        target=TARGET,
+        original_file_location=original_file_location,
+        original_text_segments=ORIGINAL_TEXT_SEGMENTS,
+        streaming_target_result=None,
+        local_original_file_path=str(workspace_dir / "original.mp3"),
+        local_source_audio_path=None,
+        workspace_dir=str(workspace_dir),
+        is_single_target=True
+    )
+
+
+def test_rerun_skips_finished_stages(bucket, fake_stages, tmp_path):
+    file_public_link = run_dub_target(tmp_path / "first-run")
+    assert fake_stages.translate_text_calls_count == 1
+    assert fake_stages.text_to_speech_calls_count == 1
+
+    # Re-run gets a new workspace, the audio of text to speech is restored into it from the checkpoint
+    assert run_dub_target(tmp_path / "second-run") == file_public_link
+
+    assert fake_stages.translate_text_calls_count == 1
+    assert fake_stages.text_to_speech_calls_count == 1
+    assert fake_stages.uploaded_data == [TRANSLATED_AUDIO_DATA, TRANSLATED_AUDIO_DATA]
+    assert os.listdir(tmp_path / "second-run") == [f"{PROJECT_ID}-{TARGET.target_id}-translated.mp3"]
+
+
+def test_changed_params_force_rerun(bucket, fake_stages, tmp_path):
+    run_dub_target(tmp_path / "first-run")
+
+    # The project got another original file, checkpoints of the previous file must not be used
+    run_dub_target(tmp_path / "second-run", original_file_location=f"{PROJECT_ID}/other-original.mp3")
+
+    assert fake_stages.translate_text_calls_count == 2
+    assert fake_stages.text_to_speech_calls_count == 2
+
+
+def test_stage_without_audio_is_run_again(bucket, fake_stages, tmp_path):
+    run_dub_target(tmp_path / "first-run")
+    # Audio of the checkpoint is lost, the stage can't be restored without it
+    bucket.blob(get_checkpoint_blob_path(
+        PROJECT_ID,
+        PipelineStage.TEXT_TO_SPEECH,
+        extension="mp3",
+        target_id=TARGET.target_id
+    )).delete()
+
+    run_dub_target(tmp_path / "second-run")
+
+    assert fake_stages.translate_text_calls_count == 1
+    assert fake_stages.text_to_speech_calls_count == 2
+    assert fake_stages.uploaded_data == [TRANSLATED_AUDIO_DATA, TRANSLATED_AUDIO_DATA]
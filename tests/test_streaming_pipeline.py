@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+
+from models.dub_target import DubTarget
+from models.text_segment import TextSegment
+from services.jobs.job_cancellation import JobCancelledError
+from services.pipeline import streaming_pipeline
+
+WINDOWS_COUNT = streaming_pipeline.STAGE_QUEUE_MAX_SIZE * 3
+FAILED_WINDOW_INDEX = 1
+PIPELINE_TIMEOUT_SECONDS = 10
+
+
+class FakeAudioWindowsReader:
+    audio_length_in_seconds = WINDOWS_COUNT
+
+    def iterate_audio_windows(self):
+        for window_index in range(WINDOWS_COUNT):
+            yield window_index * 1000, None
+
+
+def raise_error(tag, error, project_id=None, user_email=None):
+    raise error
+
+
+def test_failed_middle_window_stops_pipeline_with_full_queue(monkeypatch, tmp_path):
+    # The next window is transcribed only after the previous one is put to the bounded translation queue
+    translation_queue_is_full = threading.Event()
+
+    def transcribe_audio_windows(audio_windows, show_logs=False):
+        for window_index, (window_start_ms, _) in enumerate(audio_windows):
+            if window_index == FAILED_WINDOW_INDEX + streaming_pipeline.STAGE_QUEUE_MAX_SIZE + 1:
+                translation_queue_is_full.set()
+            window_start = window_start_ms / 1000
+            yield [TextSegment(original_timestamp=(window_start, window_start + 1), text=str(window_index))]
+
+    def translate_text(text_segments, **kwargs):
+        if text_segments[0].text == str(FAILED_WINDOW_INDEX):
+            translation_queue_is_full.wait()
+            raise RuntimeError("Translation failed")
+        return text_segments
+
+    def text_to_speech(text_segments, translated_audio_file_path, **kwargs):
+        return translated_audio_file_path, []
+
+    monkeypatch.setattr(streaming_pipeline, "transcribe_audio_windows", transcribe_audio_windows)
+    monkeypatch.setattr(streaming_pipeline, "translate_text", translate_text)
+    monkeypatch.setattr(streaming_pipeline, "text_to_speech", text_to_speech)
+    monkeypatch.setattr(streaming_pipeline, "catch_error", raise_error)
+
+    pipeline_errors = []
+
+    def run_pipeline():
+        try:
+            streaming_pipeline.run_streaming_pipeline(
+                file_path="",
+                targets=[DubTarget(target_language="Russian", voice_id=1)],
+                project_id="test-project",
+                workspace_dir=str(tmp_path),
+                streaming_ingest=FakeAudioWindowsReader()
+            )
+        except Exception as e:
+            pipeline_errors.append(e)
+
+    pipeline_thread = threading.Thread(target=run_pipeline, daemon=True)
+    pipeline_thread.start()
+    pipeline_thread.join(PIPELINE_TIMEOUT_SECONDS)
+
+    assert not pipeline_thread.is_alive(), "Pipeline hangs after a failed window"
+    assert len(pipeline_errors) == 1
+    with pytest.raises(RuntimeError, match="Translation failed"):
+        raise pipeline_errors[0]
+
+
+def test_cancelled_job_stops_pipeline_without_error_status(monkeypatch, tmp_path):
+    cancel_event = threading.Event()
+    reported_errors = []
+
+    def transcribe_audio_windows(audio_windows, show_logs=False):
+        for window_index, (window_start_ms, _) in enumerate(audio_windows):
+            yield [TextSegment(original_timestamp=(window_start_ms / 1000, window_start_ms / 1000 + 1), text="text")]
+
+    def translate_text(text_segments, **kwargs):
+        # Lease of the job is lost while the first window is translated
+        cancel_event.set()
+        return text_segments
+
+    def text_to_speech(text_segments, translated_audio_file_path, **kwargs):
+        return translated_audio_file_path, []
+
+    def report_error(tag, error, project_id=None, user_email=None):
+        reported_errors.append(error)
+        raise error
+
+    monkeypatch.setattr(streaming_pipeline, "transcribe_audio_windows", transcribe_audio_windows)
+    monkeypatch.setattr(streaming_pipeline, "translate_text", translate_text)
+    monkeypatch.setattr(streaming_pipeline, "text_to_speech", text_to_speech)
+    monkeypatch.setattr(streaming_pipeline, "catch_error", report_error)
+
+    with pytest.raises(JobCancelledError):
+        streaming_pipeline.run_streaming_pipeline(
+            file_path="",
+            targets=[DubTarget(target_language="Russian", voice_id=1)],
+            project_id="test-project",
+            workspace_dir=str(tmp_path),
+            streaming_ingest=FakeAudioWindowsReader(),
+            cancel_event=cancel_event
+        )
+    assert not reported_errors
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from services.speech_to_text import transcript_cache
+from services.speech_to_text.transcript_cache import (
+    get_transcript_cache_key,
+    load_cached_transcript,
+    save_transcript_to_cache,
+    ENTRY_FILE_EXTENSION
+)
+
+WINDOW_PCM_DATA = b"\x01\x02" * 1000
+WHISPER_RESPONSE = {"text": "Hi"}
+# Every saved test entry has the same size, the cache fits three of them and eviction leaves three of them
+ENTRY_SIZE_BYTES = len(b'{"text": "00"}')
+TRANSCRIPT_CACHE_MAX_BYTES = ENTRY_SIZE_BYTES * 7 // 2
+
+
+@pytest.fixture
+def cache_dir(monkeypatch, tmp_path):
+    cache_dir = str(tmp_path / "transcript-cache")
+    monkeypatch.setattr(transcript_cache, "TRANSCRIPT_CACHE_DIR_PATH", cache_dir)
+    monkeypatch.setattr(transcript_cache, "TRANSCRIPT_CACHE_MAX_BYTES", TRANSCRIPT_CACHE_MAX_BYTES)
+    monkeypatch.setattr(transcript_cache, "cache_bytes", None)
+    return cache_dir
+
+
+def get_entry_file_names(cache_dir: str) -> list:
+    return sorted(file_name for file_name in os.listdir(cache_dir) if file_name.endswith(ENTRY_FILE_EXTENSION))
+
+
+def test_key_depends_on_audio_and_model_version(monkeypatch):
+    cache_key = get_transcript_cache_key(WINDOW_PCM_DATA)
+
+    assert get_transcript_cache_key(bytes(WINDOW_PCM_DATA)) == cache_key
+    assert get_transcript_cache_key(WINDOW_PCM_DATA + b"\x00\x00") != cache_key
+
+    monkeypatch.setattr(transcript_cache, "WHISPER_MODEL_VERSION", "whisper-large-v3-next")
+    assert get_transcript_cache_key(WINDOW_PCM_DATA) != cache_key
+
+
+def test_saved_transcript_is_hit(cache_dir):
+    cache_key = get_transcript_cache_key(WINDOW_PCM_DATA)
+    assert load_cached_transcript(cache_key) is None
+
+    save_transcript_to_cache(cache_key, WHISPER_RESPONSE)
+
+    assert load_cached_transcript(cache_key) == WHISPER_RESPONSE
+    assert load_cached_transcript(get_transcript_cache_key(b"\x00" * 2000)) is None
+    # Partial files never stay in the cache
+    assert get_entry_file_names(cache_dir) == [f"{cache_key}{ENTRY_FILE_EXTENSION}"]
+
+
+def test_least_recently_used_entries_are_evicted_over_the_limit(cache_dir):
+    for index in range(3):
+        save_transcript_to_cache(f"key-{index}", {"text": f"{index:02d}"})
+        os.utime(f"{cache_dir}/key-{index}{ENTRY_FILE_EXTENSION}", (1000 + index, 1000 + index))
+
+    # Hit makes the oldest entry the most recently used one
+    assert load_cached_transcript("key-0") is not None
+    save_transcript_to_cache("key-3", {"text": "03"})
+
+    assert load_cached_transcript("key-1") is None
+    for key in ("key-0", "key-2", "key-3"):
+        assert load_cached_transcript(key) is not None
+
+
+def test_entries_of_other_processes_are_counted_on_next_scan(cache_dir):
+    save_transcript_to_cache("key-0", {"text": "00"})
+    # Other process of the machine saved entries, the counted size of this process stays below the limit
+    for index in range(1, 4):
+        with open(f"{cache_dir}/key-{index}{ENTRY_FILE_EXTENSION}", "w") as f:
+            f.write(f'{{"text": "{index:02d}"}}')
+        os.utime(f"{cache_dir}/key-{index}{ENTRY_FILE_EXTENSION}", (1000 + index, 1000 + index))
+    for index in range(4, 6):
+        save_transcript_to_cache(f"key-{index}", {"text": f"{index:02d}"})
+    assert len(get_entry_file_names(cache_dir)) == 6
+
+    # The counted size exceeds the limit with the next entry, the scan finds entries of all processes
+    save_transcript_to_cache("key-6", {"text": "06"})
+    entry_file_names = get_entry_file_names(cache_dir)
+    assert not {f"key-{index}{ENTRY_FILE_EXTENSION}" for index in range(1, 4)} & set(entry_file_names)
+    eviction_target_bytes = TRANSCRIPT_CACHE_MAX_BYTES * transcript_cache.EVICTION_TARGET_RATIO
+    assert len(entry_file_names) * ENTRY_SIZE_BYTES <= eviction_target_bytes
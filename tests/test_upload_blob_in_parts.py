@@ -0,0 +1,162 @@
+import base64
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.firebase.storage import upload_blob_in_parts as upload_module
+from services.firebase.storage.upload_blob_in_parts import get_part_blob_prefix, upload_blob_in_parts
+
+PART_SIZE_BYTES = 100
+MAX_COMPOSE_SOURCES = 3
+DESTINATION_BLOB_NAME = "project/translated.mp4"
+PART_BLOB_PREFIX = get_part_blob_prefix(DESTINATION_BLOB_NAME)
+ENCODER_TIMEOUT_SECONDS = 5
+
+
+class FakeBucket:
+    """Bucket that keeps blob bytes in memory and records uploads."""
+
+    def __init__(self):
+        self.blob_data = {}
+        self.uploaded_blob_names = []
+        self.condition = threading.Condition()
+
+    def blob(self, name: str) -> "FakeBlob":
+        return FakeBlob(self, name)
+
+    def list_blobs(self, prefix: str):
+        with self.condition:
+            return [FakeBlob(self, name) for name in self.blob_data if name.startswith(prefix)]
+
+    def put(self, name: str, data: bytes):
+        with self.condition:
+            self.blob_data[name] = data
+            self.uploaded_blob_names.append(name)
+            self.condition.notify_all()
+
+    def wait_for_upload(self, name: str):
+        with self.condition:
+            assert self.condition.wait_for(lambda: name in self.uploaded_blob_names, timeout=ENCODER_TIMEOUT_SECONDS)
+
+
+class FakeBlob:
+    def __init__(self, bucket: FakeBucket, name: str):
+        self.bucket = bucket
+        self.name = name
+        self.content_type = None
+
+    @property
+    def md5_hash(self) -> str:
+        return base64.b64encode(hashlib.md5(self.bucket.blob_data[self.name]).digest()).decode("utf-8")
+
+    def upload_from_string(self, data: bytes, content_type: str = None):
+        self.bucket.put(self.name, data)
+
+    def upload_from_filename(self, file_name: str):
+        with open(file_name, "rb") as f:
+            self.bucket.put(self.name, f.read())
+
+    def compose(self, sources: list):
+        self.bucket.put(self.name, b"".join(self.bucket.blob_data[source.name] for source in sources))
+
+    def delete(self):
+        with self.bucket.condition:
+            del self.bucket.blob_data[self.name]
+
+
+def get_part_blob_name(index: int) -> str:
+    return f"{PART_BLOB_PREFIX}{index:05d}"
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    bucket = FakeBucket()
+    monkeypatch.setattr(upload_module, "bucket", bucket)
+    monkeypatch.setattr(upload_module, "UPLOAD_PART_SIZE_BYTES", PART_SIZE_BYTES)
+    monkeypatch.setattr(upload_module, "UPLOAD_TAIL_POLL_INTERVAL_SECONDS", 0.01)
+    # Several compose levels are needed for a few parts
+    monkeypatch.setattr(upload_module, "MAX_COMPOSE_SOURCES", MAX_COMPOSE_SOURCES)
+    return bucket
+
+
+def write_file(file_path: str, data: bytes):
+    with open(file_path, "wb") as f:
+        f.write(data)
+
+
+def test_parts_are_composed_in_order(bucket, tmp_path):
+    data = os.urandom(PART_SIZE_BYTES * 10 + 17)
+    source_file_name = str(tmp_path / "translated.mp4")
+    write_file(source_file_name, data)
+
+    assert upload_blob_in_parts(source_file_name, bucket.blob(DESTINATION_BLOB_NAME))
+
+    # Parts and intermediate composed blobs are deleted
+    assert bucket.blob_data == {DESTINATION_BLOB_NAME: data}
+
+
+def test_retry_uploads_only_missing_and_changed_parts(bucket, tmp_path):
+    data = os.urandom(PART_SIZE_BYTES * 4)
+    source_file_name = str(tmp_path / "translated.mp4")
+    write_file(source_file_name, data)
+    # Previous attempt uploaded parts 0 and 1 of a longer file, then part 1 was changed by the encoder
+    bucket.put(get_part_blob_name(0), data[:PART_SIZE_BYTES])
+    bucket.put(get_part_blob_name(1), os.urandom(PART_SIZE_BYTES))
+    bucket.put(get_part_blob_name(4), os.urandom(PART_SIZE_BYTES))
+    bucket.uploaded_blob_names.clear()
+
+    assert upload_blob_in_parts(source_file_name, bucket.blob(DESTINATION_BLOB_NAME))
+
+    uploaded_part_names = [name for name in bucket.uploaded_blob_names if name[len(PART_BLOB_PREFIX):].isdigit()]
+    assert sorted(uploaded_part_names) == [get_part_blob_name(index) for index in (1, 2, 3)]
+    assert bucket.blob_data == {DESTINATION_BLOB_NAME: data}
+
+
+def test_parts_changed_by_encoder_are_uploaded_again(bucket, tmp_path):
+    parts = [os.urandom(PART_SIZE_BYTES) for _ in range(4)]
+    header = os.urandom(PART_SIZE_BYTES)
+    source_file_name = str(tmp_path / "translated.mp4")
+
+    def encode():
+        with open(source_file_name, "wb") as f:
+            for part in parts:
+                f.write(part)
+                f.flush()
+            # Header is written when the encoder is done, after the first part is uploaded
+            bucket.wait_for_upload(get_part_blob_name(0))
+            f.seek(0)
+            f.write(header)
+
+    with ThreadPoolExecutor(max_workers=1) as encoder_executor:
+        encoder_future = encoder_executor.submit(encode)
+        is_uploaded = upload_blob_in_parts(
+            source_file_name,
+            bucket.blob(DESTINATION_BLOB_NAME),
+            encoder_future=encoder_future
+        )
+
+    assert is_uploaded
+    assert bucket.uploaded_blob_names.count(get_part_blob_name(0)) == 2
+    assert bucket.blob_data == {DESTINATION_BLOB_NAME: header + b"".join(parts[1:])}
+
+
+def test_failed_encoder_composes_nothing(bucket, tmp_path):
+    source_file_name = str(tmp_path / "translated.mp4")
+    write_file(source_file_name, os.urandom(PART_SIZE_BYTES * 2))
+
+    def encode():
+        raise RuntimeError("Encoder failed")
+
+    with ThreadPoolExecutor(max_workers=1) as encoder_executor:
+        encoder_future = encoder_executor.submit(encode)
+        is_uploaded = upload_blob_in_parts(
+            source_file_name,
+            bucket.blob(DESTINATION_BLOB_NAME),
+            encoder_future=encoder_future
+        )
+
+    assert not is_uploaded
+    assert DESTINATION_BLOB_NAME not in bucket.blob_data
@@ -0,0 +1,59 @@
+"""
+Custom handler of Hugging Face Inference Endpoint with Whisper model, deployed together with the model repository.
+It accepts the requests sent by services/speech_to_text/whisper_endpoint.py:
+    - audio window (audio/flac body),
+      the response is {"text": ..., "chunks": [{"timestamp": [start, end], "text": ...}]}
+    - batch of windows (application/json body {"inputs": [<base64 FLAC>, ...]}),
+      the response is {"results": [<response of every window in the order of inputs>]}
+"""
+import base64
+from typing import Any, Dict, List, Union
+
+import torch
+from transformers import pipeline
+
+# Whisper decodes 30 seconds at a time, longer windows are split into chunks with timestamps
+CHUNK_LENGTH_SECONDS = 30
+# Chunks of all windows of the batch are decoded together in batches of this size
+MAX_CHUNKS_BATCH_SIZE = 16
+
+
+class EndpointHandler:
+    def __init__(self, path: str = ""):
+        self.pipeline = pipeline(
+            "automatic-speech-recognition",
+            model=path,
+            chunk_length_s=CHUNK_LENGTH_SECONDS,
+            device=0 if torch.cuda.is_available() else -1,
+            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32
+        )
+
+    def __call__(self, data: Dict[str, Any]) -> Union[Dict[str, Any], Dict[str, List[Dict[str, Any]]]]:
+        inputs = data["inputs"]
+
+        # Audio body is passed by the endpoint as bytes, JSON body as the parsed object
+        if isinstance(inputs, (bytes, bytearray)):
+            return self._transcribe([bytes(inputs)])[0]
+
+        if not isinstance(inputs, list) or not all(isinstance(audio_data, str) for audio_data in inputs):
+            raise ValueError("Batch request must be {\"inputs\": [<base64 audio>, ...]}.")
+
+        results = self._transcribe([base64.b64decode(audio_data) for audio_data in inputs])
+        return {"results": results}
+
+    def _transcribe(self, audio_datas: List[bytes]) -> List[Dict[str, Any]]:
+        outputs = self.pipeline(
+            audio_datas,
+            batch_size=MAX_CHUNKS_BATCH_SIZE,
+            return_timestamps=True
+        )
+        return [
+            {
+                "text": output["text"],
+                "chunks": [
+                    {"timestamp": list(chunk["timestamp"]), "text": chunk["text"]}
+                    for chunk in output.get("chunks", [])
+                ]
+            }
+            for output in outputs
+        ]